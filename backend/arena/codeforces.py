@@ -4,52 +4,102 @@ Wraps public API endpoints with caching and rate-limit awareness.
 Docs: https://codeforces.com/apiHelp
 Rate limit: 5 requests/second
 """
-import requests
-import time
+import re
 from functools import lru_cache
 
+from core import breaker, http, ratelimit
+
 CF_API_BASE = 'https://codeforces.com/api'
 
-# Simple rate-limit tracker
-_last_request_time = 0
-_MIN_INTERVAL = 0.25  # 250ms between requests (safe under 5/sec)
+http.register('codeforces', base_url=CF_API_BASE, timeout=10, pool_maxsize=4)
+
+# user.info accepts up to 10000 handles; keep chunks small enough for a sane URL length
+USER_INFO_CHUNK_SIZE = 500
+
+_HANDLE_NOT_FOUND = re.compile(r'handles?: User with handle (\S+) not found')
+
+# One shared budget (the API is keyless): 4 req/s keeps us safely under 5/sec
+_limiter = ratelimit.register('codeforces', rate=4, burst=1)
+
+# Opens when most recent calls fail (errors, 5xx) or take 5s+; see core/breaker.py
+_breaker = breaker.register('codeforces', slow_call_seconds=5)
+
 
+class CodeforcesAPIError(Exception):
+    """Codeforces answered with status FAILED; the message is the API's comment."""
 
-def _rate_limited_get(url, params=None):
-    """Make a GET request to the Codeforces API with rate limiting."""
-    global _last_request_time
-    now = time.time()
-    elapsed = now - _last_request_time
-    if elapsed < _MIN_INTERVAL:
-        time.sleep(_MIN_INTERVAL - elapsed)
 
-    response = requests.get(url, params=params, timeout=10)
-    _last_request_time = time.time()
-    response.raise_for_status()
+def _rate_limited_get(path, params=None):
+    """Make a GET request to the Codeforces API with rate limiting, through its circuit breaker."""
+    _breaker.raise_if_open()
+    _limiter.budget().acquire()
+    response = _breaker.call(lambda: http.client('codeforces').get(path, params=params))
 
-    data = response.json()
+    # API-level failures come back as 400 with a JSON comment explaining why
+    try:
+        data = response.json()
+    except ValueError:
+        response.raise_for_status()
+        raise
     if data.get('status') != 'OK':
-        raise Exception(data.get('comment', 'Codeforces API error'))
+        raise CodeforcesAPIError(data.get('comment', 'Codeforces API error'))
     return data['result']
 
 
+def is_unavailable():
+    """True while the Codeforces breaker is refusing calls (persisted data can't be refreshed)."""
+    return _breaker.is_open()
+
+
 def fetch_user_info(handle: str) -> dict:
     """
     Fetch user info from Codeforces.
     Returns dict with: handle, rating, maxRating, rank, maxRank, avatar, etc.
     """
-    result = _rate_limited_get(f'{CF_API_BASE}/user.info', {'handles': handle})
+    result = _rate_limited_get('/user.info', {'handles': handle})
     if not result:
         raise Exception(f'User "{handle}" not found on Codeforces')
     return result[0]
 
 
+def fetch_users_info(handles: list, chunk_size: int = USER_INFO_CHUNK_SIZE) -> tuple:
+    """
+    Fetch user info for many handles with as few user.info calls as possible.
+    Codeforces fails a whole call when one handle is unknown, so such handles
+    are dropped from the chunk and the call is retried.
+    Returns (infos, failures): infos maps each requested handle to its user
+    dict; failures maps handles that could not be fetched to a reason.
+    """
+    infos, failures = {}, {}
+    for start in range(0, len(handles), chunk_size):
+        chunk = list(handles[start:start + chunk_size])
+        while chunk:
+            try:
+                result = _rate_limited_get('/user.info', {'handles': ';'.join(chunk)})
+            except CodeforcesAPIError as e:
+                match = _HANDLE_NOT_FOUND.search(str(e))
+                missing = match and next((h for h in chunk if h.lower() == match.group(1).lower()), None)
+                if not missing:
+                    failures.update((h, str(e)) for h in chunk)
+                    break
+                failures[missing] = 'Not found on Codeforces'
+                chunk.remove(missing)
+                continue
+            except Exception as e:
+                failures.update((h, str(e)) for h in chunk)
+                break
+            # Results come back in request order (handles may have been renamed)
+            infos.update(zip(chunk, result))
+            break
+    return infos, failures
+
+
 def fetch_user_rating_history(handle: str) -> list:
     """
     Fetch rating change history for a user.
     Returns list of rating changes with contestId, contestName, oldRating, newRating.
     """
-    return _rate_limited_get(f'{CF_API_BASE}/user.rating', {'handle': handle})
+    return _rate_limited_get('/user.rating', {'handle': handle})
 
 
 def fetch_contest_standings(contest_id: int, count: int = 50, handles: str = None) -> dict:
@@ -60,7 +110,7 @@ def fetch_contest_standings(contest_id: int, count: int = 50, handles: str = Non
     params = {'contestId': contest_id, 'from': 1, 'count': count}
     if handles:
         params['handles'] = handles
-    return _rate_limited_get(f'{CF_API_BASE}/contest.standings', params)
+    return _rate_limited_get('/contest.standings', params)
 
 
 def fetch_recent_contests(gym: bool = False) -> list:
@@ -69,7 +119,7 @@ def fetch_recent_contests(gym: bool = False) -> list:
     Returns list of contest objects.
     """
     params = {'gym': str(gym).lower()}
-    return _rate_limited_get(f'{CF_API_BASE}/contest.list', params)
+    return _rate_limited_get('/contest.list', params)
 
 
 def get_cf_rank_tier(rating: int) -> str:
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from arena import codeforces
+from arena.sync import refresh_all_profiles
+
+
+class Command(BaseCommand):
+    help = 'Refresh all linked Codeforces profiles with batched user.info calls.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=codeforces.USER_INFO_CHUNK_SIZE,
+                            help='Handles per user.info call.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated, failures = refresh_all_profiles(chunk_size=options['chunk_size'])
+
+        for handle, reason in sorted(failures.items()):
+            self.stderr.write(f'  {handle}: {reason}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {updated} profile(s), {len(failures)} failed, '
+            f'in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_combined_score(apps, schema_editor):
+    CodeforcesProfile = apps.get_model('arena', 'CodeforcesProfile')
+    UserProfile = apps.get_model('users', 'UserProfile')
+    xp_by_user = dict(UserProfile.objects.values_list('user_id', 'total_xp'))
+    profiles = list(CodeforcesProfile.objects.all())
+    for profile in profiles:
+        profile.combined_score = (profile.cf_rating * 7 + xp_by_user.get(profile.user_id, 0) * 3) // 10
+    CodeforcesProfile.objects.bulk_update(profiles, ['combined_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arena', '0003_codeforcesprofile'),
+        ('users', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='codeforcesprofile',
+            name='combined_score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='codeforcesprofile',
+            index=models.Index(fields=['-combined_score', 'id'], name='cf_leaderboard_idx'),
+        ),
+        migrations.RunPython(backfill_combined_score, migrations.RunPython.noop),
+    ]
@@ -21,12 +21,33 @@ class CodeforcesProfile(models.Model):
     problems_solved = models.IntegerField(default=0)
     last_synced = models.DateTimeField(auto_now=True)
 
-    @property
-    def combined_score(self):
+    # Persisted so the leaderboard can sort/paginate on it in SQL.
+    # Kept current by save() and by the UserProfile post_save signal (arena/signals.py).
+    combined_score = models.IntegerField(default=0)
+
+    # Leaderboard order: highest score first, ties go to whoever linked first
+    LEADERBOARD_ORDERING = ('-combined_score', 'id')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-combined_score', 'id'], name='cf_leaderboard_idx'),
+        ]
+
+    @staticmethod
+    def compute_combined_score(cf_rating, internal_xp):
         """Combined score: CF rating (weighted 70%) + Internal XP (weighted 30%)."""
+        return (cf_rating * 7 + internal_xp * 3) // 10
+
+    def refresh_combined_score(self):
         xp = getattr(self.user, 'profile', None)
-        internal_xp = xp.total_xp if xp else 0
-        return int(self.cf_rating * 0.7 + internal_xp * 0.3)
+        self.combined_score = self.compute_combined_score(self.cf_rating, xp.total_xp if xp else 0)
+
+    def save(self, *args, **kwargs):
+        self.refresh_combined_score()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'combined_score' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'combined_score']
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f'{self.cf_handle} ({self.cf_rank})'
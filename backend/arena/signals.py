@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from users.models import UserProfile
+from .models import CodeforcesProfile
+
+
+@receiver(post_save, sender=UserProfile)
+def update_combined_score(sender, instance, **kwargs):
+    """Keep the persisted leaderboard score in step with the user's internal XP."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'total_xp' not in update_fields:
+        return
+    for cf_profile in CodeforcesProfile.objects.filter(user_id=instance.user_id):
+        score = CodeforcesProfile.compute_combined_score(cf_profile.cf_rating, instance.total_xp)
+        if score != cf_profile.combined_score:
+            CodeforcesProfile.objects.filter(pk=cf_profile.pk).update(combined_score=score)
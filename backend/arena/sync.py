@@ -0,0 +1,93 @@
+"""
+Codeforces profile sync.
+Pulls user.info for a linked handle and writes it onto a CodeforcesProfile.
+Runs in the background sync worker, never in a web request.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import codeforces
+from .models import CodeforcesProfile
+
+
+def apply_user_info(profile, cf_data):
+    """Copy user.info fields onto the profile (without saving)."""
+    profile.cf_rating = cf_data.get('rating', profile.cf_rating)
+    profile.cf_max_rating = cf_data.get('maxRating', profile.cf_max_rating)
+    profile.cf_rank = cf_data.get('rank', profile.cf_rank)
+    profile.cf_max_rank = cf_data.get('maxRank', profile.cf_max_rank)
+    profile.cf_avatar = cf_data.get('titlePhoto', profile.cf_avatar)
+    profile.cf_contribution = cf_data.get('contribution', profile.cf_contribution)
+    profile.cf_friend_count = cf_data.get('friendOfCount', profile.cf_friend_count)
+
+
+def sync_profile(profile):
+    """Refresh Codeforces stats for a profile. Raises on API errors."""
+    cf_data = codeforces.fetch_user_info(profile.cf_handle)
+    apply_user_info(profile, cf_data)
+    profile.save()
+    return profile
+
+
+SYNC_FIELDS = [
+    'cf_handle', 'cf_rating', 'cf_max_rating', 'cf_rank', 'cf_max_rank',
+    'cf_avatar', 'cf_contribution', 'cf_friend_count', 'combined_score', 'last_synced',
+]
+
+
+def _handle_collisions(profiles, renames):
+    """
+    Handles in `renames` (old -> new) that would collide with another
+    profile's handle after the refresh. Dropping one rename can put its
+    old handle back in the way of another, so this repeats until stable.
+    """
+    taken = {}
+    while True:
+        final = {}
+        for handle in profiles:
+            new = handle if handle in taken else renames.get(handle, handle)
+            final.setdefault(new, []).append(handle)
+        clashes = {
+            old: new for old, new in renames.items()
+            if old not in taken and len(final[new]) > 1
+        }
+        if not clashes:
+            return taken
+        taken.update(clashes)
+
+
+def refresh_all_profiles(chunk_size=codeforces.USER_INFO_CHUNK_SIZE):
+    """
+    Refresh every linked CodeforcesProfile with batched user.info calls and
+    a single bulk_update. Handles that fail are reported, not fatal; so are
+    renamed handles whose new name another profile has linked (those
+    profiles are skipped).
+    Returns (updated_count, failures) where failures maps handle -> reason.
+    """
+    profiles = {p.cf_handle: p for p in CodeforcesProfile.objects.select_related('user__profile')}
+    infos, failures = codeforces.fetch_users_info(list(profiles), chunk_size=chunk_size)
+
+    renames = {
+        handle: cf_data['handle'] for handle, cf_data in infos.items()
+        if cf_data.get('handle', handle) != handle
+    }
+    for old, new in _handle_collisions(profiles, renames).items():
+        failures[old] = f'renamed to {new}, which another profile has linked'
+        del infos[old], renames[old]
+
+    now = timezone.now()
+    updated = []
+    for handle, cf_data in infos.items():
+        profile = profiles[handle]
+        apply_user_info(profile, cf_data)
+        profile.cf_handle = cf_data.get('handle', profile.cf_handle)
+        profile.refresh_combined_score()  # bulk_update bypasses save()
+        profile.last_synced = now  # auto_now is not applied by bulk_update
+        updated.append(profile)
+
+    with transaction.atomic():
+        # Free the old handles first: two profiles may have swapped handles
+        for old in renames:
+            CodeforcesProfile.objects.filter(pk=profiles[old].pk).update(cf_handle=f'~{profiles[old].pk}')
+        CodeforcesProfile.objects.bulk_update(updated, SYNC_FIELDS, batch_size=500)
+    return len(updated), failures
@@ -0,0 +1,175 @@
+import json
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from django.test import TestCase
+from requests.adapters import BaseAdapter
+from rest_framework.test import APIClient
+
+from arena import codeforces, sync
+from arena.models import CodeforcesProfile
+from core import breaker, http, ratelimit
+from users.models import User, UserProfile
+
+
+class FakeCodeforces(BaseAdapter):
+    """
+    Transport for the 'codeforces' client answering user.info from `users`
+    (requested handle -> user dict). Like the real API, one unknown handle
+    fails the whole call. The handles of each call are kept in `calls`.
+    """
+
+    def __init__(self, users):
+        super().__init__()
+        self.users = users
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        handles = parse_qs(urlsplit(request.url).query)['handles'][0].split(';')
+        self.calls.append(handles)
+        missing = [h for h in handles if h not in self.users]
+        if missing:
+            status, body = 400, {'status': 'FAILED', 'comment': f'handles: User with handle {missing[0]} not found'}
+        else:
+            status, body = 200, {'status': 'OK', 'result': [self.users[h] for h in handles]}
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.request, response.url = request, request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def cf_user(handle, rating, **fields):
+    return {'handle': handle, 'rating': rating, 'maxRating': rating, 'rank': 'expert', 'maxRank': 'expert', **fields}
+
+
+class BatchedRefreshTests(TestCase):
+    def setUp(self):
+        self.codeforces = FakeCodeforces({})
+        http.configure('codeforces', transport=self.codeforces)
+        self.addCleanup(http.reset, 'codeforces')
+        breaker.reset('codeforces')
+        patcher = mock.patch.object(ratelimit.Budget, 'acquire')  # 4 req/s would only slow the tests down
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def link(self, handle):
+        user = User.objects.create(username=f'user-{handle}')
+        return CodeforcesProfile.objects.create(user=user, cf_handle=handle)
+
+    def test_handles_are_fetched_in_chunks(self):
+        self.codeforces.users = {h: cf_user(h, 1500) for h in 'abcde'}
+
+        infos, failures = codeforces.fetch_users_info(list('abcde'), chunk_size=2)
+
+        self.assertEqual(self.codeforces.calls, [['a', 'b'], ['c', 'd'], ['e']])
+        self.assertEqual(set(infos), set('abcde'))
+        self.assertEqual(failures, {})
+
+    def test_unknown_handles_are_dropped_and_the_chunk_retried(self):
+        self.codeforces.users = {'tourist': cf_user('tourist', 3800)}
+
+        infos, failures = codeforces.fetch_users_info(['ghost', 'tourist'])
+
+        self.assertEqual(self.codeforces.calls, [['ghost', 'tourist'], ['tourist']])
+        self.assertEqual(infos['tourist']['rating'], 3800)
+        self.assertEqual(failures, {'ghost': 'Not found on Codeforces'})
+
+    def test_refresh_updates_every_profile_and_its_score(self):
+        self.link('tourist')
+        self.link('petr')
+        self.codeforces.users = {'tourist': cf_user('tourist', 3800), 'petr': cf_user('petr', 3000)}
+
+        with self.assertNumQueries(4):  # profiles, then one bulk UPDATE (plus its savepoint pair)
+            updated, failures = sync.refresh_all_profiles()
+
+        self.assertEqual((updated, failures), (2, {}))
+        scores = dict(CodeforcesProfile.objects.values_list('cf_handle', 'combined_score'))
+        self.assertEqual(scores, {'tourist': 2660, 'petr': 2100})
+
+    def test_renamed_handles_follow_the_account(self):
+        self.link('old')
+        self.codeforces.users = {'old': cf_user('new', 2000)}
+
+        sync.refresh_all_profiles()
+
+        self.assertEqual(CodeforcesProfile.objects.get().cf_handle, 'new')
+
+    def test_swapped_handles_are_both_renamed(self):
+        first, second = self.link('a'), self.link('b')
+        self.codeforces.users = {'a': cf_user('b', 1000), 'b': cf_user('a', 2000)}
+
+        updated, failures = sync.refresh_all_profiles()
+
+        self.assertEqual((updated, failures), (2, {}))
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.cf_handle, second.cf_handle), ('b', 'a'))
+
+    def test_renames_onto_a_linked_handle_are_skipped_and_reported(self):
+        renamed, holder = self.link('old'), self.link('new')
+        # 'chain' would take 'old', but 'old' stays put once its own rename is refused
+        chained = self.link('chain')
+        self.codeforces.users = {
+            'old': cf_user('new', 2000), 'new': cf_user('new', 1800), 'chain': cf_user('old', 1700),
+        }
+
+        updated, failures = sync.refresh_all_profiles()
+
+        self.assertEqual(updated, 1)
+        self.assertEqual(set(failures), {'old', 'chain'})
+        self.assertIn('another profile has linked', failures['old'])
+        handles = {p.pk: (p.cf_handle, p.cf_rating) for p in CodeforcesProfile.objects.all()}
+        self.assertEqual(handles, {renamed.pk: ('old', 0), holder.pk: ('new', 1800), chained.pk: ('chain', 0)})
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.profiles = [
+            CodeforcesProfile.objects.create(user=User.objects.create(username=handle), cf_handle=handle,
+                                             cf_rating=rating)
+            for handle, rating in [('a', 1500), ('b', 2000), ('c', 1500), ('d', 1000), ('e', 2400)]
+        ]
+        self.client = APIClient(SERVER_NAME='localhost')
+
+    def handles(self, response):
+        return [row['cf_handle'] for row in response.data['results']]
+
+    def test_pages_follow_score_then_link_order(self):
+        first = self.client.get('/api/arena/leaderboard/', {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+
+        self.assertEqual(self.handles(first) + self.handles(second) + self.handles(third), list('ebacd'))
+        self.assertIsNone(third.data['next'])
+
+    def test_xp_changes_move_the_score(self):
+        profile = UserProfile.objects.create(user=self.profiles[3].user, total_xp=5000)
+
+        self.assertEqual(CodeforcesProfile.objects.get(cf_handle='d').combined_score, 2200)
+        profile.total_xp = 0
+        profile.save(update_fields=['total_xp'])
+        self.assertEqual(CodeforcesProfile.objects.get(cf_handle='d').combined_score, 700)
+
+    def test_bad_cursors_are_not_found(self):
+        for cursor in ('not-base64!', 'WyJ4IiwxXQ', 'WzEwMCxudWxsXQ'):  # garbage, ["x",1], [100,null]
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/arena/leaderboard/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_position_counts_the_rows_ahead(self):
+        expected = {'e': 1, 'b': 2, 'a': 3, 'c': 4, 'd': 5}
+        for profile in self.profiles:
+            self.client.force_authenticate(profile.user)
+            with self.subTest(handle=profile.cf_handle), self.assertNumQueries(2):
+                response = self.client.get('/api/arena/leaderboard/me/')
+            self.assertEqual(response.data['rank'], expected[profile.cf_handle])
+
+    def test_position_needs_a_linked_profile(self):
+        self.client.force_authenticate(User.objects.create(username='unlinked'))
+
+        self.assertEqual(self.client.get('/api/arena/leaderboard/me/').status_code, 404)
@@ -6,5 +6,6 @@ urlpatterns = [
     path('cf-profile/', views.CodeforcesProfileView.as_view(), name='cf-profile'),
     path('cf-sync/', views.CodeforcesSyncView.as_view(), name='cf-sync'),
     path('leaderboard/', views.LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboard/me/', views.LeaderboardPositionView.as_view(), name='leaderboard-position'),
     path('challenges/', views.ChallengeListView.as_view(), name='challenge-list'),
 ]
@@ -4,13 +4,20 @@ from rest_framework.views import APIView
 from .models import CodeforcesProfile, Challenge
 from .serializers import CodeforcesProfileSerializer, LinkCodeforcesSerializer, ChallengeSerializer
 from . import codeforces
+from core import breaker
+from core.pagination import KeysetPagination, keyset_after, keyset_values
+from sync import queue
+from sync.models import SyncJob
+from sync.serializers import SyncJobSerializer
 
 
 class LinkCodeforcesView(APIView):
     """
     POST /api/arena/link-codeforces/
     Body: { "handle": "tourist" }
-    Links a Codeforces handle to the current user and syncs stats.
+    Links a Codeforces handle to the current user. Unlike the GitHub link,
+    no sync job is queued: the user.info call that verifies the handle is
+    the whole Codeforces sync, so its stats are stored straight away.
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -22,6 +29,13 @@ class LinkCodeforcesView(APIView):
         # Verify handle exists on Codeforces
         try:
             cf_data = codeforces.fetch_user_info(handle)
+        except breaker.CircuitOpen as e:
+            # Fail fast instead of waiting on Codeforces
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(int(e.retry_after) + 1)},
+            )
         except Exception as e:
             return Response(
                 {'error': f'Could not find Codeforces user "{handle}": {str(e)}'},
@@ -61,53 +75,78 @@ class CodeforcesProfileView(APIView):
                 {'error': 'No Codeforces profile linked. Use /api/arena/link-codeforces/ first.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        return Response(CodeforcesProfileSerializer(profile).data)
+        data = CodeforcesProfileSerializer(profile).data
+        data['stale'] = codeforces.is_unavailable()
+        return Response(data)
 
 
 class CodeforcesSyncView(APIView):
-    """POST /api/arena/cf-sync/ — refresh CF stats from Codeforces API."""
+    """
+    POST /api/arena/cf-sync/ — queue a refresh of CF stats.
+    Returns 202 with the sync job; poll /api/sync/jobs/<id>/ for completion.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        try:
-            profile = CodeforcesProfile.objects.get(user=request.user)
-        except CodeforcesProfile.DoesNotExist:
+        if not CodeforcesProfile.objects.filter(user=request.user).exists():
             return Response(
                 {'error': 'No Codeforces profile linked.'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        try:
-            cf_data = codeforces.fetch_user_info(profile.cf_handle)
-        except Exception as e:
-            return Response(
-                {'error': f'Codeforces API error: {str(e)}'},
-                status=status.HTTP_502_BAD_GATEWAY
-            )
+        job = queue.enqueue(request.user, SyncJob.CODEFORCES)
+        return Response(SyncJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-        profile.cf_rating = cf_data.get('rating', profile.cf_rating)
-        profile.cf_max_rating = cf_data.get('maxRating', profile.cf_max_rating)
-        profile.cf_rank = cf_data.get('rank', profile.cf_rank)
-        profile.cf_max_rank = cf_data.get('maxRank', profile.cf_max_rank)
-        profile.cf_avatar = cf_data.get('titlePhoto', profile.cf_avatar)
-        profile.cf_contribution = cf_data.get('contribution', profile.cf_contribution)
-        profile.cf_friend_count = cf_data.get('friendOfCount', profile.cf_friend_count)
-        profile.save()
 
-        return Response(CodeforcesProfileSerializer(profile).data)
+class LeaderboardPagination(KeysetPagination):
+    ordering = CodeforcesProfile.LEADERBOARD_ORDERING
+    page_size = 50
 
 
 class LeaderboardView(generics.ListAPIView):
     """
-    GET /api/arena/leaderboard/
-    Ranked leaderboard sorted by combined score (70% CF + 30% XP).
+    GET /api/arena/leaderboard/?cursor=
+    Ranked leaderboard sorted by combined score (70% CF + 30% XP), ties
+    broken by who linked first. Keyset-paginated on the leaderboard index.
     """
     serializer_class = CodeforcesProfileSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = LeaderboardPagination
 
     def get_queryset(self):
-        return CodeforcesProfile.objects.select_related('user', 'user__profile') \
-            .order_by('-cf_rating')
+        return CodeforcesProfile.objects.select_related('user')
+
+
+class LeaderboardPositionView(APIView):
+    """
+    GET /api/arena/leaderboard/me/
+    Current user's rank: one count over the rows that sort ahead of them,
+    answered from the (-combined_score, id) index. That reads O(rank) index
+    entries, not O(log n): a stored rank would make every score change
+    rewrite the rank of everyone it passes, and this endpoint is read far
+    less often than scores change.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            profile = CodeforcesProfile.objects.select_related('user').get(user=request.user)
+        except CodeforcesProfile.DoesNotExist:
+            return Response(
+                {'error': 'No Codeforces profile linked.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        ordering = CodeforcesProfile.LEADERBOARD_ORDERING
+        reverse = tuple(f[1:] if f.startswith('-') else f'-{f}' for f in ordering)
+        ahead = CodeforcesProfile.objects.filter(
+            keyset_after(reverse, keyset_values(profile, ordering))
+        ).count()
+
+        return Response({
+            'rank': ahead + 1,
+            'profile': CodeforcesProfileSerializer(profile).data,
+        })
 
 
 class ChallengeListView(generics.ListAPIView):
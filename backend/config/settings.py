@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     'arena',
     'github_integration',
     'forum',
+    'sync',
 ]
 
 MIDDLEWARE = [
@@ -113,8 +114,74 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Reverse proxies in front of Django; client IPs are then read from X-Forwarded-For
+    # (used for anonymous forum view de-duplication, forum/viewcounts.py). 0 trusts only
+    # REMOTE_ADDR; DRF's None would take X-Forwarded-For as sent, which clients can forge.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
+}
+
+# Caches
+# The 'github' alias stores conditional-request validators + bodies for the
+# GitHub API. Backend is pluggable via GITHUB_CACHE_BACKEND:
+#   locmem (default), file (GITHUB_CACHE_LOCATION = directory),
+#   db (run `python manage.py createcachetable` first).
+_GITHUB_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'github-responses'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache' / 'github')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'github_response_cache'),
+}
+_github_cache_backend, _github_cache_location = _GITHUB_CACHE_BACKENDS[
+    os.environ.get('GITHUB_CACHE_BACKEND', 'locmem')
+]
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'github': {
+        'BACKEND': _github_cache_backend,
+        'LOCATION': os.environ.get('GITHUB_CACHE_LOCATION', _github_cache_location),
+        'TIMEOUT': int(os.environ.get('GITHUB_CACHE_MAX_AGE', str(7 * 24 * 3600))),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('GITHUB_CACHE_MAX_ENTRIES', '5000')),
+        },
+    },
 }
 
 # GitHub Integration
 GITHUB_WEBHOOK_SECRET = os.environ.get('GITHUB_WEBHOOK_SECRET', '')
 GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN', '')  # Optional server-level PAT for higher rate limits
+GITHUB_RESPONSE_CACHE = 'github'  # Cache alias for ETag/Last-Modified conditional requests
+# Webhook deliveries (python manage.py process_github_webhooks)
+GITHUB_WEBHOOK_CLAIM_TIMEOUT_SECONDS = 300
+GITHUB_WEBHOOK_MAX_ATTEMPTS = 3  # then the delivery is marked failed and left alone
+GITHUB_WEBHOOK_RETENTION_DAYS = 7  # processed deliveries kept this long to drop redeliveries
+# Pushes / PR updates by one user to one repo within this window share a feed post (0 = never merge)
+GITHUB_ACTIVITY_WINDOW_MINUTES = int(os.environ.get('GITHUB_ACTIVITY_WINDOW_MINUTES', '60'))
+# /api/github/user/<username>/ is cached (in GITHUB_RESPONSE_CACHE): fresh for TTL, then served
+# stale for up to STALE_SECONDS more while one request refreshes it in the background
+GITHUB_PUBLIC_PROFILE_TTL = 300
+GITHUB_PUBLIC_PROFILE_STALE_SECONDS = 3600
+
+# Upstream HTTP clients (pooled keep-alive sessions, see core/http.py)
+UPSTREAM_HTTP = {
+    'github': {
+        'pool_maxsize': int(os.environ.get('GITHUB_HTTP_POOL_SIZE', '10')),
+        'max_retries': int(os.environ.get('GITHUB_HTTP_RETRIES', '3')),
+    },
+    'codeforces': {
+        'pool_maxsize': int(os.environ.get('CODEFORCES_HTTP_POOL_SIZE', '4')),
+        'max_retries': int(os.environ.get('CODEFORCES_HTTP_RETRIES', '3')),
+    },
+}
+
+# Background profile sync (python manage.py run_sync_worker)
+SYNC_STALE_AFTER_MINUTES = int(os.environ.get('SYNC_STALE_AFTER_MINUTES', '360'))
+SYNC_MAX_ATTEMPTS = 3
+SYNC_JOB_TIMEOUT_SECONDS = 300
+
+# Home timelines (python manage.py run_feed_fanout, see feed/timeline.py)
+FEED_FANOUT_MAX_FOLLOWERS = int(os.environ.get('FEED_FANOUT_MAX_FOLLOWERS', '5000'))  # above this, fan out on read
+FEED_FANOUT_BATCH_SIZE = 1000
+FEED_BACKFILL_POSTS = 200
+FEED_FANOUT_TASK_TIMEOUT_SECONDS = 300
+FEED_FANOUT_MAX_ATTEMPTS = 3
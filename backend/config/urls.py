@@ -8,4 +8,6 @@ urlpatterns = [
     path('api/arena/', include('arena.urls')),
     path('api/github/', include('github_integration.urls')),
     path('api/forum/', include('forum.urls')),
+    path('api/sync/', include('sync.urls')),
+    path('api/metrics/', include('core.urls')),
 ]
@@ -0,0 +1,183 @@
+"""
+Per-upstream circuit breakers.
+
+A breaker watches the outcomes of calls to one upstream over a rolling
+window. When enough of them fail (exception or 5xx) or are slow, it
+opens: calls raise CircuitOpen at once instead of each waiting out the
+client timeout and tying up a worker. After open_seconds it goes
+half-open and lets a few probe calls through; a successful probe closes
+it, a failed one opens it again.
+
+    breaker.register('github', slow_call_seconds=5)
+    response = breaker.get('github').call(lambda: client.get(path))
+
+Views catch CircuitOpen to fail fast or serve persisted data marked
+stale. State is per process and reported by snapshot() (/api/metrics/).
+"""
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """The upstream's breaker is open; retry_after is in seconds."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f'{name} is unavailable (circuit open); retry in {int(retry_after) + 1}s')
+        self.retry_after = retry_after
+
+
+def _server_error(response):
+    return getattr(response, 'status_code', 200) >= 500
+
+
+class CircuitBreaker:
+    def __init__(self, name, window_seconds=60, min_calls=10, failure_rate=0.5,
+                 slow_call_seconds=None, slow_call_rate=0.8, open_seconds=30, half_open_probes=2):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self.opened_at = None
+        self.times_opened = 0
+        self._calls = deque()  # (finished_at, failed, slow)
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+
+    def _rates(self):
+        n = len(self._calls)
+        if not n:
+            return 0.0, 0.0
+        return sum(c[1] for c in self._calls) / n, sum(c[2] for c in self._calls) / n
+
+    def _open(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self._calls.clear()
+
+    def raise_if_open(self):
+        """Raise CircuitOpen if calls are being refused, without taking a half-open probe slot."""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.opened_at + self.open_seconds - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpen(self.name, remaining)
+
+    def before(self):
+        """Admit a call or raise CircuitOpen. Half-open admits half_open_probes calls at a time."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                remaining = self.opened_at + self.open_seconds - now
+                if remaining > 0:
+                    raise CircuitOpen(self.name, remaining)
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    raise CircuitOpen(self.name, 1)
+                self._probes += 1
+
+    def record(self, failed, elapsed):
+        with self._lock:
+            now = time.monotonic()
+            slow = self.slow_call_seconds is not None and elapsed >= self.slow_call_seconds
+            if self.state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                return
+            if self.state == OPEN:
+                return  # a call admitted before the breaker opened
+
+            self._calls.append((now, failed, slow))
+            self._prune(now)
+            if len(self._calls) >= self.min_calls:
+                failures, slow_calls = self._rates()
+                if failures >= self.failure_rate or slow_calls >= self.slow_call_rate:
+                    self._open(now)
+
+    def call(self, fn, is_failure=_server_error):
+        """Run fn() through the breaker. Exceptions and results where is_failure(result) count as failures."""
+        self.before()
+        started = time.monotonic()
+        try:
+            result = fn()
+        except BaseException:
+            self.record(True, time.monotonic() - started)
+            raise
+        self.record(is_failure(result), time.monotonic() - started)
+        return result
+
+    def is_open(self):
+        """True while calls would be refused (open and not yet due for a probe)."""
+        with self._lock:
+            return self.state == OPEN and time.monotonic() < self.opened_at + self.open_seconds
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            failures, slow_calls = self._rates()
+            return {
+                'state': self.state,
+                'calls_in_window': len(self._calls),
+                'failure_rate': round(failures, 3),
+                'slow_call_rate': round(slow_calls, 3),
+                'times_opened': self.times_opened,
+                'retry_in': (
+                    max(round(self.opened_at + self.open_seconds - now, 1), 0)
+                    if self.state == OPEN else None
+                ),
+            }
+
+
+_breakers = {}
+_lock = threading.Lock()
+
+
+def register(name, **options):
+    """Declare an upstream's breaker (see CircuitBreaker for options). Service modules call this at import time."""
+    with _lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **options)
+    return _breakers[name]
+
+
+def get(name):
+    return _breakers[name]
+
+
+def reset(name=None):
+    """Close one breaker, or all of them, and forget their history (tests)."""
+    with _lock:
+        breakers = [_breakers[name]] if name else list(_breakers.values())
+    for b in breakers:
+        with b._lock:
+            b.state, b.opened_at, b._probes = CLOSED, None, 0
+            b._calls.clear()
+
+
+def snapshot():
+    """{upstream: breaker state} for every registered upstream."""
+    with _lock:
+        breakers = dict(_breakers)
+    return {name: b.snapshot() for name, b in breakers.items()}
@@ -0,0 +1,163 @@
+"""
+Shared HTTP client layer for upstream APIs (GitHub, Codeforces, ...).
+
+Each upstream gets one pooled keep-alive requests.Session, so repeated
+calls reuse TCP/TLS connections instead of handshaking every time.
+Sessions retry idempotent requests with exponential backoff on 429/5xx
+and ask for gzip-compressed bodies.
+
+Pool sizes, retries and timeouts can be tuned per upstream with the
+UPSTREAM_HTTP setting, e.g.:
+
+    UPSTREAM_HTTP = {
+        'github': {'pool_maxsize': 32, 'max_retries': 2},
+    }
+
+For tests, point an upstream at a local fake server or swap its transport:
+
+    http.configure('github', base_url='http://127.0.0.1:8765')
+    http.configure('github', transport=MyFakeAdapter())
+"""
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+DEFAULTS = {
+    'base_url': '',
+    'pool_connections': 4,
+    'pool_maxsize': 10,
+    'max_retries': 3,
+    'backoff_factor': 0.3,
+    'timeout': 10,
+    'headers': {},
+    'transport': None,
+}
+
+
+class _CappedRetry(Retry):
+    """Retry that never honours a Retry-After longer than MAX_RETRY_AFTER seconds."""
+    MAX_RETRY_AFTER = 10
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.MAX_RETRY_AFTER)
+
+
+class UpstreamClient:
+    """
+    Pooled HTTP client for a single upstream.
+    Relative paths are joined onto base_url; absolute URLs are used as-is
+    (e.g. pagination links returned by the upstream).
+    """
+
+    def __init__(self, name, base_url='', pool_connections=4, pool_maxsize=10,
+                 max_retries=3, backoff_factor=0.3, timeout=10, headers=None, transport=None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        self.session.headers.update(headers or {})
+
+        if transport is None:
+            retry = _CappedRetry(
+                total=max_retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset({'GET', 'HEAD'}),
+                raise_on_status=False,
+            )
+            transport = HTTPAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                max_retries=retry,
+            )
+        self.transport = transport
+        self.session.mount('http://', transport)
+        self.session.mount('https://', transport)
+
+    def url(self, path):
+        if path.startswith(('http://', 'https://')):
+            return path
+        return f'{self.base_url}/{path.lstrip("/")}'
+
+    def get(self, path, params=None, headers=None, timeout=None):
+        return self.session.get(
+            self.url(path),
+            params=params,
+            headers=headers,
+            timeout=timeout or self.timeout,
+        )
+
+    def post(self, path, json=None, headers=None, timeout=None):
+        return self.session.post(
+            self.url(path),
+            json=json,
+            headers=headers,
+            timeout=timeout or self.timeout,
+        )
+
+    def close(self):
+        self.session.close()
+
+
+_defaults = {}
+_overrides = {}
+_clients = {}
+_lock = threading.Lock()
+
+
+def register(name, **options):
+    """
+    Declare an upstream with its default options (see DEFAULTS).
+    Service modules call this at import time; the session itself is built lazily.
+    """
+    _defaults[name] = options
+
+
+def configure(name, **options):
+    """Override options for an upstream at runtime (tests, fake servers) and rebuild its client."""
+    with _lock:
+        _overrides.setdefault(name, {}).update(options)
+        _discard(name)
+
+
+def reset(name=None):
+    """Drop runtime overrides and pooled sessions for one upstream, or for all of them."""
+    with _lock:
+        names = [name] if name else list(_clients) + list(_overrides)
+        for n in names:
+            _overrides.pop(n, None)
+            _discard(n)
+
+
+def _discard(name):
+    client = _clients.pop(name, None)
+    if client:
+        client.close()
+
+
+def _options(name):
+    options = dict(DEFAULTS)
+    options.update(_defaults.get(name, {}))
+    options.update(getattr(settings, 'UPSTREAM_HTTP', {}).get(name, {}))
+    options.update(_overrides.get(name, {}))
+    return options
+
+
+def client(name):
+    """Return the shared pooled client for an upstream, creating it on first use."""
+    c = _clients.get(name)
+    if c is None:
+        with _lock:
+            c = _clients.get(name)
+            if c is None:
+                c = _clients[name] = UpstreamClient(name, **_options(name))
+    return c
@@ -0,0 +1,137 @@
+"""
+Keyset (seek) pagination.
+
+The cursor holds the sort-key values of the last row served, and the next
+page is selected with a WHERE on those values instead of an OFFSET. Every
+page is an index range scan however deep the client goes, and no COUNT(*)
+is issued.
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision (DjangoJSONEncoder truncates to ms, which would skip rows)."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def keyset_after(ordering, values):
+    """
+    Q selecting rows that sort strictly after `values` under `ordering`
+    (field names, '-' prefix for descending). Expands the row comparison
+    by hand so mixed directions work on every backend.
+    """
+    q = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        op = 'lt' if field.startswith('-') else 'gt'
+        q |= Q(**equal, **{f'{name}__{op}': value})
+        equal[name] = value
+    return q
+
+
+def keyset_values(obj, ordering):
+    return [getattr(obj, field.lstrip('-')) for field in ordering]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a fixed ordering. Subclasses set `ordering`; the
+    last field must be unique (usually the pk) and none may be NULL.
+    Response shape: {"next": <url or null>, "results": [...]}.
+    """
+    ordering = ('-created_at', '-pk')
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = self.decode_cursor(request, queryset.model)
+        if cursor is not None:
+            queryset = queryset.filter(keyset_after(self.ordering, cursor))
+
+        rows = list(queryset[:self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        self.page = rows[:self.limit]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, cls=_CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model=None):
+        """
+        The cursor's values, or None if there is none. With `model`, each
+        value is coerced with its ordering field's to_python(), so a cursor
+        of the right shape but wrong types is a 404 rather than a 500.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError('cursor does not match the ordering')
+            if model is not None:
+                values = [self._coerce(model, field, value) for field, value in zip(self.ordering, values)]
+        except (ValueError, TypeError, ValidationError):
+            raise NotFound('Invalid cursor')
+        return values
+
+    @staticmethod
+    def _coerce(model, field, value):
+        name = field.lstrip('-')
+        try:
+            model_field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value  # an annotation; left to the database
+        value = model_field.to_python(value)
+        if value is None:
+            raise ValueError('cursor values cannot be null')
+        return value
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        cursor = self.encode_cursor(keyset_values(self.page[-1], self.ordering))
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,221 @@
+"""
+Per-token request budgets for upstream APIs (GitHub, Codeforces, ...).
+
+Each upstream registers a limiter; each credential it calls with (a
+token, or 'anonymous') gets its own Budget, so one user's calls never
+queue behind another's. A Budget does two things:
+
+- Local pacing: a token bucket at the upstream's documented rate, so
+  threads in one worker are spread out instead of bursting.
+- Quota tracking: X-RateLimit-Limit / -Remaining / -Reset from every
+  response (where the upstream sends them). Calls run at the local pace
+  until the remaining budget falls to its low-water mark (a fraction of
+  the limit); below it, what is left is spread over the rest of the
+  window. An exhausted budget fails fast with RateLimitExceeded instead
+  of spending a request on a 403.
+
+    ratelimit.register('github', rate=10, burst=10, limit=5000)
+    budget = ratelimit.limiter('github').budget(key)
+    budget.acquire()
+    response = ...
+    budget.update(response.headers)
+
+Budgets live in process memory; snapshot() reports this process's view
+(served at /api/metrics/ for staff).
+"""
+import threading
+import time
+
+
+class RateLimitExceeded(Exception):
+    """The budget can't serve a request soon enough; retry_after is in seconds."""
+
+    def __init__(self, message, retry_after=0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _header_int(headers, name):
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class Budget:
+    """
+    Request budget for one credential.
+    acquire() reserves a slot and sleeps until that slot is due, so
+    concurrent callers are spread out at the current pace.
+    """
+
+    def __init__(self, name, label, rate, burst, limit=None, max_wait=30, low_water=0.1):
+        self.name = name
+        self.label = label
+        self.rate = rate
+        self.capacity = burst
+        self.limit = limit
+        self.max_wait = max_wait
+        self.low_water = low_water
+        self.remaining = None  # unknown until the upstream reports it
+        self.reset_at = None   # epoch seconds
+        self.requests = 0
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        if self.reset_at is not None and now >= self.reset_at:
+            self.remaining = self.reset_at = None
+
+    def _pace(self, now):
+        """
+        Requests/second: the upstream rate, or, once the window's budget is
+        down to the low-water mark, slower so what is left lasts the window.
+        """
+        if self.remaining is None or self.reset_at is None or self.limit is None:
+            return self.rate
+        if self.remaining > self.limit * self.low_water:
+            return self.rate
+        return min(self.rate, max(self.remaining, 1) / max(self.reset_at - now, 1))
+
+    def headroom(self):
+        """Requests left in the current window (the nominal limit if unknown)."""
+        with self._lock:
+            self._expire(time.time())
+            if self.remaining is not None:
+                return self.remaining
+            return self.limit if self.limit is not None else float('inf')
+
+    def acquire(self):
+        with self._lock:
+            wall = time.time()
+            self._expire(wall)
+            if self.remaining is not None and self.remaining <= 0:
+                retry_after = max(self.reset_at - wall, 0)
+                raise RateLimitExceeded(
+                    f'{self.name} rate limit exhausted; resets in {int(retry_after)}s', retry_after,
+                )
+
+            now = time.monotonic()
+            rate = self._pace(wall)
+            tokens = min(self.capacity, self._tokens + (now - self._updated) * rate) - 1
+            wait = -tokens / rate if tokens < 0 else 0
+            if wait > self.max_wait:
+                raise RateLimitExceeded(f'{self.name} rate limit nearly exhausted', wait)
+
+            self._tokens = tokens
+            self._updated = now
+            if self.remaining is not None:
+                self.remaining -= 1
+            self.requests += 1
+        if wait:
+            time.sleep(wait)
+
+    def update(self, headers):
+        """Record X-RateLimit-* headers from a response (no-op if absent)."""
+        remaining = _header_int(headers, 'X-RateLimit-Remaining')
+        reset_at = _header_int(headers, 'X-RateLimit-Reset')
+        if remaining is None or reset_at is None:
+            return
+        limit = _header_int(headers, 'X-RateLimit-Limit')
+        with self._lock:
+            if limit is not None:
+                self.limit = limit
+            if reset_at == self.reset_at and self.remaining is not None:
+                # Responses can arrive out of order; within a window the count only goes down
+                self.remaining = min(self.remaining, remaining)
+            elif self.reset_at is None or reset_at > self.reset_at:
+                self.remaining, self.reset_at = remaining, reset_at
+
+    def exhaust(self, retry_after):
+        """Mark the budget empty for `retry_after` seconds (a 403/429 without usable headers)."""
+        with self._lock:
+            self.remaining = 0
+            self.reset_at = time.time() + retry_after
+
+    def snapshot(self):
+        with self._lock:
+            self._expire(time.time())
+            return {
+                'label': self.label,
+                'limit': self.limit,
+                'remaining': self.remaining,
+                'reset_at': self.reset_at,
+                'pace_per_second': round(self._pace(time.time()), 3),
+                'requests': self.requests,
+            }
+
+
+class Limiter:
+    """The budgets for one upstream, keyed by credential identity."""
+
+    def __init__(self, name, rate, burst, limit=None, max_wait=30, low_water=0.1):
+        self.name = name
+        self.options = {'rate': rate, 'burst': burst, 'limit': limit, 'max_wait': max_wait, 'low_water': low_water}
+        self._budgets = {}
+        self._lock = threading.Lock()
+
+    def budget(self, key='anonymous', label=None, limit=None):
+        """
+        Budget for a credential. `key` should be a non-reversible identity
+        (e.g. a token hash), never the token itself. `limit` overrides the
+        nominal limit until the upstream reports the real one.
+        """
+        budget = self._budgets.get(key)
+        if budget is None:
+            with self._lock:
+                budget = self._budgets.get(key)
+                if budget is None:
+                    options = dict(self.options)
+                    if limit is not None:
+                        options['limit'] = limit
+                    budget = self._budgets[key] = Budget(self.name, label or key[:12], **options)
+        return budget
+
+    def pick(self, candidates):
+        """The (key, label, limit) candidate with the most headroom; ties go to the first."""
+        return max(candidates, key=lambda c: self.budget(*c).headroom())
+
+    def snapshot(self):
+        with self._lock:
+            budgets = list(self._budgets.values())
+        return [b.snapshot() for b in budgets]
+
+
+_limiters = {}
+_lock = threading.Lock()
+
+
+def register(name, rate, burst=1, limit=None, max_wait=30, low_water=0.1):
+    """
+    Declare an upstream's limits: local pace (`rate` req/s, `burst`), the
+    nominal per-window `limit` if known, `max_wait`, the longest a caller
+    is made to sleep before RateLimitExceeded is raised instead, and
+    `low_water`, the fraction of the limit below which the remaining
+    budget is spread over the window. Service modules call this at import
+    time.
+    """
+    with _lock:
+        if name not in _limiters:
+            _limiters[name] = Limiter(name, rate, burst, limit, max_wait, low_water)
+    return _limiters[name]
+
+
+def limiter(name):
+    return _limiters[name]
+
+
+def reset(name=None):
+    """Forget all budgets for one upstream, or for all of them (tests)."""
+    with _lock:
+        for limiter_ in ([_limiters[name]] if name else list(_limiters.values())):
+            with limiter_._lock:
+                limiter_._budgets.clear()
+
+
+def snapshot():
+    """{upstream: [budget, ...]} for every registered upstream."""
+    with _lock:
+        limiters = dict(_limiters)
+    return {name: limiter_.snapshot() for name, limiter_ in limiters.items()}
@@ -0,0 +1,122 @@
+"""
+Read-through caching with stale-while-revalidate and single-flight fetches.
+
+    data = readthrough.read_through(caches['github'], key, fetch, ttl=300, stale_ttl=3600)
+
+- Fresh hit (younger than ttl): served from the cache.
+- Stale hit (up to ttl + stale_ttl): served from the cache at once while
+  one background thread refetches it.
+- Miss: fetched in the foreground. Concurrent misses for the same key
+  share one fetch: within a process through an in-flight Future, and
+  across processes through a lock key taken with cache.add(). Callers that
+  lose the cross-process race wait for the holder's result to land.
+
+Cross-process coalescing needs a shared cache backend (db, file, redis,
+...); with locmem it only coalesces within the process.
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+from django.db import connections
+
+LOCK_TIMEOUT = 30  # seconds a fetch may hold the cross-process lock
+LOCK_WAIT = 10     # seconds a miss waits on another process before fetching itself
+LOCK_POLL = 0.1
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _store(backend, key, value, ttl, stale_ttl):
+    backend.set(key, {'value': value, 'fresh_until': time.time() + ttl}, ttl + stale_ttl)
+
+
+def _fresh(entry):
+    return entry is not None and entry['fresh_until'] > time.time()
+
+
+def _fetch_locked(backend, key, fetch, ttl, stale_ttl, wait):
+    """
+    Fetch and store under the cross-process lock. If another process holds
+    it: with `wait`, poll for its result (fetching anyway after LOCK_WAIT);
+    without, give up and return None.
+    """
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + LOCK_WAIT
+    locked = backend.add(lock_key, 1, LOCK_TIMEOUT)
+    while not locked:
+        if not wait:
+            return None
+        entry = backend.get(key)
+        if _fresh(entry):
+            return entry['value']
+        if time.monotonic() >= deadline:
+            break  # the holder is stuck or gone; its lock expires on its own
+        time.sleep(LOCK_POLL)
+        locked = backend.add(lock_key, 1, LOCK_TIMEOUT)
+
+    try:
+        if wait:
+            # Someone may have filled it between our miss and taking the lock
+            entry = backend.get(key)
+            if _fresh(entry):
+                return entry['value']
+        value = fetch()
+        _store(backend, key, value, ttl, stale_ttl)
+        return value
+    finally:
+        if locked:
+            backend.delete(lock_key)
+
+
+def _single_flight(flight_key, run):
+    """Run `run()` once per flight_key in this process; concurrent callers get the same result or exception."""
+    with _inflight_lock:
+        future = _inflight.get(flight_key)
+        leader = future is None
+        if leader:
+            future = _inflight[flight_key] = Future()
+    if not leader:
+        return future.result()
+
+    try:
+        value = run()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(value)
+        return value
+    finally:
+        with _inflight_lock:
+            _inflight.pop(flight_key, None)
+
+
+def _revalidate(backend, key, fetch, ttl, stale_ttl):
+    try:
+        _single_flight(
+            ('refresh', key), lambda: _fetch_locked(backend, key, fetch, ttl, stale_ttl, wait=False),
+        )
+    except Exception:
+        pass  # keep serving the stale copy; the next stale hit tries again
+    finally:
+        connections.close_all()  # refresh threads own their connections
+
+
+def read_through(backend, key, fetch, ttl, stale_ttl=0):
+    """
+    Value for `key` from cache `backend`, calling fetch() on a miss (see the
+    module docstring). Exceptions from fetch() propagate and are not cached.
+    """
+    entry = backend.get(key)
+    if entry is not None:
+        if not _fresh(entry) and ('refresh', key) not in _inflight:
+            threading.Thread(
+                target=_revalidate, args=(backend, key, fetch, ttl, stale_ttl), daemon=True,
+            ).start()
+        return entry['value']
+
+    return _single_flight(
+        ('fetch', key), lambda: _fetch_locked(backend, key, fetch, ttl, stale_ttl, wait=True),
+    )
@@ -0,0 +1,357 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, override_settings
+
+from core import breaker, http, ratelimit, readthrough
+
+
+class FakeUpstream(BaseHTTPRequestHandler):
+    """Keep-alive server answering /ok, and /flaky with a 503 before each success."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.connections.add(self.client_address)
+        server.requests.append(self.path)
+        status = 200
+        if self.path.startswith('/flaky'):
+            server.flaky_calls += 1
+            status = 503 if server.flaky_calls % 2 else 200
+        body = self.headers.get('Accept-Encoding', '').encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class UpstreamClientTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeUpstream)
+        self.server.connections, self.server.requests, self.server.flaky_calls = set(), [], 0
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        http.register('fake', base_url=f'http://127.0.0.1:{self.server.server_port}/', pool_maxsize=3)
+        self.addCleanup(http._defaults.pop, 'fake')
+        self.addCleanup(http.reset, 'fake')
+
+    def test_client_is_shared_and_reuses_its_connection(self):
+        client = http.client('fake')
+        self.assertIs(http.client('fake'), client)
+
+        for _ in range(3):
+            client.get('/ok')
+
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_bodies_are_requested_compressed(self):
+        self.assertIn('gzip', http.client('fake').get('/ok').text)
+
+    def test_server_errors_are_retried(self):
+        http.configure('fake', backoff_factor=0)
+
+        response = http.client('fake').get('/flaky')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.requests, ['/flaky', '/flaky'])
+
+    def test_retries_can_be_turned_off(self):
+        http.configure('fake', max_retries=0)
+
+        self.assertEqual(http.client('fake').get('/flaky').status_code, 503)
+
+    def test_relative_paths_join_the_base_url(self):
+        client = http.client('fake')
+
+        self.assertEqual(client.url('users/ada'), f'{client.base_url}/users/ada')
+        self.assertEqual(client.url('https://example.com/next?page=2'), 'https://example.com/next?page=2')
+
+    @override_settings(UPSTREAM_HTTP={'fake': {'pool_maxsize': 7, 'max_retries': 1}})
+    def test_settings_override_registered_options(self):
+        http.reset('fake')
+        transport = http.client('fake').transport
+
+        self.assertEqual(transport._pool_maxsize, 7)
+        self.assertEqual(transport.max_retries.total, 1)
+        self.assertEqual(set(transport.max_retries.status_forcelist), set(http.RETRY_STATUSES))
+        self.assertNotIn('POST', transport.max_retries.allowed_methods)
+
+    def test_configure_swaps_the_transport(self):
+        old = http.client('fake')
+        http.configure('fake', timeout=2)
+
+        self.assertIsNot(http.client('fake'), old)
+        self.assertEqual(http.client('fake').timeout, 2)
+
+    def test_retry_after_is_capped(self):
+        retry = http._CappedRetry(total=1)
+        response = type('Response', (), {'headers': {'Retry-After': '3600'}})()
+
+        self.assertEqual(retry.get_retry_after(response), http._CappedRetry.MAX_RETRY_AFTER)
+
+
+class BudgetTests(SimpleTestCase):
+    def budget(self, **options):
+        options = {'rate': 100, 'burst': 100, 'limit': 5000, **options}
+        return ratelimit.Budget('test', 'token', **options)
+
+    def test_acquire_counts_down_the_reported_remaining(self):
+        budget = self.budget()
+        budget.update({'X-RateLimit-Remaining': '3', 'X-RateLimit-Reset': str(int(time.time()) + 60)})
+
+        budget.acquire()
+        budget.acquire()
+
+        self.assertEqual(budget.remaining, 1)
+        self.assertEqual(budget.requests, 2)
+
+    def test_exhausted_budget_fails_fast_until_reset(self):
+        budget = self.budget()
+        reset = int(time.time()) + 120
+        budget.update({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(reset)})
+
+        with self.assertRaises(ratelimit.RateLimitExceeded) as raised:
+            budget.acquire()
+        self.assertGreater(raised.exception.retry_after, 100)
+        self.assertEqual(budget.requests, 0)
+
+    def test_expired_window_is_forgotten(self):
+        budget = self.budget()
+        budget.update({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(int(time.time()) - 1)})
+
+        budget.acquire()
+
+        self.assertIsNone(budget.remaining)
+
+    def test_update_keeps_the_lowest_remaining_within_a_window(self):
+        budget = self.budget()
+        reset = str(int(time.time()) + 60)
+        budget.update({'X-RateLimit-Remaining': '10', 'X-RateLimit-Reset': reset})
+        budget.update({'X-RateLimit-Remaining': '12', 'X-RateLimit-Reset': reset})  # arrived late
+
+        self.assertEqual(budget.remaining, 10)
+
+    def test_update_moves_to_a_newer_window(self):
+        budget = self.budget()
+        now = int(time.time())
+        budget.update({'X-RateLimit-Remaining': '1', 'X-RateLimit-Reset': str(now + 60)})
+        budget.update({'X-RateLimit-Limit': '6000', 'X-RateLimit-Remaining': '5999',
+                       'X-RateLimit-Reset': str(now + 3660)})
+
+        self.assertEqual((budget.limit, budget.remaining), (6000, 5999))
+
+    def test_update_ignores_responses_without_headers(self):
+        budget = self.budget()
+        budget.update({})
+
+        self.assertIsNone(budget.remaining)
+        self.assertEqual(budget.headroom(), 5000)
+
+    def test_wait_longer_than_max_wait_raises(self):
+        budget = self.budget(rate=0.01, burst=1, max_wait=5)
+        budget.acquire()
+
+        with self.assertRaises(ratelimit.RateLimitExceeded) as raised:
+            budget.acquire()
+        self.assertGreater(raised.exception.retry_after, 5)
+
+    def test_pace_is_the_upstream_rate_above_the_low_water_mark(self):
+        budget = self.budget(rate=10)
+        budget.update({'X-RateLimit-Remaining': '600', 'X-RateLimit-Reset': str(int(time.time()) + 600)})
+
+        self.assertEqual(budget.snapshot()['pace_per_second'], 10)
+
+    def test_pace_spreads_remaining_budget_over_the_window_below_the_low_water_mark(self):
+        budget = self.budget(rate=10)
+        budget.update({'X-RateLimit-Remaining': '60', 'X-RateLimit-Reset': str(int(time.time()) + 600)})
+
+        self.assertAlmostEqual(budget.snapshot()['pace_per_second'], 0.1, places=2)
+
+    def test_anonymous_budget_runs_at_the_upstream_rate_until_its_reserve(self):
+        budget = self.budget(rate=10, burst=10, limit=None)
+        budget.update({'X-RateLimit-Limit': '60', 'X-RateLimit-Remaining': '59',
+                       'X-RateLimit-Reset': str(int(time.time()) + 3600)})
+
+        with mock.patch('core.ratelimit.time.sleep') as sleep:
+            while budget.remaining > 6:
+                budget.acquire()
+            # The last 10% of the hour's budget is spread over the hour, far past max_wait
+            with self.assertRaises(ratelimit.RateLimitExceeded):
+                budget.acquire()
+
+        # Each call sleeps until its slot: the 53rd is due 4.3s in (10 at once, then 10/s)
+        self.assertEqual(budget.requests, 53)
+        self.assertAlmostEqual(sleep.call_args.args[0], 4.3, places=1)
+
+    def test_pick_prefers_the_budget_with_most_headroom(self):
+        limiter = ratelimit.Limiter('test', rate=10, burst=10, limit=5000)
+        reset = str(int(time.time()) + 60)
+        limiter.budget('a').update({'X-RateLimit-Remaining': '10', 'X-RateLimit-Reset': reset})
+        limiter.budget('b').update({'X-RateLimit-Remaining': '900', 'X-RateLimit-Reset': reset})
+
+        self.assertEqual(limiter.pick([('a', 'a', None), ('b', 'b', None)])[0], 'b')
+
+
+class ReadThroughTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = LocMemCache('readthrough-tests', {})
+        self.cache.clear()
+        self.calls = 0
+
+    def fetch(self, value='v1', delay=0):
+        def run():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return run
+
+    def read(self, fetch, ttl=60, stale_ttl=60):
+        return readthrough.read_through(self.cache, 'key', fetch, ttl=ttl, stale_ttl=stale_ttl)
+
+    def test_fresh_hits_are_served_from_the_cache(self):
+        self.assertEqual(self.read(self.fetch('v1')), 'v1')
+        self.assertEqual(self.read(self.fetch('v2')), 'v1')
+
+        self.assertEqual(self.calls, 1)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        results = []
+        fetch = self.fetch('v1', delay=0.1)
+        threads = [threading.Thread(target=lambda: results.append(self.read(fetch))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['v1'] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_hits_are_served_while_one_refresh_runs(self):
+        self.read(self.fetch('v1'), ttl=0)
+        refreshed = threading.Event()
+
+        def refetch():
+            self.calls += 1
+            refreshed.set()
+            return 'v2'
+
+        self.assertEqual(self.read(refetch), 'v1')
+        self.assertTrue(refreshed.wait(5))
+        for _ in range(50):
+            if self.cache.get('key')['value'] == 'v2':
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.read(self.fetch('v3')), 'v2')
+        self.assertEqual(self.calls, 2)
+
+    def test_errors_propagate_and_are_not_cached(self):
+        def broken():
+            raise ValueError('upstream down')
+
+        with self.assertRaises(ValueError):
+            self.read(broken)
+
+        self.assertEqual(self.read(self.fetch('v1')), 'v1')
+        self.assertIsNone(self.cache.get('key:lock'))
+
+    @mock.patch.object(readthrough, 'LOCK_POLL', 0.01)
+    def test_a_miss_waits_for_another_process_holding_the_lock(self):
+        self.cache.add('key:lock', 1)
+        threading.Timer(0.05, readthrough._store, args=(self.cache, 'key', 'theirs', 60, 60)).start()
+
+        self.assertEqual(self.read(self.fetch('ours')), 'theirs')
+        self.assertEqual(self.calls, 0)
+
+    @mock.patch.object(readthrough, 'LOCK_POLL', 0.01)
+    @mock.patch.object(readthrough, 'LOCK_WAIT', 0.05)
+    def test_a_stuck_lock_holder_is_not_waited_on_forever(self):
+        self.cache.add('key:lock', 1)
+
+        self.assertEqual(self.read(self.fetch('ours')), 'ours')
+        self.assertEqual(self.calls, 1)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('core.breaker.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = breaker.CircuitBreaker('test', min_calls=4, failure_rate=0.5, open_seconds=30,
+                                              half_open_probes=1)
+
+    def fail(self, times=1):
+        for _ in range(times):
+            self.breaker.record(True, 0)
+
+    def test_stays_closed_below_min_calls(self):
+        self.fail(3)
+
+        self.assertEqual(self.breaker.state, breaker.CLOSED)
+
+    def test_opens_when_failure_rate_is_reached(self):
+        self.breaker.record(False, 0)
+        self.breaker.record(False, 0)
+        self.fail(2)
+
+        self.assertEqual(self.breaker.state, breaker.OPEN)
+        with self.assertRaises(breaker.CircuitOpen) as raised:
+            self.breaker.before()
+        self.assertEqual(raised.exception.retry_after, 30)
+
+    def test_old_calls_leave_the_window(self):
+        self.fail(3)
+        self.now += 61
+        self.breaker.record(True, 0)
+
+        self.assertEqual(self.breaker.state, breaker.CLOSED)
+
+    def test_slow_calls_count_toward_opening(self):
+        slow = breaker.CircuitBreaker('slow', min_calls=2, slow_call_seconds=5, slow_call_rate=0.5)
+        slow.record(False, 6)
+        slow.record(False, 6)
+
+        self.assertEqual(slow.state, breaker.OPEN)
+
+    def test_half_open_probe_success_closes(self):
+        self.fail(4)
+        self.now += 31
+
+        self.breaker.before()
+        self.assertEqual(self.breaker.state, breaker.HALF_OPEN)
+        with self.assertRaises(breaker.CircuitOpen):
+            self.breaker.before()  # only one probe at a time
+        self.breaker.record(False, 0)
+
+        self.assertEqual(self.breaker.state, breaker.CLOSED)
+        self.breaker.before()
+
+    def test_half_open_probe_failure_reopens(self):
+        self.fail(4)
+        self.now += 31
+
+        self.breaker.before()
+        self.breaker.record(True, 0)
+
+        self.assertEqual(self.breaker.state, breaker.OPEN)
+        self.assertEqual(self.breaker.times_opened, 2)
+        self.assertTrue(self.breaker.is_open())
+
+    def test_call_records_exceptions_and_server_errors(self):
+        response = mock.Mock(status_code=502)
+        for _ in range(2):
+            self.breaker.call(lambda: response)
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.breaker.call(mock.Mock(side_effect=ValueError))
+
+        self.assertEqual(self.breaker.state, breaker.OPEN)
@@ -0,0 +1,20 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import breaker, ratelimit
+
+
+class MetricsView(APIView):
+    """
+    GET /api/metrics/ — upstream rate-limit budgets and circuit breaker
+    states as seen by the process serving the request (staff only). Sync
+    workers keep their own.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'rate_limits': ratelimit.snapshot(),
+            'circuit_breakers': breaker.snapshot(),
+        })
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from feed import timeline
+
+
+class Command(BaseCommand):
+    help = 'Drain the timeline fan-out queue (new posts, follows and unfollows).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process one batch and exit.')
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to sleep when the queue is empty.')
+
+    def handle(self, *args, **options):
+        while True:
+            tasks = timeline.claim(options['batch_size'])
+            for task in tasks:
+                try:
+                    written = timeline.run(task)
+                except Exception as e:
+                    if timeline.fail(task, str(e)):
+                        self.stderr.write(f'{task} failed (attempt {task.attempts}), will retry: {e}')
+                    else:
+                        self.stderr.write(f'{task} failed after {task.attempts} attempts, giving up: {e}')
+                    continue
+                task.delete()
+                self.stdout.write(f'{task}: {written} row(s)')
+
+            if options['once']:
+                break
+            if not tasks:
+                time.sleep(options['poll_interval'])
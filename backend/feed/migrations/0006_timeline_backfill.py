@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:27
+
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copies of the settings this backfill was written against
+BACKFILL_POSTS = 200
+BATCH_SIZE = 1000
+
+
+def backfill_timelines(apps, schema_editor):
+    """
+    Fill the home timelines for posts and follows that predate them: each
+    author's recent posts go into their own timeline and, unless they are
+    a pull author, into each follower's (a frozen copy of
+    feed.timeline.add_own / backfill).
+    """
+    Post = apps.get_model('feed', 'Post')
+    TimelineEntry = apps.get_model('feed', 'TimelineEntry')
+    Follow = apps.get_model('users', 'Follow')
+    User = apps.get_model('users', 'User')
+
+    pull_authors = set(
+        User.objects.filter(follower_count__gte=settings.FEED_FANOUT_MAX_FOLLOWERS).values_list('pk', flat=True)
+    )
+
+    def entries():
+        for author_id in Post.objects.values_list('author_id', flat=True).distinct().order_by():
+            readers = [author_id]
+            if author_id not in pull_authors:
+                readers += Follow.objects.filter(following_id=author_id).values_list('follower_id', flat=True)
+            posts = Post.objects.filter(author_id=author_id).order_by('-created_at', '-id') \
+                .values_list('id', 'created_at')[:BACKFILL_POSTS]
+            for post_id, created_at in posts:
+                for user_id in readers:
+                    yield TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id, created_at=created_at)
+
+    entries = entries()
+    while batch := list(islice(entries, BATCH_SIZE)):
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0005_home_timelines'),
+        ('users', '0002_follow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fanouttask',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fanouttask',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='fanouttask',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
@@ -18,6 +18,12 @@ class Post(models.Model):
     type = models.CharField(max_length=20, choices=POST_TYPES, default='MANUAL')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset feed pagination (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='post_feed_idx'),
+        ]
+
     def __str__(self):
         return f"{self.author.username} - {self.type}"
 
@@ -37,3 +43,65 @@ class Comment(models.Model):
     content = models.TextField()
     code_snippet = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_thread_idx'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """
+    One post materialized into one user's home timeline (fan-out on write).
+    `created_at` is copied from the post and is the timeline's sort key, so
+    a page is a single range scan on timeline_read_idx.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_read_idx'),
+            # Trimming an unfollowed author out of a timeline
+            models.Index(fields=['user', 'author'], name='timeline_author_idx'),
+        ]
+
+
+class FanoutTask(models.Model):
+    """
+    Pending timeline write, drained by `python manage.py run_feed_fanout`
+    so posting and following never wait on the fan-out itself.
+    """
+    POST = 'POST'
+    FOLLOW = 'FOLLOW'
+    UNFOLLOW = 'UNFOLLOW'
+    KIND_CHOICES = (
+        (POST, 'Post'),
+        (FOLLOW, 'Follow'),
+        (UNFOLLOW, 'Unfollow'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # POST: the new post. FOLLOW/UNFOLLOW: follower's timeline gains/loses author's posts.
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    follower = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    # Set after FEED_FANOUT_MAX_ATTEMPTS failed runs; kept for inspection, never claimed again
+    failed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['claimed_at', 'id'], name='fanout_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} fan-out for {self.author}'
@@ -45,6 +45,40 @@ class PostSerializer(serializers.ModelSerializer):
         return obj.comments.count()
 
 
+class PostListSerializer(serializers.ModelSerializer):
+    """
+    Compact feed representation: counts plus the first few comments.
+    The full comment list is served by /api/feed/<id>/comments/.
+    """
+    author = UserSerializer(read_only=True)
+    comments_preview = CommentSerializer(source='preview_comments', many=True, read_only=True)
+    reaction_counts = serializers.SerializerMethodField()
+    comment_count = serializers.IntegerField(read_only=True)
+    my_reactions = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Post
+        fields = [
+            'id', 'author', 'content', 'code_snippet', 'image_url',
+            'type', 'created_at', 'reaction_counts', 'comment_count',
+            'my_reactions', 'comments_preview',
+        ]
+        read_only_fields = fields
+
+    def get_reaction_counts(self, obj):
+        # Annotated per type by PostListCreateView.get_queryset
+        counts = {}
+        for rtype, _ in Reaction.REACTION_TYPES:
+            count = getattr(obj, f'reactions_{rtype.lower()}', 0)
+            if count:
+                counts[rtype] = count
+        return counts
+
+    def get_my_reactions(self, obj):
+        # Only the caller's reactions are prefetched, into my_reaction_list
+        return [r.type for r in getattr(obj, 'my_reaction_list', [])]
+
+
 class PostCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
@@ -0,0 +1,39 @@
+"""
+Queues timeline fan-out for new posts and follow changes. The work itself
+runs in `python manage.py run_feed_fanout` (see feed.timeline); only a new
+post's entry in its author's own timeline is written here, so authors see
+their post at once.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import Follow, User
+
+from . import timeline
+from .models import FanoutTask, Post
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        timeline.add_own([instance])
+        timeline.enqueue(FanoutTask.POST, instance.author, post=instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        timeline.enqueue(FanoutTask.FOLLOW, instance.following, follower=instance.follower)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    # Deferred to commit: if the follow went away because a user was deleted,
+    # there is no timeline left to trim and the task's FKs would dangle.
+    transaction.on_commit(lambda: _queue_trim(instance.follower_id, instance.following_id))
+
+
+def _queue_trim(follower_id, author_id):
+    if User.objects.filter(pk__in=[follower_id, author_id]).count() == 2:
+        FanoutTask.objects.create(kind=FanoutTask.UNFOLLOW, follower_id=follower_id, author_id=author_id)
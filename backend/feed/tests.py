@@ -0,0 +1,232 @@
+import importlib
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from feed import timeline
+from feed.models import Comment, FanoutTask, Post, Reaction, TimelineEntry
+from users.models import Follow, User
+
+
+class FeedTestCase(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='ada')
+        self.reader = User.objects.create(username='grace')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.reader)
+
+    def post(self, content='hello', author=None):
+        return Post.objects.create(author=author or self.author, content=content)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.queries = len(queries)
+        return response.data
+
+
+class FeedPaginationTests(FeedTestCase):
+    def walk(self, url, **params):
+        pages, data = [], self.get(url, **params)
+        while True:
+            pages.append([row['content'] for row in data['results']])
+            if not data['next']:
+                return pages
+            data = self.get(data['next'])
+
+    def test_pages_are_newest_first_without_gaps(self):
+        posts = [self.post(f'post {i}') for i in range(5)]
+        # Same timestamp for three of them: the id breaks the tie
+        Post.objects.filter(pk__in=[p.pk for p in posts[1:4]]).update(created_at=posts[1].created_at)
+        expected = [p.content for p in sorted(
+            Post.objects.all(), key=lambda p: (p.created_at, p.pk), reverse=True,
+        )]
+
+        pages = self.walk('/api/feed/', page_size=2)
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_page_size_is_capped(self):
+        for i in range(3):
+            self.post(f'post {i}')
+
+        self.assertEqual(len(self.get('/api/feed/', page_size=1000)['results']), 3)
+        self.assertEqual(len(self.get('/api/feed/', page_size='x')['results']), 3)
+
+    def test_list_embeds_a_comment_preview(self):
+        post = self.post()
+        for i in range(5):
+            Comment.objects.create(post=post, user=self.reader, content=f'comment {i}')
+
+        [row] = self.get('/api/feed/')['results']
+
+        self.assertEqual(row['comment_count'], 5)
+        self.assertEqual([c['content'] for c in row['comments_preview']], ['comment 0', 'comment 1', 'comment 2'])
+        self.assertNotIn('comments', row)
+
+    def test_comments_are_paginated_oldest_first(self):
+        post = self.post()
+        for i in range(5):
+            Comment.objects.create(post=post, user=self.reader, content=f'comment {i}')
+
+        pages = self.walk(f'/api/feed/{post.pk}/comments/', page_size=2)
+
+        self.assertEqual(pages, [['comment 0', 'comment 1'], ['comment 2', 'comment 3'], ['comment 4']])
+
+
+class FeedAggregationTests(FeedTestCase):
+    def add_activity(self, post):
+        Reaction.objects.create(post=post, user=self.reader, type='FIRE')
+        Reaction.objects.create(post=post, user=self.author, type='FIRE')
+        Reaction.objects.create(post=post, user=self.author, type='BUG')
+        for i in range(2):
+            Comment.objects.create(post=post, user=self.author, content=f'comment {i}')
+
+    def test_counts_and_own_reactions(self):
+        self.add_activity(self.post())
+
+        [row] = self.get('/api/feed/')['results']
+
+        self.assertEqual(row['reaction_counts'], {'FIRE': 2, 'BUG': 1})
+        self.assertEqual(row['comment_count'], 2)
+        self.assertEqual(row['my_reactions'], ['FIRE'])
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.add_activity(self.post())
+        self.get('/api/feed/')
+        one_post = self.queries
+        for i in range(4):
+            self.add_activity(self.post(f'post {i}'))
+
+        results = self.get('/api/feed/')['results']
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.queries, one_post)
+
+    def test_created_post_has_counts(self):
+        response = self.client.post('/api/feed/', {'content': 'shipped'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['comment_count'], response.data['reaction_counts']), (0, {}))
+
+
+class TimelineTestCase(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='ada')
+        self.reader = User.objects.create(username='grace')
+
+    def drain(self):
+        while tasks := timeline.claim():
+            for task in tasks:
+                timeline.run(task)
+                task.delete()
+
+    def timeline_of(self, user):
+        return [post_id for _, post_id in timeline.read(user)]
+
+    def post(self, content='hello', author=None):
+        return Post.objects.create(author=author or self.author, content=content)
+
+
+class FanOutTests(TimelineTestCase):
+    def test_own_entry_is_written_immediately(self):
+        post = self.post()
+
+        self.assertEqual(self.timeline_of(self.author), [post.pk])
+        self.assertEqual(FanoutTask.objects.get().kind, FanoutTask.POST)
+
+    def test_post_reaches_followers_after_fan_out(self):
+        Follow.objects.create(follower=self.reader, following=self.author)
+        self.drain()
+        post = self.post()
+
+        self.assertEqual(self.timeline_of(self.reader), [])
+        self.drain()
+        self.assertEqual(self.timeline_of(self.reader), [post.pk])
+
+    def test_timeline_is_newest_first(self):
+        Follow.objects.create(follower=self.reader, following=self.author)
+        posts = [self.post(f'post {i}') for i in range(3)]
+        self.drain()
+
+        self.assertEqual(self.timeline_of(self.reader), [p.pk for p in reversed(posts)])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_pull_authors_are_merged_at_read_time(self):
+        Follow.objects.create(follower=self.reader, following=self.author)
+        self.drain()
+        post = self.post()
+        self.drain()
+
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.timeline_of(self.reader), [post.pk])
+
+
+class FollowTests(TimelineTestCase):
+    @override_settings(FEED_BACKFILL_POSTS=2)
+    def test_follow_backfills_recent_posts(self):
+        posts = [self.post(f'post {i}') for i in range(3)]
+        self.drain()
+
+        Follow.objects.create(follower=self.reader, following=self.author)
+        self.drain()
+
+        self.assertEqual(self.timeline_of(self.reader), [posts[2].pk, posts[1].pk])
+
+    def test_unfollow_trims_the_authors_posts(self):
+        follow = Follow.objects.create(follower=self.reader, following=self.author)
+        self.post()
+        own = self.post('mine', author=self.reader)
+        self.drain()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            follow.delete()
+        self.drain()
+
+        self.assertEqual(self.timeline_of(self.reader), [own.pk])
+
+    def test_stale_follow_task_is_a_no_op(self):
+        self.post()
+        follow = Follow.objects.create(follower=self.reader, following=self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            follow.delete()
+        # FOLLOW and UNFOLLOW both queued; the follow is gone, so nothing is backfilled
+        self.drain()
+
+        self.assertEqual(self.timeline_of(self.reader), [])
+
+
+class TimelineBackfillMigrationTests(TimelineTestCase):
+    def test_existing_posts_and_follows_are_backfilled(self):
+        Follow.objects.create(follower=self.reader, following=self.author)
+        posts = [self.post(f'post {i}') for i in range(2)]
+        own = self.post('mine', author=self.reader)
+        self.drain()
+        TimelineEntry.objects.all().delete()
+
+        migration = importlib.import_module('feed.migrations.0006_timeline_backfill')
+        migration.backfill_timelines(apps, None)
+
+        self.assertEqual(self.timeline_of(self.reader), [own.pk, posts[1].pk, posts[0].pk])
+        self.assertEqual(self.timeline_of(self.author), [posts[1].pk, posts[0].pk])
+
+
+class FailedTaskTests(TimelineTestCase):
+    @override_settings(FEED_FANOUT_MAX_ATTEMPTS=2, FEED_FANOUT_TASK_TIMEOUT_SECONDS=-1)
+    def test_task_is_given_up_after_max_attempts(self):
+        self.post()
+
+        [task] = timeline.claim()
+        self.assertTrue(timeline.fail(task, 'boom'))
+        [task] = timeline.claim()
+        self.assertFalse(timeline.fail(task, 'boom'))
+
+        self.assertEqual(timeline.claim(), [])
+        task.refresh_from_db()
+        self.assertEqual((task.attempts, task.error), (2, 'boom'))
+        self.assertIsNotNone(task.failed_at)
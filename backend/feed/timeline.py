@@ -0,0 +1,163 @@
+"""
+Personal home timelines.
+
+A new post is fanned out on write: it goes into its author's own timeline
+as it is created, and the fan-out worker copies it into a TimelineEntry
+row for each follower, so reading a timeline is one range scan on (user,
+created_at, post). Authors with at least
+FEED_FANOUT_MAX_FOLLOWERS followers are fanned out on read instead:
+their posts are pulled from Post at read time and merged into the page,
+so one post never turns into millions of inserts.
+
+Following an author backfills their recent posts; unfollowing trims them.
+Apart from the author's own entry, all writes happen in
+`python manage.py run_feed_fanout`, never in a request. A task that keeps
+failing is given up on after FEED_FANOUT_MAX_ATTEMPTS claims.
+"""
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.pagination import keyset_after
+from users.models import Follow
+
+from .models import FanoutTask, Post, TimelineEntry
+
+ENTRY_ORDERING = ('-created_at', '-post_id')
+POST_ORDERING = ('-created_at', '-id')
+
+
+def is_pull_author(user):
+    """True if `user` has too many followers to fan out on write."""
+    return user.follower_count >= settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def enqueue(kind, author, post=None, follower=None):
+    return FanoutTask.objects.create(kind=kind, author=author, post=post, follower=follower)
+
+
+def enqueue_posts(posts):
+    """Queue fan-out for posts written with bulk_create (which sends no post_save)."""
+    add_own(posts)
+    FanoutTask.objects.bulk_create(
+        [FanoutTask(kind=FanoutTask.POST, post=post, author_id=post.author_id) for post in posts]
+    )
+
+
+def _entries(user_ids, post):
+    return (
+        TimelineEntry(user_id=uid, post_id=post.pk, author_id=post.author_id, created_at=post.created_at)
+        for uid in user_ids
+    )
+
+
+def _write(entries):
+    batch_size = settings.FEED_FANOUT_BATCH_SIZE
+    entries = iter(entries)
+    written = 0
+    while batch := list(islice(entries, batch_size)):
+        TimelineEntry.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def add_own(posts):
+    """Write posts into their authors' own timelines (done as they are created, not by the worker)."""
+    return _write(e for post in posts for e in _entries([post.author_id], post))
+
+
+def fan_out_post(post):
+    """Write `post` into every follower's timeline, unless its author is a pull author."""
+    if is_pull_author(post.author):
+        return 0
+    followers = Follow.objects.filter(following_id=post.author_id) \
+        .values_list('follower_id', flat=True) \
+        .iterator(chunk_size=settings.FEED_FANOUT_BATCH_SIZE)
+    return _write(_entries(followers, post))
+
+
+def backfill(follower, author):
+    """Copy the author's most recent posts into a new follower's timeline."""
+    if is_pull_author(author):
+        return 0
+    posts = Post.objects.filter(author=author).order_by(*POST_ORDERING) \
+        .only('id', 'author_id', 'created_at')[:settings.FEED_BACKFILL_POSTS]
+    return _write(e for post in posts for e in _entries([follower.pk], post))
+
+
+def trim(follower, author):
+    """Remove an unfollowed author's posts from the follower's timeline."""
+    deleted, _ = TimelineEntry.objects.filter(user=follower, author=author).delete()
+    return deleted
+
+
+def run(task):
+    """Apply one fan-out task. FOLLOW/UNFOLLOW re-check the follow so out-of-order tasks settle correctly."""
+    following = Follow.objects.filter(follower_id=task.follower_id, following_id=task.author_id)
+    if task.kind == FanoutTask.POST:
+        return fan_out_post(task.post)
+    if task.kind == FanoutTask.FOLLOW:
+        return backfill(task.follower, task.author) if following.exists() else 0
+    return trim(task.follower, task.author) if not following.exists() else 0
+
+
+def claim(limit=50):
+    """
+    Atomically claim up to `limit` tasks; tasks claimed by a dead worker (or
+    left claimed by a failure) are reclaimed after a timeout. Each claim
+    counts as an attempt; failed tasks are never claimed again.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=settings.FEED_FANOUT_TASK_TIMEOUT_SECONDS)
+    available = Q(failed_at__isnull=True) & (Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired))
+    candidates = FanoutTask.objects.filter(available).order_by('id').values_list('pk', flat=True)[:limit]
+    claimed = [
+        pk for pk in candidates
+        if FanoutTask.objects.filter(available, pk=pk).update(claimed_at=now, attempts=F('attempts') + 1)
+    ]
+    return list(
+        FanoutTask.objects.filter(pk__in=claimed)
+        .select_related('post', 'post__author', 'follower', 'author')
+        .order_by('id')
+    )
+
+
+def fail(task, error):
+    """
+    Record a failed run. The task stays claimed and is retried once the
+    claim times out, until FEED_FANOUT_MAX_ATTEMPTS; then it is marked failed.
+    Returns True if it will be retried.
+    """
+    task.error = error
+    retry = task.attempts < settings.FEED_FANOUT_MAX_ATTEMPTS
+    if not retry:
+        task.failed_at = timezone.now()
+    task.save(update_fields=['error', 'failed_at'])
+    return retry
+
+
+def read(user, after=None, limit=20):
+    """
+    (created_at, post_id) keys for the next `limit` posts of the user's
+    timeline after the cursor values `after`, newest first. Materialized
+    entries and pull authors' posts are merged here.
+    """
+    entries = TimelineEntry.objects.filter(user=user)
+    if after is not None:
+        entries = entries.filter(keyset_after(ENTRY_ORDERING, after))
+    keys = list(entries.order_by(*ENTRY_ORDERING).values_list('created_at', 'post_id')[:limit])
+
+    pull_authors = Follow.objects.filter(
+        follower=user,
+        following__follower_count__gte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).values('following_id')
+    posts = Post.objects.filter(author__in=pull_authors)
+    if after is not None:
+        posts = posts.filter(keyset_after(POST_ORDERING, after))
+    pulled = posts.order_by(*POST_ORDERING).values_list('created_at', 'id')[:limit]
+
+    # A post can be in both if its author crossed the threshold after fan-out
+    return sorted(set(keys).union(pulled), reverse=True)[:limit]
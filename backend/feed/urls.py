@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.PostListCreateView.as_view(), name='post-list-create'),
+    path('timeline/', views.HomeTimelineView.as_view(), name='home-timeline'),
     path('<uuid:pk>/react/', views.PostReactView.as_view(), name='post-react'),
     path('<uuid:pk>/comment/', views.PostCommentView.as_view(), name='post-comment'),
+    path('<uuid:pk>/comments/', views.PostCommentListView.as_view(), name='post-comments'),
 ]
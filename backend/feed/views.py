@@ -1,26 +1,78 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+from core.pagination import KeysetPagination
+from . import timeline
 from .models import Post, Reaction, Comment
-from .serializers import PostSerializer, PostCreateSerializer, ReactionSerializer, CommentSerializer
+from .serializers import (
+    PostSerializer, PostListSerializer, PostCreateSerializer, ReactionSerializer, CommentSerializer,
+)
+
+
+# Comments embedded per post in the feed list; the rest are fetched on demand
+COMMENT_PREVIEW_LIMIT = 3
+
+
+class FeedPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class TimelinePagination(FeedPagination):
+    """Pages over feed.timeline.read() keys instead of filtering the view's queryset."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        keys = timeline.read(request.user, self.decode_cursor(request, queryset.model), self.limit + 1)
+        self.has_next = len(keys) > self.limit
+        posts = queryset.in_bulk([pk for _, pk in keys[:self.limit]])
+        self.page = [posts[pk] for _, pk in keys[:self.limit] if pk in posts]
+        return self.page
+
+
+class CommentPagination(KeysetPagination):
+    ordering = ('created_at', 'id')
+    page_size = 50
+
+
+def feed_queryset(user):
+    """Posts with everything the compact list form needs: counts in SQL, caller's reactions, comment preview."""
+    preview = Comment.objects.select_related('user', 'user__profile') \
+        .order_by('created_at', 'id')[:COMMENT_PREVIEW_LIMIT]
+    comment_count = Comment.objects.filter(post=OuterRef('pk')).order_by() \
+        .values('post').annotate(n=Count('pk')).values('n')
+    # Per-type reaction counts aggregate in SQL; comments are counted in a
+    # subquery so the two don't multiply each other's join rows.
+    reaction_counts = {
+        f'reactions_{rtype.lower()}': Count('reactions', filter=Q(reactions__type=rtype))
+        for rtype, _ in Reaction.REACTION_TYPES
+    }
+    mine = Reaction.objects.filter(user=user).only('id', 'post_id', 'type')
+    return Post.objects.select_related('author', 'author__profile') \
+        .annotate(comment_count=Coalesce(Subquery(comment_count), 0), **reaction_counts) \
+        .prefetch_related(
+            Prefetch('comments', queryset=preview, to_attr='preview_comments'),
+            Prefetch('reactions', queryset=mine, to_attr='my_reaction_list'),
+        )
 
 
 class PostListCreateView(generics.ListCreateAPIView):
     """
-    GET  /api/feed/ — paginated feed of posts
+    GET  /api/feed/?cursor= — cursor-paginated feed of posts (compact form)
     POST /api/feed/ — create a new post
     """
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedPagination
 
     def get_queryset(self):
-        return Post.objects.select_related('author', 'author__profile') \
-            .prefetch_related('reactions', 'comments', 'comments__user') \
-            .order_by('-created_at')
+        return feed_queryset(self.request.user)
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return PostCreateSerializer
-        return PostSerializer
+        return PostListSerializer
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -32,6 +84,16 @@ class PostListCreateView(generics.ListCreateAPIView):
         return Response(PostSerializer(post).data, status=status.HTTP_201_CREATED)
 
 
+class HomeTimelineView(generics.ListAPIView):
+    """GET /api/feed/timeline/?cursor= — posts from you and the people you follow."""
+    serializer_class = PostListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimelinePagination
+
+    def get_queryset(self):
+        return feed_queryset(self.request.user)
+
+
 class PostReactView(APIView):
     """POST /api/feed/<id>/react/ — toggle reaction on a post."""
     permission_classes = [permissions.IsAuthenticated]
@@ -67,3 +129,16 @@ class PostCommentView(generics.CreateAPIView):
             from rest_framework.exceptions import NotFound
             raise NotFound('Post not found')
         serializer.save(user=self.request.user, post=post)
+
+
+class PostCommentListView(generics.ListAPIView):
+    """GET /api/feed/<id>/comments/?cursor= — all comments on a post, oldest first."""
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CommentPagination
+
+    def get_queryset(self):
+        if not Post.objects.filter(pk=self.kwargs['pk']).exists():
+            from rest_framework.exceptions import NotFound
+            raise NotFound('Post not found')
+        return Comment.objects.filter(post_id=self.kwargs['pk']).select_related('user', 'user__profile')
@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from forum.models import ChannelTag, Reply, Tag, Thread, ThreadTag, Vote
+from forum.signals import last_activity
+
+
+def actual_counters():
+    """Thread queryset annotated with counters recomputed from Reply/Vote rows."""
+    replies = Reply.objects.filter(thread=OuterRef('pk')).values('thread') \
+        .annotate(n=Count('pk')).values('n')
+    votes = Vote.objects.filter(thread=OuterRef('pk')).values('thread') \
+        .annotate(total=Sum('value')).values('total')
+    return {
+        'reply_count': Coalesce(Subquery(replies), 0),
+        'vote_count': Coalesce(Subquery(votes), 0),
+        'last_activity_at': last_activity(),
+    }
+
+
+def actual_tag_counts():
+    """Tag / ChannelTag thread_count expressions recomputed from ThreadTag rows."""
+    def count(**filters):
+        return Coalesce(Subquery(
+            ThreadTag.objects.filter(**filters).order_by().values('tag')
+            .annotate(n=Count('pk')).values('n')
+        ), 0)
+    return (
+        count(tag=OuterRef('pk')),
+        count(tag=OuterRef('tag'), channel=OuterRef('channel')),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or with --verify, check) the denormalized Thread reply/vote/activity and tag counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Report drifted threads without fixing them; exits non-zero on drift.')
+
+    def handle(self, *args, **options):
+        tag_count, channel_tag_count = actual_tag_counts()
+        if not options['verify']:
+            updated = Thread.objects.update(**actual_counters())
+            tags = Tag.objects.update(thread_count=tag_count)
+            ChannelTag.objects.update(thread_count=channel_tag_count)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt counters for {updated} thread(s) and {tags} tag(s)'))
+            return
+
+        expressions = actual_counters()
+        drifted = Thread.objects.annotate(
+            actual_replies=expressions['reply_count'],
+            actual_votes=expressions['vote_count'],
+            actual_activity=expressions['last_activity_at'],
+        ).exclude(
+            reply_count=F('actual_replies'), vote_count=F('actual_votes'), last_activity_at=F('actual_activity'),
+        )
+
+        count = 0
+        for thread in drifted.only('id', 'title', 'reply_count', 'vote_count', 'last_activity_at'):
+            count += 1
+            self.stdout.write(
+                f'  #{thread.pk} {thread.title[:40]!r}: replies {thread.reply_count} (actual {thread.actual_replies}), '
+                f'votes {thread.vote_count} (actual {thread.actual_votes}), '
+                f'last activity {thread.last_activity_at:%Y-%m-%d %H:%M:%S} (actual {thread.actual_activity:%Y-%m-%d %H:%M:%S})'
+            )
+
+        for tag in Tag.objects.annotate(actual=tag_count).exclude(thread_count=F('actual')):
+            count += 1
+            self.stdout.write(f'  tag {tag.name!r}: {tag.thread_count} thread(s) (actual {tag.actual})')
+        for row in ChannelTag.objects.annotate(actual=channel_tag_count) \
+                .exclude(thread_count=F('actual')).select_related('channel', 'tag'):
+            count += 1
+            self.stdout.write(
+                f'  tag {row.tag.name!r} in #{row.channel.slug}: {row.thread_count} thread(s) (actual {row.actual})'
+            )
+
+        if count:
+            raise CommandError(f'{count} counter(s) have drifted; run without --verify to fix')
+        self.stdout.write(self.style.SUCCESS('All thread and tag counters are correct'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from forum import ranking
+
+
+class Command(BaseCommand):
+    help = 'Re-decay hot/rising scores for recent threads. Run periodically (e.g. every 10 minutes from cron).'
+
+    def handle(self, *args, **options):
+        updated = ranking.refresh_scores()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed scores for {updated} thread(s)'))
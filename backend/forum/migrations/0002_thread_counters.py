@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:53
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Thread = apps.get_model('forum', 'Thread')
+    Reply = apps.get_model('forum', 'Reply')
+    Vote = apps.get_model('forum', 'Vote')
+    replies = Reply.objects.filter(thread=OuterRef('pk')).values('thread').annotate(n=Count('pk')).values('n')
+    votes = Vote.objects.filter(thread=OuterRef('pk')).values('thread').annotate(total=Sum('value')).values('total')
+    last_reply = Reply.objects.filter(thread=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    Thread.objects.update(
+        reply_count=Coalesce(Subquery(replies), 0),
+        vote_count=Coalesce(Subquery(votes), 0),
+        last_activity_at=Coalesce(Subquery(last_reply), F('created_at')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='reply_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='vote_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-vote_count'], name='thread_vote_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-last_activity_at'], name='thread_activity_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:54
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Frozen copy of forum.ranking as of this migration; edits there must not change it
+HOT_GRAVITY = 1.8
+RISING_WINDOW = timedelta(hours=24)
+
+
+def compute_scores(thread, now):
+    age_hours = max((now - thread.created_at).total_seconds(), 0) / 3600
+    points = 1 + thread.vote_count + 2 * thread.reply_count + thread.views / 50
+    hot = points / (age_hours + 2) ** HOT_GRAVITY
+    rising = points / (age_hours + 2) if now - thread.created_at <= RISING_WINDOW else 0.0
+    return hot, rising
+
+
+def backfill_scores(apps, schema_editor):
+    Thread = apps.get_model('forum', 'Thread')
+    now = timezone.now()
+    threads = list(Thread.objects.only('id', 'created_at', 'vote_count', 'reply_count', 'views'))
+    for thread in threads:
+        thread.hot_score, thread.rising_score = compute_scores(thread, now)
+    Thread.objects.bulk_update(threads, ['hot_score', 'rising_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0002_thread_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='rising_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-pinned', '-hot_score', '-id'], name='thread_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-pinned', '-vote_count', '-id'], name='thread_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-pinned', '-rising_score', '-id'], name='thread_rising_idx'),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
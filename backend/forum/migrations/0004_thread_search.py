@@ -0,0 +1,144 @@
+from django.db import migrations
+
+# Frozen copy of the statements forum/search.py installed when this
+# migration was written; later changes go in new migrations.
+
+POSTGRES_INSTALL = [
+    "ALTER TABLE forum_thread ADD COLUMN search_document tsvector",
+    """
+    CREATE FUNCTION forum_thread_search_document() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_document :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.content, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(
+                (SELECT string_agg(content, ' ') FROM forum_reply WHERE thread_id = NEW.id), ''
+            )), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER forum_thread_search_document
+        BEFORE INSERT OR UPDATE OF title, content ON forum_thread
+        FOR EACH ROW EXECUTE FUNCTION forum_thread_search_document()
+    """,
+    # A reply change touches its thread's title, which re-fires the trigger above
+    """
+    CREATE FUNCTION forum_reply_search_document() RETURNS trigger AS $$
+    BEGIN
+        UPDATE forum_thread SET title = title
+        WHERE id = CASE WHEN TG_OP = 'DELETE' THEN OLD.thread_id ELSE NEW.thread_id END;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER forum_reply_search_document
+        AFTER INSERT OR UPDATE OF content OR DELETE ON forum_reply
+        FOR EACH ROW EXECUTE FUNCTION forum_reply_search_document()
+    """,
+    "UPDATE forum_thread SET title = title",
+    "CREATE INDEX forum_thread_search_idx ON forum_thread USING GIN (search_document)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS forum_reply_search_document ON forum_reply",
+    "DROP FUNCTION IF EXISTS forum_reply_search_document()",
+    "DROP TRIGGER IF EXISTS forum_thread_search_document ON forum_thread",
+    "DROP FUNCTION IF EXISTS forum_thread_search_document()",
+    "ALTER TABLE forum_thread DROP COLUMN IF EXISTS search_document",
+]
+
+_SQLITE_REPLIES = "coalesce((SELECT group_concat(content, ' ') FROM forum_reply WHERE thread_id = {}), '')"
+
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE forum_thread_fts USING fts5(title, content, replies, tokenize = 'porter unicode61')",
+    """
+    CREATE TRIGGER forum_thread_fts_insert AFTER INSERT ON forum_thread BEGIN
+        INSERT INTO forum_thread_fts (rowid, title, content, replies) VALUES (new.id, new.title, new.content, '');
+    END
+    """,
+    """
+    CREATE TRIGGER forum_thread_fts_update AFTER UPDATE OF title, content ON forum_thread BEGIN
+        UPDATE forum_thread_fts SET title = new.title, content = new.content WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER forum_thread_fts_delete AFTER DELETE ON forum_thread BEGIN
+        DELETE FROM forum_thread_fts WHERE rowid = old.id;
+    END
+    """,
+    *(
+        f"""
+    CREATE TRIGGER forum_reply_fts_{event} AFTER {clause} ON forum_reply BEGIN
+        UPDATE forum_thread_fts SET replies = {_SQLITE_REPLIES.format(f'{row}.thread_id')}
+        WHERE rowid = {row}.thread_id;
+    END
+    """
+        for event, clause, row in (
+            ('insert', 'INSERT', 'new'),
+            ('update', 'UPDATE OF content', 'new'),
+            ('delete', 'DELETE', 'old'),
+        )
+    ),
+    f"""
+    INSERT INTO forum_thread_fts (rowid, title, content, replies)
+        SELECT id, title, content, {_SQLITE_REPLIES.format('forum_thread.id')} FROM forum_thread
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS forum_reply_fts_delete",
+    "DROP TRIGGER IF EXISTS forum_reply_fts_update",
+    "DROP TRIGGER IF EXISTS forum_reply_fts_insert",
+    "DROP TRIGGER IF EXISTS forum_thread_fts_delete",
+    "DROP TRIGGER IF EXISTS forum_thread_fts_update",
+    "DROP TRIGGER IF EXISTS forum_thread_fts_insert",
+    "DROP TABLE IF EXISTS forum_thread_fts",
+]
+
+
+def _sqlite_has_fts5(cursor):
+    cursor.execute('PRAGMA compile_options')
+    return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def _run(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_INSTALL)
+    elif vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            if not _sqlite_has_fts5(cursor):
+                return
+        _run(schema_editor, SQLITE_INSTALL)
+
+
+def uninstall(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_UNINSTALL)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_UNINSTALL)
+
+
+class Migration(migrations.Migration):
+    """
+    Full-text search storage that has no model field: a trigger-maintained
+    tsvector + GIN indexes on PostgreSQL, an FTS5 table on SQLite.
+    """
+
+    dependencies = [
+        ('forum', '0003_thread_ranking'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
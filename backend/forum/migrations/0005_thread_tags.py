@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of forum.tags.normalize as of this migration
+MAX_TAG_LENGTH = 50
+
+
+def normalize(names):
+    seen = []
+    for name in names or []:
+        if not isinstance(name, str):
+            continue
+        name = name.strip().lower()[:MAX_TAG_LENGTH]
+        if name and name not in seen:
+            seen.append(name)
+    return seen
+
+
+def backfill_tags(apps, schema_editor):
+    from collections import Counter
+
+    Thread = apps.get_model('forum', 'Thread')
+    Tag = apps.get_model('forum', 'Tag')
+    ThreadTag = apps.get_model('forum', 'ThreadTag')
+    ChannelTag = apps.get_model('forum', 'ChannelTag')
+
+    pairs = [
+        (thread_id, channel_id, name)
+        for thread_id, channel_id, names in Thread.objects.values_list('id', 'channel_id', 'tags').iterator()
+        for name in normalize(names)
+    ]
+    totals = Counter(name for _, _, name in pairs)
+    per_channel = Counter((channel_id, name) for _, channel_id, name in pairs)
+
+    Tag.objects.bulk_create([Tag(name=n, thread_count=c) for n, c in totals.items()], batch_size=500)
+    tag_ids = dict(Tag.objects.values_list('name', 'id'))
+    ThreadTag.objects.bulk_create(
+        [ThreadTag(thread_id=t, channel_id=c, tag_id=tag_ids[n]) for t, c, n in pairs], batch_size=1000,
+    )
+    ChannelTag.objects.bulk_create(
+        [ChannelTag(channel_id=c, tag_id=tag_ids[n], thread_count=count) for (c, n), count in per_channel.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0004_thread_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('thread_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-thread_count'], name='tag_popular_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChannelTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('thread_count', models.IntegerField(default=0)),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='channel_tags', to='forum.channel')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='channel_tags', to='forum.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['channel', '-thread_count'], name='channel_tag_popular_idx')],
+                'constraints': [models.UniqueConstraint(fields=('channel', 'tag'), name='unique_channel_tag')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ThreadTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='forum.channel')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thread_tags', to='forum.tag')),
+                ('thread', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thread_tags', to='forum.thread')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'thread'], name='thread_tag_lookup_idx')],
+                'constraints': [models.UniqueConstraint(fields=('thread', 'tag'), name='unique_thread_tag')],
+            },
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+from django.db import migrations
+
+# A new reply is appended to its thread's search document instead of
+# re-aggregating every reply of the thread. Edits and deletions, which are
+# rare, still rebuild the thread's document.
+
+POSTGRES_REPLY_FUNCTION = """
+    CREATE OR REPLACE FUNCTION forum_reply_search_document() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE forum_thread
+            SET search_document = coalesce(search_document, ''::tsvector) ||
+                setweight(to_tsvector('english', coalesce(NEW.content, '')), 'C')
+            WHERE id = NEW.thread_id;
+        ELSE
+            -- Touching the title re-fires the thread trigger, which rebuilds the document
+            UPDATE forum_thread SET title = title
+            WHERE id = CASE WHEN TG_OP = 'DELETE' THEN OLD.thread_id ELSE NEW.thread_id END;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+POSTGRES_REPLY_FUNCTION_0004 = """
+    CREATE OR REPLACE FUNCTION forum_reply_search_document() RETURNS trigger AS $$
+    BEGIN
+        UPDATE forum_thread SET title = title
+        WHERE id = CASE WHEN TG_OP = 'DELETE' THEN OLD.thread_id ELSE NEW.thread_id END;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+SQLITE_REPLY_INSERT = """
+    CREATE TRIGGER forum_reply_fts_insert AFTER INSERT ON forum_reply BEGIN
+        UPDATE forum_thread_fts
+        SET replies = CASE WHEN replies = '' THEN coalesce(new.content, '')
+                           ELSE replies || ' ' || coalesce(new.content, '') END
+        WHERE rowid = new.thread_id;
+    END
+"""
+
+SQLITE_REPLY_INSERT_0004 = """
+    CREATE TRIGGER forum_reply_fts_insert AFTER INSERT ON forum_reply BEGIN
+        UPDATE forum_thread_fts SET replies = coalesce(
+            (SELECT group_concat(content, ' ') FROM forum_reply WHERE thread_id = new.thread_id), ''
+        )
+        WHERE rowid = new.thread_id;
+    END
+"""
+
+
+def _replace(schema_editor, postgres_function, sqlite_trigger):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(postgres_function)
+    elif connection.vendor == 'sqlite' and 'forum_thread_fts' in connection.introspection.table_names():
+        schema_editor.execute('DROP TRIGGER IF EXISTS forum_reply_fts_insert')
+        schema_editor.execute(sqlite_trigger)
+
+
+def install(apps, schema_editor):
+    _replace(schema_editor, POSTGRES_REPLY_FUNCTION, SQLITE_REPLY_INSERT)
+
+
+def uninstall(apps, schema_editor):
+    _replace(schema_editor, POSTGRES_REPLY_FUNCTION_0004, SQLITE_REPLY_INSERT_0004)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0005_thread_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
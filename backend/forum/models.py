@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Channel(models.Model):
     name = models.CharField(max_length=50, unique=True)
@@ -22,17 +23,85 @@ class Thread(models.Model):
     
     tags = models.JSONField(default=list, blank=True)
 
+    # Denormalized counters, kept in step by forum/signals.py.
+    # Rebuild or verify with `python manage.py rebuild_forum_counters`.
+    reply_count = models.IntegerField(default=0)
+    vote_count = models.IntegerField(default=0)
+    last_activity_at = models.DateTimeField(default=timezone.now)
+
+    # Ranking scores for ?sort=hot|rising, see forum/ranking.py
+    hot_score = models.FloatField(default=0)
+    rising_score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-vote_count'], name='thread_vote_count_idx'),
+            models.Index(fields=['-last_activity_at'], name='thread_activity_idx'),
+            models.Index(fields=['-pinned', '-hot_score', '-id'], name='thread_hot_idx'),
+            models.Index(fields=['-pinned', '-vote_count', '-id'], name='thread_top_idx'),
+            models.Index(fields=['-pinned', '-rising_score', '-id'], name='thread_rising_idx'),
+        ]
+
+    # Written only with F()/recomputing UPDATEs (signals, viewcounts, ranking)
+    MAINTAINED_FIELDS = ('views', 'reply_count', 'vote_count', 'last_activity_at', 'hot_score', 'rising_score')
+
+    def save(self, *args, **kwargs):
+        # A full save of a thread loaded earlier would write back stale counters
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.MAINTAINED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.title
 
-    @property
-    def reply_count(self):
-        return self.replies.count()
+class Tag(models.Model):
+    """Normalized (lowercase) tag. Thread.tags stays the display copy; forum/tags.py keeps both in step."""
+    name = models.CharField(max_length=50, unique=True)
+    thread_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-thread_count'], name='tag_popular_idx'),
+            # Names are stored lowercased, so autocomplete is a case-sensitive
+            # LIKE 'prefix%'; the pattern opclass lets Postgres use an index
+            # for it under any collation
+            models.Index(fields=['name'], name='tag_name_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
+    def __str__(self):
+        return self.name
 
-    @property
-    def vote_count(self):
-        # Calculate sum of votes
-        return self.votes.aggregate(total=models.Sum('value'))['total'] or 0
+class ThreadTag(models.Model):
+    thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name='thread_tags')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='thread_tags')
+    # Copy of thread.channel so per-channel counts can be adjusted without a join
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['thread', 'tag'], name='unique_thread_tag'),
+        ]
+        indexes = [
+            # ?tag= filtering starts from the tag
+            models.Index(fields=['tag', 'thread'], name='thread_tag_lookup_idx'),
+        ]
+
+class ChannelTag(models.Model):
+    """Per-channel tag usage, maintained incrementally for tag browsing and autocomplete."""
+    channel = models.ForeignKey(Channel, on_delete=models.CASCADE, related_name='channel_tags')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='channel_tags')
+    thread_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['channel', 'tag'], name='unique_channel_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['channel', '-thread_count'], name='channel_tag_popular_idx'),
+        ]
 
 class Reply(models.Model):
     thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name='replies')
@@ -59,3 +128,10 @@ class Vote(models.Model):
 
     class Meta:
         unique_together = ('user', 'thread')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored value so a changed vote can adjust Thread.vote_count by the delta
+        instance._stored_value = instance.value
+        return instance
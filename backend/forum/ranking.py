@@ -0,0 +1,60 @@
+"""
+Thread ranking scores for ?sort=hot|top|rising.
+
+Scores are stored on Thread (hot_score, rising_score) and indexed, so a
+ranked listing is an index scan rather than per-request aggregation.
+Votes and replies refresh one thread's scores as they happen (forum/signals.py);
+`python manage.py refresh_thread_scores` re-decays recent threads
+periodically, since the scores depend on age.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Thread
+
+HOT_GRAVITY = 1.8
+RISING_WINDOW = timedelta(hours=24)
+# Threads older than this keep their last (by now negligible) hot score
+REFRESH_WINDOW = timedelta(days=7)
+
+SCORE_FIELDS = ('id', 'created_at', 'vote_count', 'reply_count', 'views', 'hot_score', 'rising_score')
+
+
+def engagement(thread):
+    """Weighted activity: votes, replies count double, views count a little."""
+    return 1 + thread.vote_count + 2 * thread.reply_count + thread.views / 50
+
+
+def compute_scores(thread, now=None):
+    """Return (hot_score, rising_score) for a thread (HN-style gravity decay)."""
+    now = now or timezone.now()
+    age_hours = max((now - thread.created_at).total_seconds(), 0) / 3600
+    points = engagement(thread)
+    hot = points / (age_hours + 2) ** HOT_GRAVITY
+    rising = points / (age_hours + 2) if now - thread.created_at <= RISING_WINDOW else 0.0
+    return hot, rising
+
+
+def update_thread_scores(thread_id):
+    """Recompute and store one thread's scores (after a vote/reply/view change)."""
+    thread = Thread.objects.only(*SCORE_FIELDS).filter(pk=thread_id).first()
+    if thread is None:
+        return
+    hot, rising = compute_scores(thread)
+    Thread.objects.filter(pk=thread_id).update(hot_score=hot, rising_score=rising)
+
+
+def refresh_scores(batch_size=500):
+    """
+    Re-decay scores for threads inside REFRESH_WINDOW and clear rising
+    scores that have aged out. Returns the number of threads updated.
+    """
+    now = timezone.now()
+    recent = Thread.objects.filter(created_at__gte=now - REFRESH_WINDOW)
+    aged_out = Thread.objects.filter(created_at__lt=now - RISING_WINDOW).exclude(rising_score=0)
+    threads = list((recent | aged_out).only(*SCORE_FIELDS))
+    for thread in threads:
+        thread.hot_score, thread.rising_score = compute_scores(thread, now)
+    Thread.objects.bulk_update(threads, ['hot_score', 'rising_score'], batch_size=batch_size)
+    return len(threads)
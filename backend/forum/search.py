@@ -0,0 +1,90 @@
+"""
+Full-text search over forum threads and their replies.
+
+PostgreSQL: forum_thread.search_document is a tsvector kept current by
+triggers (title weight A, body B, replies C) and covered by a GIN index;
+queries use websearch_to_tsquery, so quoting, OR and -exclusions work
+and user input can never be a syntax error.
+
+SQLite: an FTS5 table (forum_thread_fts, rowid = thread id) kept current
+by triggers, ranked with bm25().
+
+Anything else falls back to unindexed icontains, which is only meant for
+odd local setups. The column, FTS5 table, indexes and triggers are created
+by migrations 0004_thread_search and 0006_search_reply_append.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, TextField
+from django.db.models.expressions import RawSQL
+
+SNIPPET_START = '<mark>'
+SNIPPET_STOP = '</mark>'
+
+
+def _sqlite_fts_ready():
+    return 'forum_thread_fts' in connection.introspection.table_names()
+
+
+def _fts5_query(text):
+    """Quote each word so arbitrary input can't break FTS5 query syntax; words are ANDed."""
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', text))
+
+
+def search(queryset, text):
+    """
+    Filter a Thread queryset to matches for `text`, annotated with
+    search_rank (higher is better) and search_snippet (a fragment with
+    matches wrapped in <mark>…</mark>), ordered by rank.
+    """
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, text)
+    if vendor == 'sqlite' and _sqlite_fts_ready():
+        return _search_sqlite(queryset, text)
+    return queryset.filter(
+        Q(title__icontains=text) | Q(content__icontains=text) | Q(replies__content__icontains=text)
+    ).distinct()
+
+
+def _search_postgres(queryset, text):
+    from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVectorField
+
+    query = SearchQuery(text, config='english', search_type='websearch')
+    document = RawSQL('forum_thread.search_document', [], output_field=SearchVectorField())
+    return queryset.annotate(search_document=document) \
+        .filter(search_document=query) \
+        .annotate(
+            search_rank=SearchRank(document, query),
+            search_snippet=SearchHeadline(
+                'content', query, config='english',
+                start_sel=SNIPPET_START, stop_sel=SNIPPET_STOP, max_words=30, min_words=12,
+            ),
+        ) \
+        .order_by('-search_rank', '-id')
+
+
+def _fts(select, match):
+    # Correlated on the thread id: bm25() and snippet() need the MATCH in their own query
+    return (
+        f'SELECT {select} FROM forum_thread_fts '
+        f'WHERE forum_thread_fts MATCH %s AND forum_thread_fts.rowid = forum_thread.id'
+    ), [match]
+
+
+def _search_sqlite(queryset, text):
+    match = _fts5_query(text)
+    if not match:
+        return queryset.none()
+    # bm25() is lower-is-better; weights mirror the Postgres A/B/C
+    rank_sql, rank_params = _fts('-bm25(forum_thread_fts, 10.0, 4.0, 1.0)', match)
+    snippet_sql, snippet_params = _fts('snippet(forum_thread_fts, -1, %s, %s, %s, 24)', match)
+    return queryset.filter(
+        id__in=RawSQL('SELECT rowid FROM forum_thread_fts WHERE forum_thread_fts MATCH %s', [match]),
+    ).annotate(
+        search_rank=RawSQL(rank_sql, rank_params, output_field=FloatField()),
+        search_snippet=RawSQL(
+            snippet_sql, [SNIPPET_START, SNIPPET_STOP, '…', *snippet_params], output_field=TextField(),
+        ),
+    ).order_by('-search_rank', '-id')
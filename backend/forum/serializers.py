@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Channel, Thread, Reply, Vote
+from .tags import MAX_TAG_LENGTH
 from users.serializers import UserSerializer
 
 class ChannelSerializer(serializers.ModelSerializer):
@@ -23,27 +24,43 @@ class ThreadSerializer(serializers.ModelSerializer):
     reply_count = serializers.IntegerField(read_only=True)
     vote_count = serializers.IntegerField(read_only=True)
     user_vote = serializers.SerializerMethodField()
+    # Only present on ?search= results (forum/search.py)
+    search_snippet = serializers.CharField(read_only=True, default=None)
 
     class Meta:
         model = Thread
         fields = [
             'id', 'title', 'content', 'author', 'channel', 'channel_slug', 'channel_color',
             'created_at', 'updated_at', 'pinned', 'views', 'tags',
-            'reply_count', 'vote_count', 'user_vote'
+            'reply_count', 'vote_count', 'user_vote', 'search_snippet'
         ]
         read_only_fields = ['author', 'created_at', 'updated_at', 'views', 'reply_count', 'vote_count']
 
     def get_user_vote(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            try:
-                # optimization: prefetch this?
-                vote = obj.votes.filter(user=request.user).first()
-                return vote.value if vote else 0
-            except:
-                return 0
+            # Prefetched per page by ThreadViewSet.get_queryset
+            user_votes = getattr(obj, 'current_user_votes', None)
+            if user_votes is not None:
+                return user_votes[0].value if user_votes else 0
+            value = obj.votes.filter(user=request.user).values_list('value', flat=True).first()
+            return value or 0
         return 0
 
+    def validate_tags(self, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError('Expected a list of tags.')
+        # Keep what the user typed for display, minus blanks and case-insensitive repeats
+        seen, cleaned = set(), []
+        for name in value:
+            if not isinstance(name, str) or not name.strip():
+                continue
+            name = name.strip()[:MAX_TAG_LENGTH]
+            if name.lower() not in seen:
+                seen.add(name.lower())
+                cleaned.append(name)
+        return cleaned
+
     def create(self, validated_data):
         user = self.context['request'].user
         validated_data['author'] = user
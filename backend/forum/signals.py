@@ -0,0 +1,100 @@
+"""
+Keeps Thread.reply_count / vote_count / last_activity_at and the ranking
+scores in step with Reply and Vote writes, and the normalized tag tables
+in step with Thread.tags (forum/tags.py). Updates use F() expressions so concurrent writers
+don't lose increments; callers wrap the write in a transaction so the row
+and the counter commit together. Replies and votes removed along with
+their thread (deleting a thread, channel or user) are skipped: there is
+no counter left to adjust.
+"""
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import tags
+from .models import Reply, Thread, ThreadTag, Vote
+from .ranking import update_thread_scores
+
+
+def last_activity():
+    """Thread.last_activity_at recomputed: the newest reply's time, or the thread's own."""
+    latest = Reply.objects.filter(thread=OuterRef('pk')).order_by().values('thread') \
+        .annotate(latest=Max('created_at')).values('latest')
+    return Coalesce(Subquery(latest), F('created_at'))
+
+
+@receiver(post_save, sender=Thread)
+def thread_created(sender, instance, created, **kwargs):
+    if created:
+        # The field default is taken a moment before created_at; line them up
+        instance.last_activity_at = instance.created_at
+        Thread.objects.filter(pk=instance.pk).update(last_activity_at=instance.created_at)
+        update_thread_scores(instance.pk)
+
+
+@receiver(post_save, sender=Thread)
+def thread_tags_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'tags', 'channel'} & set(update_fields):
+        return
+    tags.sync_thread_tags(instance)
+
+
+def _deleting_threads(origin):
+    """Ids of the threads being removed by the delete() call `origin` (see thread_deleting)."""
+    if origin is None:
+        return set()
+    if not hasattr(origin, '_deleting_thread_ids'):
+        origin._deleting_thread_ids = set()
+    return origin._deleting_thread_ids
+
+
+@receiver(pre_delete, sender=Thread)
+def thread_deleting(sender, instance, origin=None, **kwargs):
+    # Every pre_delete of a cascade is sent before the first post_delete
+    _deleting_threads(origin).add(instance.pk)
+
+
+@receiver(pre_delete, sender=Thread)
+def thread_tags_deleted(sender, instance, **kwargs):
+    # Before the cascade removes the ThreadTag rows the counts are derived from
+    tags.remove_thread_tags(list(ThreadTag.objects.filter(thread=instance)))
+
+
+@receiver(post_save, sender=Reply)
+def reply_created(sender, instance, created, **kwargs):
+    if created:
+        Thread.objects.filter(pk=instance.thread_id).update(
+            reply_count=F('reply_count') + 1,
+            last_activity_at=instance.created_at,
+        )
+        update_thread_scores(instance.thread_id)
+
+
+@receiver(post_delete, sender=Reply)
+def reply_deleted(sender, instance, origin=None, **kwargs):
+    if instance.thread_id in _deleting_threads(origin):
+        return
+    Thread.objects.filter(pk=instance.thread_id).update(
+        reply_count=F('reply_count') - 1,
+        last_activity_at=last_activity(),
+    )
+    update_thread_scores(instance.thread_id)
+
+
+@receiver(post_save, sender=Vote)
+def vote_saved(sender, instance, created, **kwargs):
+    delta = instance.value - (0 if created else getattr(instance, '_stored_value', instance.value))
+    instance._stored_value = instance.value
+    if delta:
+        Thread.objects.filter(pk=instance.thread_id).update(vote_count=F('vote_count') + delta)
+        update_thread_scores(instance.thread_id)
+
+
+@receiver(post_delete, sender=Vote)
+def vote_deleted(sender, instance, origin=None, **kwargs):
+    if instance.thread_id in _deleting_threads(origin):
+        return
+    stored = getattr(instance, '_stored_value', instance.value)
+    Thread.objects.filter(pk=instance.thread_id).update(vote_count=F('vote_count') - stored)
+    update_thread_scores(instance.thread_id)
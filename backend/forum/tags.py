@@ -0,0 +1,111 @@
+"""
+Normalized thread tags.
+
+Thread.tags (JSON) is what users typed and what the UI shows; the Tag /
+ThreadTag / ChannelTag tables are the indexed copy used for ?tag=
+filtering, autocomplete and per-channel counts. sync_thread_tags() runs
+from forum/signals.py whenever a thread is saved and only touches the
+rows and counters that changed, using F() so concurrent writers don't
+lose increments. `python manage.py rebuild_forum_counters` recomputes
+the counts from scratch.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import ChannelTag, Tag, Thread, ThreadTag
+
+MAX_TAG_LENGTH = 50
+
+
+def normalize(names):
+    """Lowercased, stripped, de-duplicated tag names (order kept); non-strings and blanks dropped."""
+    seen = []
+    for name in names or []:
+        if not isinstance(name, str):
+            continue
+        name = name.strip().lower()[:MAX_TAG_LENGTH]
+        if name and name not in seen:
+            seen.append(name)
+    return seen
+
+
+def _adjust(channel_id, tag_ids, delta):
+    Tag.objects.filter(pk__in=tag_ids).update(thread_count=F('thread_count') + delta)
+    ChannelTag.objects.filter(channel_id=channel_id, tag_id__in=tag_ids) \
+        .update(thread_count=F('thread_count') + delta)
+
+
+def _add(thread, names):
+    Tag.objects.bulk_create([Tag(name=n) for n in names], ignore_conflicts=True)
+    tag_ids = list(Tag.objects.filter(name__in=names).values_list('pk', flat=True))
+    ThreadTag.objects.bulk_create(
+        [ThreadTag(thread_id=thread.pk, tag_id=tid, channel_id=thread.channel_id) for tid in tag_ids],
+        ignore_conflicts=True,
+    )
+    ChannelTag.objects.bulk_create(
+        [ChannelTag(channel_id=thread.channel_id, tag_id=tid) for tid in tag_ids],
+        ignore_conflicts=True,
+    )
+    _adjust(thread.channel_id, tag_ids, 1)
+
+
+def remove_thread_tags(thread_tags):
+    """Delete ThreadTag rows and decrement their tag counts."""
+    by_channel = {}
+    for tt in thread_tags:
+        by_channel.setdefault(tt.channel_id, []).append(tt.tag_id)
+    ThreadTag.objects.filter(pk__in=[tt.pk for tt in thread_tags]).delete()
+    for channel_id, tag_ids in by_channel.items():
+        _adjust(channel_id, tag_ids, -1)
+
+
+def sync_thread_tags(thread):
+    """
+    Bring the ThreadTag rows and counts in line with thread.tags / thread.channel.
+    The thread row is locked while its tags are compared, so two saves of
+    one thread can't both add (and count) the same tag.
+    """
+    wanted = set(normalize(thread.tags))
+    with transaction.atomic():
+        Thread.objects.select_for_update().filter(pk=thread.pk).values_list('pk', flat=True).first()
+        current = {tt.tag.name: tt for tt in ThreadTag.objects.filter(thread=thread).select_related('tag')}
+
+        # A thread moved to another channel: re-count everything under the new one
+        stale = [tt for name, tt in current.items() if name not in wanted or tt.channel_id != thread.channel_id]
+        kept = {name for name, tt in current.items() if tt not in stale}
+        added = wanted - kept
+        if stale:
+            remove_thread_tags(stale)
+        if added:
+            _add(thread, sorted(added))
+
+
+def filter_threads(queryset, names, mode='all'):
+    """
+    Threads tagged with all (mode='all') or any (mode='any') of `names`.
+    Driven from the (tag, thread) index, so cost follows the tags' sizes,
+    not the size of the forum.
+    """
+    names = normalize(names)
+    if not names:
+        return queryset
+    matches = ThreadTag.objects.filter(tag__name__in=names).values('thread_id')
+    if mode == 'all' and len(names) > 1:
+        matches = matches.annotate(n=Count('tag_id')).filter(n=len(names))
+    return queryset.filter(pk__in=matches.values('thread_id'))
+
+
+def popular(channel=None, prefix='', limit=10):
+    """Most-used tags, optionally within one channel and/or starting with `prefix`."""
+    prefix = prefix.strip().lower()
+    if channel is None:
+        tags = Tag.objects.filter(thread_count__gt=0)
+        if prefix:
+            tags = tags.filter(name__startswith=prefix)
+        return list(tags.order_by('-thread_count', 'name').values('name', 'thread_count')[:limit])
+
+    rows = ChannelTag.objects.filter(channel=channel, thread_count__gt=0)
+    if prefix:
+        rows = rows.filter(tag__name__startswith=prefix)
+    rows = rows.order_by('-thread_count', 'tag__name').values('tag__name', 'thread_count')[:limit]
+    return [{'name': row['tag__name'], 'thread_count': row['thread_count']} for row in rows]
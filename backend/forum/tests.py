@@ -1,3 +1,395 @@
-from django.test import TestCase
+import importlib
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from forum import ranking, search, viewcounts
+from forum.models import Channel, ChannelTag, Reply, Tag, Thread, ThreadTag, Vote
+from users.models import User
+
+
+class ForumTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='ada')
+        self.other = User.objects.create(username='grace')
+        self.channel = Channel.objects.create(name='General', slug='general')
+        self.thread = Thread.objects.create(title='Keyset pagination', content='How?',
+                                            author=self.user, channel=self.channel)
+
+    def reload(self):
+        self.thread.refresh_from_db()
+        return self.thread
+
+
+class CounterSignalTests(ForumTestCase):
+    def test_new_thread_activity_starts_at_creation(self):
+        self.assertEqual(self.reload().last_activity_at, self.thread.created_at)
+
+    def test_replies_update_count_and_activity(self):
+        first = Reply.objects.create(thread=self.thread, author=self.other, content='Use a cursor')
+        latest = Reply.objects.create(thread=self.thread, author=self.user, content='Thanks')
+
+        self.assertEqual(self.reload().reply_count, 2)
+        self.assertEqual(self.thread.last_activity_at, latest.created_at)
+
+        latest.delete()
+        self.assertEqual(self.reload().reply_count, 1)
+        self.assertEqual(self.thread.last_activity_at, first.created_at)
+
+        first.delete()
+        self.assertEqual(self.reload().reply_count, 0)
+        self.assertEqual(self.thread.last_activity_at, self.thread.created_at)
+
+    def test_votes_update_count(self):
+        vote = Vote.objects.create(thread=self.thread, user=self.user, value=Vote.UPVOTE)
+        Vote.objects.create(thread=self.thread, user=self.other, value=Vote.UPVOTE)
+        self.assertEqual(self.reload().vote_count, 2)
+
+        vote.value = Vote.DOWNVOTE
+        vote.save()
+        self.assertEqual(self.reload().vote_count, 0)
+
+        vote.delete()
+        self.assertEqual(self.reload().vote_count, 1)
+
+
+class RebuildForumCountersTests(ForumTestCase):
+    def setUp(self):
+        super().setUp()
+        self.reply = Reply.objects.create(thread=self.thread, author=self.other, content='Use a cursor')
+        Vote.objects.create(thread=self.thread, user=self.other, value=Vote.UPVOTE)
+        self.thread.tags = ['django']
+        self.thread.save()
+
+    def verify(self):
+        out = StringIO()
+        call_command('rebuild_forum_counters', '--verify', stdout=out)
+        return out.getvalue()
+
+    def test_verify_passes_when_counters_match(self):
+        self.assertIn('correct', self.verify())
+
+    def test_verify_reports_drift_and_rebuild_fixes_it(self):
+        Thread.objects.filter(pk=self.thread.pk).update(
+            reply_count=5, vote_count=-2, last_activity_at=self.reply.created_at - timedelta(days=1),
+        )
+        Tag.objects.update(thread_count=7)
+
+        with self.assertRaisesMessage(CommandError, '2 counter(s) have drifted'):
+            self.verify()
+
+        call_command('rebuild_forum_counters', stdout=StringIO())
+        self.verify()
+        thread = self.reload()
+        self.assertEqual((thread.reply_count, thread.vote_count), (1, 1))
+        self.assertEqual(thread.last_activity_at, self.reply.created_at)
+        self.assertEqual(Tag.objects.get().thread_count, 1)
+
+    def test_verify_reports_stale_activity_alone(self):
+        Thread.objects.filter(pk=self.thread.pk).update(last_activity_at=self.thread.created_at)
+
+        with self.assertRaises(CommandError):
+            self.verify()
+
+
+class CascadeDeleteTests(ForumTestCase):
+    def add_activity(self, thread, n):
+        for i in range(n):
+            user = User.objects.create(username=f'{thread.pk}-{i}')
+            Reply.objects.create(thread=thread, author=user, content='+1')
+            Vote.objects.create(thread=thread, user=user, value=Vote.UPVOTE)
+
+    def delete_queries(self, n):
+        thread = Thread.objects.create(title=f'{n} replies', content='...', author=self.user, channel=self.channel)
+        self.add_activity(thread, n)
+        with CaptureQueriesContext(connection) as queries:
+            thread.delete()
+        return len(queries)
+
+    def test_thread_delete_skips_its_own_counters(self):
+        self.assertEqual(self.delete_queries(1), self.delete_queries(10))
+
+    def test_user_delete_still_updates_other_threads(self):
+        own = Thread.objects.create(title='Mine', content='...', author=self.other, channel=self.channel)
+        self.add_activity(own, 2)
+        Reply.objects.create(thread=self.thread, author=self.other, content='Use a cursor')
+        Vote.objects.create(thread=self.thread, user=self.other, value=Vote.UPVOTE)
+        Vote.objects.create(thread=self.thread, user=self.user, value=Vote.UPVOTE)
+
+        self.other.delete()
+
+        self.assertFalse(Thread.objects.filter(pk=own.pk).exists())
+        thread = self.reload()
+        self.assertEqual((thread.reply_count, thread.vote_count), (0, 1))
+        self.assertEqual(thread.last_activity_at, thread.created_at)
+        out = StringIO()
+        call_command('rebuild_forum_counters', '--verify', stdout=out)
+        self.assertIn('correct', out.getvalue())
+
+
+class ThreadListTests(ForumTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+    def list_threads(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/forum/threads/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results'], len(queries)
+
+    def test_user_vote_is_the_callers_own(self):
+        upvoted = Thread.objects.create(title='Up', content='...', author=self.other, channel=self.channel)
+        downvoted = Thread.objects.create(title='Down', content='...', author=self.other, channel=self.channel)
+        Vote.objects.create(thread=upvoted, user=self.user, value=Vote.UPVOTE)
+        Vote.objects.create(thread=downvoted, user=self.user, value=Vote.DOWNVOTE)
+        Vote.objects.create(thread=self.thread, user=self.other, value=Vote.DOWNVOTE)
+
+        results, _ = self.list_threads()
+
+        votes = {row['title']: row['user_vote'] for row in results}
+        self.assertEqual(votes, {'Up': 1, 'Down': -1, 'Keyset pagination': 0})
+
+    def test_user_votes_cost_one_query_per_page(self):
+        _, one_thread = self.list_threads()
+        for i in range(5):
+            thread = Thread.objects.create(title=f'Thread {i}', content='...', author=self.other, channel=self.channel)
+            Vote.objects.create(thread=thread, user=self.user, value=Vote.UPVOTE)
+
+        results, six_threads = self.list_threads()
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(six_threads, one_thread)
+
+    def test_anonymous_callers_have_no_vote(self):
+        Vote.objects.create(thread=self.thread, user=self.user, value=Vote.UPVOTE)
+        self.client.force_authenticate(None)
+
+        results, _ = self.list_threads()
+
+        self.assertEqual(results[0]['user_vote'], 0)
+
+
+class RankingTests(ForumTestCase):
+    def age(self, thread, hours):
+        created = timezone.now() - timedelta(hours=hours)
+        Thread.objects.filter(pk=thread.pk).update(created_at=created)
+        ranking.update_thread_scores(thread.pk)
+
+    def titles(self, sort):
+        response = APIClient(SERVER_NAME='localhost').get('/api/forum/threads/', {'sort': sort})
+        return [row['title'] for row in response.data['results']]
+
+    def test_votes_and_replies_refresh_hot_score(self):
+        before = self.reload().hot_score
+        Vote.objects.create(thread=self.thread, user=self.other, value=Vote.UPVOTE)
+        after_vote = self.reload().hot_score
+        Reply.objects.create(thread=self.thread, author=self.other, content='+1')
+
+        self.assertGreater(after_vote, before)
+        self.assertGreater(self.reload().hot_score, after_vote)
+
+    def test_sorts(self):
+        old = Thread.objects.create(title='Old favourite', content='...', author=self.other, channel=self.channel)
+        for i in range(5):
+            Vote.objects.create(thread=old, user=User.objects.create(username=f'fan{i}'), value=Vote.UPVOTE)
+        self.age(old, hours=72)
+        Vote.objects.create(thread=self.thread, user=self.other, value=Vote.UPVOTE)
+        Thread.objects.create(title='Rules', content='...', author=self.user, channel=self.channel, pinned=True)
+
+        self.assertEqual(self.titles('top'), ['Rules', 'Old favourite', 'Keyset pagination'])
+        self.assertEqual(self.titles('hot'), ['Rules', 'Keyset pagination', 'Old favourite'])
+        self.assertEqual(self.titles('new'), ['Rules', 'Keyset pagination', 'Old favourite'])
+        self.assertEqual(self.titles('rising')[:2], ['Rules', 'Keyset pagination'])
+        self.assertEqual(Thread.objects.get(pk=old.pk).rising_score, 0)
+
+    def test_refresh_decays_recent_threads_and_clears_rising(self):
+        Thread.objects.filter(pk=self.thread.pk).update(created_at=timezone.now() - timedelta(hours=30))
+        stale_score = self.reload().hot_score
+
+        self.assertEqual(ranking.refresh_scores(), 1)
+
+        thread = self.reload()
+        self.assertLess(thread.hot_score, stale_score)
+        self.assertEqual(thread.rising_score, 0)
+
+
+class ViewCountTests(ForumTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(viewcounts.flush)
+
+    def test_views_are_deduplicated_and_flushed(self):
+        self.assertTrue(viewcounts.record_view(self.thread.pk, 'ip:1.2.3.4'))
+        self.assertFalse(viewcounts.record_view(self.thread.pk, 'ip:1.2.3.4'))
+        self.assertTrue(viewcounts.record_view(self.thread.pk, 'u:someone'))
+        hot_score = self.reload().hot_score
+
+        self.assertEqual(viewcounts.flush(), 2)
+        self.assertEqual(self.reload().views, 2)
+        self.assertGreater(self.thread.hot_score, hot_score)
+        self.assertEqual(viewcounts.pending(self.thread.pk), 0)
+
+    def view(self, forwarded_for):
+        client = APIClient(SERVER_NAME='localhost', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=forwarded_for)
+        return client.get(f'/api/forum/threads/{self.thread.pk}/').data['views']
+
+    def test_anonymous_viewers_are_told_apart_by_client_ip(self):
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            self.assertEqual(self.view('203.0.113.5'), 1)
+            self.assertEqual(self.view('203.0.113.5'), 1)
+            self.assertEqual(self.view('198.51.100.7'), 2)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        self.assertEqual(self.view('203.0.113.5'), 1)
+        self.assertEqual(self.view('198.51.100.7'), 1)
+
+
+class SearchTests(ForumTestCase):
+    def setUp(self):
+        super().setUp()
+        self.body_match = Thread.objects.create(title='Pagination', content='Cursors beat offsets for deep pages',
+                                                author=self.user, channel=self.channel)
+        self.title_match = Thread.objects.create(title='Cursors explained', content='A short guide',
+                                                 author=self.user, channel=self.channel)
+        self.reply_match = Thread.objects.create(title='Help', content='Slow list endpoint',
+                                                 author=self.user, channel=self.channel)
+        Reply.objects.create(thread=self.reply_match, author=self.other, content='Switch to cursors')
+
+    def titles(self, text):
+        return [t.title for t in search.search(Thread.objects.all(), text)]
+
+    def test_titles_bodies_and_replies_match_in_weight_order(self):
+        self.assertEqual(self.titles('cursor'), ['Cursors explained', 'Pagination', 'Help'])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.titles('cursors offsets'), ['Pagination'])
+        self.assertEqual(self.titles('cursors nothing'), [])
+
+    def test_new_replies_are_appended_to_the_document(self):
+        Reply.objects.create(thread=self.reply_match, author=self.user, content='Thanks, that fixed it')
+
+        self.assertEqual(self.titles('fixed'), ['Help'])
+        self.assertEqual(self.titles('switch'), ['Help'])
+
+    def test_edited_and_deleted_replies_leave_the_document(self):
+        reply = Reply.objects.create(thread=self.thread, author=self.user, content='Use a sentinel')
+        reply.content = 'Use a bookmark'
+        reply.save()
+        self.assertEqual(self.titles('sentinel'), [])
+        self.assertEqual(self.titles('bookmark'), ['Keyset pagination'])
+
+        reply.delete()
+        self.assertEqual(self.titles('bookmark'), [])
+
+    def test_deleted_threads_are_not_found(self):
+        self.title_match.delete()
+
+        self.assertEqual(self.titles('cursor'), ['Pagination', 'Help'])
+
+    def test_list_returns_a_highlighted_snippet(self):
+        client = APIClient(SERVER_NAME='localhost')
+
+        response = client.get('/api/forum/threads/', {'search': 'offsets'})
+
+        [row] = response.data['results']
+        self.assertEqual(row['title'], 'Pagination')
+        self.assertIn(f'{search.SNIPPET_START}offsets{search.SNIPPET_STOP}', row['search_snippet'])
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 query quoting')
+    def test_query_syntax_in_input_is_harmless(self):
+        self.assertEqual(self.titles('cursors: "offsets* ('), ['Pagination'])
+        self.assertEqual(self.titles('*** ()'), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'websearch_to_tsquery syntax')
+    def test_websearch_operators(self):
+        self.assertEqual(self.titles('cursors -offsets'), ['Cursors explained', 'Help'])
+        self.assertEqual(self.titles('"deep pages" or guide'), ['Cursors explained', 'Pagination'])
+
+
+class TagTests(ForumTestCase):
+    def setUp(self):
+        super().setUp()
+        self.help = Channel.objects.create(name='Help', slug='help')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.thread.tags = ['Django', 'SQL']
+        self.thread.save()
+        for title, channel, names in [('ORM', self.channel, ['django']), ('Joins', self.help, ['sql', 'postgres']),
+                                      ('Deploy', self.help, ['docker', 'django'])]:
+            Thread.objects.create(title=title, content='...', author=self.other, channel=channel, tags=names)
+
+    def titles(self, **params):
+        response = self.client.get('/api/forum/threads/', params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['title'] for row in response.data['results'])
+
+    def autocomplete(self, **params):
+        response = self.client.get('/api/forum/tags/', params)
+        self.assertEqual(response.status_code, 200)
+        return [(row['name'], row['thread_count']) for row in response.data]
+
+    def test_counts_follow_thread_tags(self):
+        self.thread.tags = ['Django', 'django ', 'SQL']
+        self.thread.save()
+        other = Thread.objects.create(title='Indexes', content='...', author=self.other,
+                                      channel=self.channel, tags=['sql'])
+        self.assertEqual(Tag.objects.get(name='sql').thread_count, 3)
+
+        self.thread.tags = ['sql']
+        self.thread.save()
+        other.delete()
+
+        counts = dict(Tag.objects.values_list('name', 'thread_count'))
+        self.assertEqual(counts, {'django': 2, 'sql': 2, 'postgres': 1, 'docker': 1})
+        self.assertEqual(ChannelTag.objects.get(channel=self.channel, tag__name='sql').thread_count, 1)
+
+    def test_moving_a_thread_moves_its_channel_counts(self):
+        self.thread.channel = self.help
+        self.thread.save()
+
+        self.assertEqual(self.autocomplete(channel='general'), [('django', 1)])
+        self.assertEqual(self.autocomplete(channel='help'), [('django', 2), ('sql', 2), ('docker', 1), ('postgres', 1)])
+
+    def test_filter_needs_every_tag_by_default(self):
+        self.assertEqual(self.titles(tag=['django']), ['Deploy', 'Keyset pagination', 'ORM'])
+        self.assertEqual(self.titles(tag=['DJANGO', 'sql']), ['Keyset pagination'])
+        self.assertEqual(self.titles(tag=['django', 'unknown']), [])
+
+    def test_filter_can_match_any_tag(self):
+        self.assertEqual(self.titles(tag=['docker', 'postgres'], tag_mode='any'), ['Deploy', 'Joins'])
+
+    def test_autocomplete_by_prefix_and_channel(self):
+        self.assertEqual(self.autocomplete(prefix='D'), [('django', 3), ('docker', 1)])
+        self.assertEqual(self.autocomplete(prefix='do'), [('docker', 1)])
+        self.assertEqual(self.autocomplete(prefix='d', channel='help'), [('django', 1), ('docker', 1)])
+        self.assertEqual(self.autocomplete(prefix='%'), [])
+        self.assertEqual(self.autocomplete(limit=2), [('django', 3), ('sql', 2)])
+        self.assertEqual(self.client.get('/api/forum/tags/', {'channel': 'nope'}).status_code, 404)
+
+    def test_unused_tags_are_not_suggested(self):
+        Thread.objects.filter(title='Deploy').get().delete()
+
+        self.assertEqual(self.autocomplete(prefix='do'), [])
+
+    def test_migration_backfills_from_thread_tags(self):
+        expected = self.autocomplete(), self.autocomplete(channel='help'), self.titles(tag=['sql'])
+        ThreadTag.objects.all().delete()
+        ChannelTag.objects.all().delete()
+        Tag.objects.all().delete()
+
+        migration = importlib.import_module('forum.migrations.0005_thread_tags')
+        migration.backfill_tags(apps, None)
+
+        self.assertEqual((self.autocomplete(), self.autocomplete(channel='help'), self.titles(tag=['sql'])), expected)
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ChannelViewSet, ThreadViewSet
+from .views import ChannelViewSet, TagListView, ThreadViewSet
 
 router = DefaultRouter()
 router.register(r'channels', ChannelViewSet)
 router.register(r'threads', ThreadViewSet)
 
 urlpatterns = [
+    path('tags/', TagListView.as_view(), name='forum-tags'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,99 @@
+"""
+Buffered, de-duplicated view counting for threads.
+
+Thread.retrieve used to do a read-modify-write on Thread.views for every
+page view, losing increments under concurrency and taking a row lock per
+reader. Views are now counted in a per-process buffer and written back
+periodically as one `views = views + n` UPDATE per thread, and the
+thread's ranking scores (which include views) are recomputed.
+
+A viewer is counted at most once per DEDUPE_WINDOW per thread (tracked in
+the default cache). Anonymous viewers are told apart by client IP, taken
+from X-Forwarded-For behind REST_FRAMEWORK['NUM_PROXIES'] proxies.
+"""
+import atexit
+import threading
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F
+from rest_framework.throttling import BaseThrottle
+
+from . import ranking
+from .models import Thread
+
+FLUSH_INTERVAL = 10  # seconds between background flushes
+FLUSH_THRESHOLD = 500  # flush early once this many views are buffered
+DEDUPE_WINDOW = 30 * 60  # seconds
+
+_pending = Counter()
+_lock = threading.Lock()
+_timer = None
+
+
+def viewer_key(request):
+    """Identify a viewer: user id when signed in, otherwise client IP (as DRF's throttles find it)."""
+    if request.user.is_authenticated:
+        return f'u:{request.user.pk}'
+    return f'ip:{BaseThrottle().get_ident(request)}'
+
+
+def record_view(thread_id, viewer=None):
+    """Count a view unless this viewer was already counted recently. Returns True if counted."""
+    global _timer
+    if viewer and not cache.add(f'forum:viewed:{thread_id}:{viewer}', 1, DEDUPE_WINDOW):
+        return False
+
+    with _lock:
+        _pending[thread_id] += 1
+        flush_now = sum(_pending.values()) >= FLUSH_THRESHOLD
+        if not flush_now and _timer is None:
+            _timer = threading.Timer(FLUSH_INTERVAL, _flush_in_background)
+            _timer.daemon = True
+            _timer.start()
+
+    if flush_now:
+        flush()
+    return True
+
+
+def pending(thread_id):
+    """Views buffered for a thread but not yet written."""
+    return _pending.get(thread_id, 0)
+
+
+def flush():
+    """Write buffered views to the database and re-rank their threads. Returns the number of views written."""
+    global _timer
+    with _lock:
+        batch = dict(_pending)
+        _pending.clear()
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+
+    written = 0
+    try:
+        for thread_id, count in batch.items():
+            Thread.objects.filter(pk=thread_id).update(views=F('views') + count)
+            written += count
+            batch[thread_id] = 0
+            ranking.update_thread_scores(thread_id)
+    finally:
+        # Put back anything that failed so it is retried on the next flush
+        leftover = {k: v for k, v in batch.items() if v}
+        if leftover:
+            with _lock:
+                _pending.update(leftover)
+    return written
+
+
+def _flush_in_background():
+    try:
+        flush()
+    finally:
+        connections.close_all()  # timer threads own their connections
+
+
+atexit.register(flush)
@@ -1,44 +1,90 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Sum
+from rest_framework.views import APIView
+from django.db import transaction
+from django.db.models import Count, Prefetch, Sum
 from .models import Channel, Thread, Reply, Vote
 from .serializers import ChannelSerializer, ThreadSerializer, ReplySerializer, VoteSerializer
+from . import search, tags, viewcounts
 
 class ChannelViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Channel.objects.all()
     serializer_class = ChannelSerializer
     permission_classes = [permissions.AllowAny]
 
+class TagListView(APIView):
+    """
+    GET /api/forum/tags/?prefix=&channel=&limit= — most-used tags, for
+    browsing (no prefix) and autocomplete (prefix), optionally per channel.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        channel = None
+        slug = request.query_params.get('channel')
+        if slug:
+            channel = Channel.objects.filter(slug=slug).first()
+            if channel is None:
+                return Response({'error': 'Channel not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            limit = 10
+        return Response(tags.popular(channel, request.query_params.get('prefix', ''), limit))
+
 class ThreadViewSet(viewsets.ModelViewSet):
-    queryset = Thread.objects.all().select_related('author', 'channel').prefetch_related('votes')
+    queryset = Thread.objects.all().select_related('author', 'author__profile', 'channel')
     serializer_class = ThreadSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'content', 'tags']
-    ordering_fields = ['created_at', 'views']
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['created_at', 'views', 'vote_count', 'reply_count', 'last_activity_at']
+
+    # ?sort= modes; pinned threads always come first. Each matches an index on Thread.
+    SORTS = {
+        'hot': ('-pinned', '-hot_score', '-id'),
+        'top': ('-pinned', '-vote_count', '-id'),
+        'rising': ('-pinned', '-rising_score', '-id'),
+        'new': ('-pinned', '-created_at', '-id'),
+    }
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        # ?ordering= (OrderingFilter) still overrides this when given
+        sort = self.request.query_params.get('sort', 'new')
+        queryset = queryset.order_by(*self.SORTS.get(sort, self.SORTS['new']))
+
+        # Only the requesting user's votes, one query for the whole page (read by ThreadSerializer.get_user_vote)
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.prefetch_related(Prefetch(
+                'votes',
+                queryset=Vote.objects.filter(user=user).only('id', 'thread_id', 'value'),
+                to_attr='current_user_votes',
+            ))
+
         channel_slug = self.request.query_params.get('channel')
         if channel_slug:
             queryset = queryset.filter(channel__slug=channel_slug)
         
-        # Filter by tag?
-        tag = self.request.query_params.get('tag')
-        if tag:
-            # Simple JSON contains check or regex? JSONField search can be database specific.
-            # SQLite supports JSON operations in recent Django versions.
-            pass 
-        
+        # ?tag=a&tag=b[&tag_mode=any] — all (default) or any of the tags, via the ThreadTag index
+        tag_names = self.request.query_params.getlist('tag')
+        if tag_names:
+            mode = 'any' if self.request.query_params.get('tag_mode') == 'any' else 'all'
+            queryset = tags.filter_threads(queryset, tag_names, mode)
+
+        # ?search= — full-text over titles, bodies and replies, best match first
+        text = self.request.query_params.get('search', '').strip()
+        if text and self.action == 'list':
+            queryset = search.search(queryset, text)
+
         return queryset
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Increment views
-        # Use simpler approach to avoid race conditions but for now simple update is fine
-        instance.views += 1
-        instance.save(update_fields=['views'])
+        # Buffered + de-duplicated; written back in batches by forum/viewcounts.py
+        viewcounts.record_view(instance.pk, viewcounts.viewer_key(request))
+        instance.views += viewcounts.pending(instance.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -51,10 +97,12 @@ class ThreadViewSet(viewsets.ModelViewSet):
         if value not in [Vote.UPVOTE, Vote.DOWNVOTE]:
             return Response({'error': 'Invalid vote value'}, status=status.HTTP_400_BAD_REQUEST)
 
-        vote, created = Vote.objects.update_or_create(
-            user=user, thread=thread,
-            defaults={'value': value}
-        )
+        # Vote row and Thread.vote_count (forum/signals.py) commit together
+        with transaction.atomic():
+            vote, created = Vote.objects.update_or_create(
+                user=user, thread=thread,
+                defaults={'value': value}
+            )
         
         return Response({'status': 'voted', 'value': vote.value})
 
@@ -70,6 +118,8 @@ class ThreadViewSet(viewsets.ModelViewSet):
         thread = self.get_object()
         serializer = ReplySerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(author=request.user, thread=thread)
+            # Reply row and Thread.reply_count (forum/signals.py) commit together
+            with transaction.atomic():
+                serializer.save(author=request.user, thread=thread)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import GitHubProfile
+from .models import GitHubProfile, GitHubRepo, WebhookDelivery
 
 
 @admin.register(GitHubProfile)
@@ -7,3 +7,17 @@ class GitHubProfileAdmin(admin.ModelAdmin):
     list_display = ('github_username', 'user', 'public_repos', 'followers', 'total_contributions', 'last_synced')
     search_fields = ('github_username', 'user__username', 'user__email')
     readonly_fields = ('last_synced',)
+
+
+@admin.register(GitHubRepo)
+class GitHubRepoAdmin(admin.ModelAdmin):
+    list_display = ('full_name', 'profile', 'stargazers_count', 'forks_count', 'pushed_at')
+    search_fields = ('full_name', 'profile__github_username')
+    raw_id_fields = ('profile',)
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('delivery_id', 'event', 'received_at', 'processed_at', 'attempts', 'failed_at')
+    list_filter = ('event',)
+    search_fields = ('delivery_id',)
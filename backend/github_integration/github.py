@@ -4,53 +4,218 @@ Wraps GitHub REST API v3 with rate-limit awareness.
 Docs: https://docs.github.com/en/rest
 Rate limit: 60 requests/hour (unauthenticated), 5000/hour (authenticated)
 """
-import requests
-import time
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
-GITHUB_API_BASE = 'https://api.github.com'
+from django.conf import settings
+from django.core.cache import caches
+
+from core import breaker, http, ratelimit
 
-# Simple rate-limit tracker
-_last_request_time = 0
-_MIN_INTERVAL = 0.1  # 100ms between requests
+GITHUB_API_BASE = 'https://api.github.com'
 
+# Max concurrent /languages calls when computing language stats
+LANGUAGE_FETCH_WORKERS = 8
 
-def _get_headers(access_token=None):
-    """Build request headers. Uses per-user token or server token."""
-    headers = {
+http.register(
+    'github',
+    base_url=GITHUB_API_BASE,
+    timeout=15,
+    pool_maxsize=LANGUAGE_FETCH_WORKERS,
+    headers={
         'Accept': 'application/vnd.github+json',
         'X-GitHub-Api-Version': '2022-11-28',
-    }
-    token = access_token or os.environ.get('GITHUB_TOKEN', '')
+    },
+)
+
+
+# Per-token budgets: local pace (req/s) and burst, plus the hourly limit
+# GitHub reports in X-RateLimit-* (5000 with a token, 60 without)
+_limiter = ratelimit.register('github', rate=10, burst=10, limit=5000)
+_ANONYMOUS_LIMIT = 60
+# GraphQL has its own hourly point budget per token, separate from REST's
+_graphql_limiter = ratelimit.register('github_graphql', rate=10, burst=10, limit=5000)
+
+# Opens when most recent calls fail (errors, 5xx) or take 5s+; see core/breaker.py
+_breaker = breaker.register('github', slow_call_seconds=5)
+
+
+def is_unavailable():
+    """True while the GitHub breaker is refusing calls (persisted data can't be refreshed)."""
+    return _breaker.is_open()
+
+
+class GitHubNotFound(Exception):
+    """GitHub answered 404 for the requested user or resource."""
+
+
+class GitHubGraphQLError(Exception):
+    """A GraphQL query came back with errors (other than NOT_FOUND)."""
+
+
+def _server_token():
+    return os.environ.get('GITHUB_TOKEN', '')
+
+
+def _token_identity(token):
+    """Stable, non-reversible identity for a token (used as budget and cache key)."""
+    return hashlib.sha256(token.encode()).hexdigest() if token else 'anonymous'
+
+
+def _budget_args(token):
+    """(key, label, nominal limit) for a token's budget."""
+    if not token:
+        return 'anonymous', 'anonymous', _ANONYMOUS_LIMIT
+    key = _token_identity(token)
+    label = 'server' if token == _server_token() else f'user:{key[:8]}'
+    return key, label, None
+
+
+def _choose_token(access_token=None, limiter=_limiter):
+    """
+    Token to call with: of the caller's token and the server token, the one
+    with the most budget left (the caller's on a tie); anonymous if neither.
+    Everything fetched here is public, so either token sees the same data.
+    """
+    tokens = [t for t in dict.fromkeys([access_token or '', _server_token()]) if t] or ['']
+    by_key = {_budget_args(t)[0]: t for t in tokens}
+    return by_key[limiter.pick([_budget_args(t) for t in tokens])[0]]
+
+
+def has_token(access_token=None):
+    """True if a call could be authenticated (GraphQL requires it)."""
+    return bool(access_token or _server_token())
+
+
+def _get_headers(token):
+    """Build per-request auth headers for the chosen token."""
+    headers = {}
     if token:
         headers['Authorization'] = f'Bearer {token}'
     return headers
 
 
-def _rate_limited_get(url, params=None, access_token=None):
-    """Make a GET request to the GitHub API with rate limiting."""
-    global _last_request_time
-    now = time.time()
-    elapsed = now - _last_request_time
-    if elapsed < _MIN_INTERVAL:
-        time.sleep(_MIN_INTERVAL - elapsed)
+def _response_cache():
+    return caches[getattr(settings, 'GITHUB_RESPONSE_CACHE', 'default')]
+
+
+def _cache_key(path, params, token):
+    """Cache key from URL + params + token identity (different tokens can see different data)."""
+    raw = '|'.join([
+        path,
+        '&'.join(f'{k}={v}' for k, v in sorted((params or {}).items())),
+        _token_identity(token),
+    ])
+    return 'github:resp:' + hashlib.sha256(raw.encode()).hexdigest()
+
 
-    response = requests.get(
-        url,
+def _send(path, params=None, token='', headers=None):
+    """
+    Paced, authenticated GET with `token` (see _choose_token), through the
+    GitHub circuit breaker. Raises on 404, rate limiting and an open
+    circuit; otherwise returns the response as-is (including 304s).
+    """
+    _breaker.raise_if_open()
+    budget = _limiter.budget(*_budget_args(token))
+    budget.acquire()
+
+    response = _breaker.call(lambda: http.client('github').get(
+        path,
         params=params,
-        headers=_get_headers(access_token),
-        timeout=15
-    )
-    _last_request_time = time.time()
+        headers={**_get_headers(token), **(headers or {})},
+    ))
+    budget.update(response.headers)
 
     if response.status_code == 404:
-        raise Exception('GitHub user not found')
-    if response.status_code == 403:
-        remaining = response.headers.get('X-RateLimit-Remaining', '?')
-        raise Exception(f'GitHub API rate limit hit (remaining: {remaining}). Try again later.')
+        raise GitHubNotFound('GitHub user not found')
+    _check_rate_limited(response, budget)
+    return response
+
+
+def _check_rate_limited(response, budget):
+    if response.status_code not in (403, 429):
+        return
+    remaining = response.headers.get('X-RateLimit-Remaining', '?')
+    retry_after = response.headers.get('Retry-After')
+    if retry_after and retry_after.isdigit():
+        # Secondary limit: GitHub asks to back off even though quota remains
+        budget.exhaust(int(retry_after))
+    raise ratelimit.RateLimitExceeded(
+        f'GitHub API rate limit hit (remaining: {remaining}). Try again later.',
+        int(retry_after) if retry_after and retry_after.isdigit() else 60,
+    )
+
+
+def run_graphql(query, variables=None, access_token=None, partial=False):
+    """
+    POST a GraphQL v4 query with whichever token has the most GraphQL
+    budget left. Returns `data`. A NOT_FOUND error raises GitHubNotFound
+    and any other error GitHubGraphQLError, unless `partial`, in which
+    case (data, errors) is returned for the caller to sort out.
+    """
+    token = _choose_token(access_token, limiter=_graphql_limiter)
+    if not token:
+        raise GitHubGraphQLError('GitHub GraphQL requires a token')
+
+    _breaker.raise_if_open()
+    budget = _graphql_limiter.budget(*_budget_args(token))
+    budget.acquire()
+
+    response = _breaker.call(lambda: http.client('github').post(
+        '/graphql',
+        json={'query': query, 'variables': variables or {}},
+        headers=_get_headers(token),
+    ))
+    budget.update(response.headers)
+    _check_rate_limited(response, budget)
+    response.raise_for_status()
+
+    body = response.json()
+    data, errors = body.get('data') or {}, body.get('errors') or []
+    if partial:
+        return data, errors
+    if any(e.get('type') == 'NOT_FOUND' for e in errors):
+        raise GitHubNotFound('GitHub user not found')
+    if errors:
+        raise GitHubGraphQLError('; '.join(e.get('message', '') for e in errors))
+    return data
+
+
+def _rate_limited_get(path, params=None, access_token=None):
+    """
+    Make a GET request to the GitHub API with whichever token has the most
+    budget left, paced by that token's budget.
+    Responses carrying an ETag/Last-Modified are cached; later calls send
+    them as If-None-Match/If-Modified-Since and reuse the cached body on a
+    304, which GitHub does not count against the rate limit.
+    """
+    token = _choose_token(access_token)
+    cache = _response_cache()
+    key = _cache_key(path, params, token)
+    cached = cache.get(key)
+
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    response = _send(path, params=params, token=token, headers=headers)
+
+    if response.status_code == 304 and cached:
+        cache.touch(key)
+        return cached['body']
     response.raise_for_status()
-    return response.json()
+    body = response.json()
+
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag or last_modified:
+        cache.set(key, {'etag': etag, 'last_modified': last_modified, 'body': body})
+    return body
 
 
 def fetch_user(username, access_token=None):
@@ -59,10 +224,15 @@ def fetch_user(username, access_token=None):
     Returns dict with: login, id, avatar_url, html_url, name, company,
     blog, location, bio, public_repos, public_gists, followers, following, created_at.
     """
-    return _rate_limited_get(f'{GITHUB_API_BASE}/users/{username}', access_token=access_token)
+    return _rate_limited_get(f'/users/{username}', access_token=access_token)
+
 
+def fetch_user_by_id(github_id, access_token=None):
+    """Fetch a user by numeric id; follows renames, since ids never change."""
+    return _rate_limited_get(f'/user/{github_id}', access_token=access_token)
 
-def fetch_user_repos(username, sort='updated', per_page=10, access_token=None):
+
+def fetch_user_repos(username, sort='updated', per_page=10, page=1, access_token=None):
     """
     Fetch user's public repositories sorted by last update.
     Returns list of repo objects.
@@ -71,26 +241,69 @@ def fetch_user_repos(username, sort='updated', per_page=10, access_token=None):
         'sort': sort,
         'direction': 'desc',
         'per_page': per_page,
+        'page': page,
         'type': 'owner',
     }
     return _rate_limited_get(
-        f'{GITHUB_API_BASE}/users/{username}/repos',
+        f'/users/{username}/repos',
         params=params,
         access_token=access_token
     )
 
 
-def fetch_user_events(username, per_page=30, access_token=None):
+# Repos kept per profile: up to 3 pages of 100, most recently pushed first
+REPOS_PER_PAGE = 100
+REPOS_MAX_PAGES = 3
+
+
+def fetch_all_user_repos(username, access_token=None):
+    """A user's owned repos, most recently pushed first, up to REPOS_MAX_PAGES pages."""
+    repos = []
+    for page in range(1, REPOS_MAX_PAGES + 1):
+        batch = fetch_user_repos(username, sort='pushed', per_page=REPOS_PER_PAGE, page=page,
+                                 access_token=access_token)
+        repos.extend(batch)
+        if len(batch) < REPOS_PER_PAGE:
+            break
+    return repos
+
+
+# GitHub serves at most 300 events (3 pages of 100) per user
+EVENTS_PER_PAGE = 100
+EVENTS_MAX_PAGES = 3
+
+
+def fetch_new_events(username, since_id=None, etag='', access_token=None):
     """
-    Fetch user's recent public events (commits, PRs, issues, etc.).
-    Returns list of event objects.
+    Catch up on a user's public events newer than event `since_id`.
+    Page 1 is requested with If-None-Match: `etag`; a 304 means nothing
+    new and costs no rate limit. Further pages are read only until the
+    cursor is reached.
+    Returns (new events newest-first, page-1 ETag).
     """
-    params = {'per_page': per_page}
-    return _rate_limited_get(
-        f'{GITHUB_API_BASE}/users/{username}/events/public',
-        params=params,
-        access_token=access_token
-    )
+    path = f'/users/{username}/events/public'
+    since = int(since_id) if since_id else None
+    token = _choose_token(access_token)
+    new_events = []
+
+    for page in range(1, EVENTS_MAX_PAGES + 1):
+        headers = {'If-None-Match': etag} if page == 1 and etag else {}
+        response = _send(path, params={'per_page': EVENTS_PER_PAGE, 'page': page},
+                         token=token, headers=headers)
+        if response.status_code == 304:
+            return [], etag
+        response.raise_for_status()
+        if page == 1:
+            etag = response.headers.get('ETag', '')
+
+        events = response.json()
+        for event in events:
+            if since is not None and int(event['id']) <= since:
+                return new_events, etag
+            new_events.append(event)
+        if len(events) < EVENTS_PER_PAGE:
+            break
+    return new_events, etag
 
 
 def fetch_repo_languages(username, repo_name, access_token=None):
@@ -99,28 +312,42 @@ def fetch_repo_languages(username, repo_name, access_token=None):
     Returns dict like: {"Python": 45000, "JavaScript": 12000}
     """
     return _rate_limited_get(
-        f'{GITHUB_API_BASE}/repos/{username}/{repo_name}/languages',
+        f'/repos/{username}/{repo_name}/languages',
         access_token=access_token
     )
 
 
-def compute_top_languages(repos, access_token=None):
+def fetch_languages(repos, access_token=None, max_workers=LANGUAGE_FETCH_WORKERS):
     """
-    Compute aggregated language stats across all repos.
-    Returns sorted list: [{"name": "Python", "percentage": 45.2, "bytes": 120000}, ...]
+    Language byte counts for each repo, in order (None where the call fails).
+    The per-repo /languages calls run concurrently on a bounded thread pool;
+    pacing is left to the token's budget in _rate_limited_get.
     """
-    language_bytes = {}
-    for repo in repos[:15]:  # Limit to 15 repos to avoid rate limits
+    def _fetch(repo):
         try:
-            langs = fetch_repo_languages(
+            return fetch_repo_languages(
                 repo['owner']['login'],
                 repo['name'],
                 access_token=access_token
             )
-            for lang, byte_count in langs.items():
-                language_bytes[lang] = language_bytes.get(lang, 0) + byte_count
         except Exception:
-            continue
+            return None
+
+    if not repos:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(repos))) as pool:
+        return list(pool.map(_fetch, repos))
+
+
+def summarize_languages(language_maps, limit=10):
+    """
+    Aggregate per-repo language byte counts.
+    Returns sorted list: [{"name": "Python", "percentage": 45.2, "bytes": 120000}, ...]
+    """
+    language_bytes = {}
+    for langs in language_maps:
+        for lang, byte_count in (langs or {}).items():
+            language_bytes[lang] = language_bytes.get(lang, 0) + byte_count
 
     total = sum(language_bytes.values()) or 1
     result = [
@@ -132,7 +359,12 @@ def compute_top_languages(repos, access_token=None):
         for lang, count in language_bytes.items()
     ]
     result.sort(key=lambda x: x['bytes'], reverse=True)
-    return result[:10]  # Top 10 languages
+    return result[:limit]
+
+
+def compute_top_languages(repos, access_token=None, max_workers=LANGUAGE_FETCH_WORKERS):
+    """Top 10 languages across `repos`, fetching every repo's breakdown."""
+    return summarize_languages(fetch_languages(repos, access_token, max_workers))
 
 
 def compute_top_repos(repos, limit=6):
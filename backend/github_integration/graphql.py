@@ -0,0 +1,246 @@
+"""
+GitHub GraphQL (v4) fetch path for profile sync.
+One query returns a user's profile fields, their owned public repos with
+per-repo language sizes, and their contribution totals: what the REST
+path needs a user call, repo pages and one /languages call per repo for.
+GraphQL always needs a token, so sync falls back to REST without one.
+Results are mapped to the REST shapes, so sync.py applies them with the
+same helpers.
+iter_profiles() packs many users into one query as aliases (u0: user(...),
+u1: ...) for the bulk refresh, shrinking batches that GitHub rejects.
+Docs: https://docs.github.com/en/graphql
+"""
+import requests
+
+from core import breaker, ratelimit
+
+from . import github
+
+REPOS_PER_PAGE = 100
+LANGUAGES_PER_REPO = 20
+
+# Users per bulk query. GitHub rejects queries over 500,000 nodes and times
+# out heavy ones; each user costs about REPOS_PER_PAGE * (LANGUAGES_PER_REPO + 1)
+# nodes, so batches are also capped at MAX_QUERY_NODES.
+BULK_BATCH_SIZE = 25
+MAX_QUERY_NODES = 100000
+
+USER_FIELDS = """
+    databaseId
+    login
+    avatarUrl
+    url
+    bio
+    company
+    location
+    websiteUrl
+    createdAt
+    followers { totalCount }
+    following { totalCount }
+    gists(privacy: PUBLIC) { totalCount }
+    contributionsCollection { contributionCalendar { totalContributions } }
+"""
+
+REPOS_FIELDS = """
+    repositories(
+        first: $repos, after: $after, ownerAffiliations: OWNER, privacy: PUBLIC,
+        orderBy: {field: PUSHED_AT, direction: DESC}
+    ) {
+        totalCount
+        pageInfo { hasNextPage endCursor }
+        nodes {
+            databaseId
+            name
+            nameWithOwner
+            description
+            url
+            isFork
+            pushedAt
+            updatedAt
+            stargazerCount
+            forkCount
+            owner { login }
+            primaryLanguage { name }
+            languages(first: $languages, orderBy: {field: SIZE, direction: DESC}) {
+                edges { size node { name } }
+            }
+        }
+    }
+"""
+
+PROFILE_QUERY = f"""
+query($login: String!, $repos: Int!, $languages: Int!, $after: String) {{
+    user(login: $login) {{
+        {USER_FIELDS}
+        {REPOS_FIELDS}
+    }}
+}}
+"""
+
+REPOS_QUERY = f"""
+query($login: String!, $repos: Int!, $languages: Int!, $after: String) {{
+    user(login: $login) {{
+        {REPOS_FIELDS}
+    }}
+}}
+"""
+
+
+def user_to_rest(node):
+    """A GraphQL user as the /users/<name> fields apply_user_data reads."""
+    return {
+        'id': node['databaseId'],
+        'login': node['login'],
+        'avatar_url': node['avatarUrl'],
+        'html_url': node['url'],
+        'bio': node.get('bio') or '',
+        'company': node.get('company') or '',
+        'location': node.get('location') or '',
+        'blog': node.get('websiteUrl') or '',
+        'public_repos': node['repositories']['totalCount'],
+        'public_gists': node['gists']['totalCount'],
+        'followers': node['followers']['totalCount'],
+        'following': node['following']['totalCount'],
+        'created_at': node['createdAt'],
+    }
+
+
+def repo_to_rest(node):
+    """A GraphQL repository as a /users/<name>/repos item."""
+    return {
+        'id': node['databaseId'],
+        'name': node['name'],
+        'full_name': node['nameWithOwner'],
+        'description': node.get('description') or '',
+        'html_url': node['url'],
+        'language': (node.get('primaryLanguage') or {}).get('name', ''),
+        'stargazers_count': node['stargazerCount'],
+        'forks_count': node['forkCount'],
+        'fork': node['isFork'],
+        'pushed_at': node.get('pushedAt'),
+        'updated_at': node.get('updatedAt'),
+        'owner': {'login': node['owner']['login']},
+    }
+
+
+def repo_languages(node):
+    """{language: bytes} for a GraphQL repository, as /languages returns it."""
+    return {edge['node']['name']: edge['size'] for edge in node['languages']['edges']}
+
+
+def _complete(user, access_token=None):
+    """The sync result for a user node, fetching repo pages past the first."""
+    variables = {'login': user['login'], 'repos': REPOS_PER_PAGE, 'languages': LANGUAGES_PER_REPO}
+    nodes = list(user['repositories']['nodes'])
+    page_info = user['repositories']['pageInfo']
+    for _ in range(github.REPOS_MAX_PAGES - 1):
+        if not page_info['hasNextPage']:
+            break
+        variables['after'] = page_info['endCursor']
+        page = github.run_graphql(REPOS_QUERY, variables, access_token=access_token)['user']['repositories']
+        nodes.extend(page['nodes'])
+        page_info = page['pageInfo']
+
+    return {
+        'user': user_to_rest(user),
+        'repos': [repo_to_rest(node) for node in nodes],
+        'languages': {node['databaseId']: repo_languages(node) for node in nodes},
+        'total_contributions': user['contributionsCollection']['contributionCalendar']['totalContributions'],
+    }
+
+
+def fetch_profile(username, access_token=None):
+    """
+    Everything a sync needs for `username`, in one round trip (plus one per
+    extra 100 repos, up to github.REPOS_MAX_PAGES pages).
+    Returns {'user', 'repos', 'languages' (repo id -> bytes), 'total_contributions'}.
+    Raises github.GitHubNotFound for an unknown user.
+    """
+    variables = {'login': username, 'repos': REPOS_PER_PAGE, 'languages': LANGUAGES_PER_REPO, 'after': None}
+    user = github.run_graphql(PROFILE_QUERY, variables, access_token=access_token)['user']
+    if user is None:
+        raise github.GitHubNotFound('GitHub user not found')
+    return _complete(user, access_token)
+
+
+def bulk_query(count):
+    """A query fetching `count` users as aliases u0..u<count-1>, logins in $l0..."""
+    logins = ', '.join(f'$l{i}: String!' for i in range(count))
+    users = '\n'.join(f'u{i}: user(login: $l{i}) {{ {USER_FIELDS} {REPOS_FIELDS} }}' for i in range(count))
+    return f"""
+query({logins}, $repos: Int!, $languages: Int!, $after: String) {{
+    rateLimit {{ cost remaining }}
+    {users}
+}}
+"""
+
+
+def batch_size(requested=BULK_BATCH_SIZE):
+    per_user = REPOS_PER_PAGE * (LANGUAGES_PER_REPO + 1) + 1
+    return max(1, min(requested, MAX_QUERY_NODES // per_user))
+
+
+def iter_profiles(logins, size=BULK_BATCH_SIZE, access_token=None):
+    """
+    Sync results for many users, `size` per query, yielded as each query
+    completes as (results, failures, cost): results maps login -> result,
+    or None if GitHub has no such user; failures maps login -> reason; cost
+    is the rate-limit points spent. When GitHub rejects a batch as a whole
+    (node/cost limits, timeouts, 5xx) the batch size is halved for it and
+    every batch after it, down to single users, so one heavy batch doesn't
+    fail again on each later chunk. Rate limiting or an open circuit stops
+    the run; the logins not reached are reported as failures.
+    """
+    size = batch_size(size)
+    start = 0
+
+    while start < len(logins):
+        chunk = logins[start:start + size]
+        variables = {f'l{i}': login for i, login in enumerate(chunk)}
+        variables.update({'repos': REPOS_PER_PAGE, 'languages': LANGUAGES_PER_REPO, 'after': None})
+        try:
+            data, errors = github.run_graphql(bulk_query(len(chunk)), variables,
+                                              access_token=access_token, partial=True)
+        except (ratelimit.RateLimitExceeded, breaker.CircuitOpen) as e:
+            yield {}, {login: str(e) for login in logins[start:]}, 0
+            return
+        except requests.RequestException as e:
+            data, errors = {}, [{'message': str(e)}]
+
+        if not data and errors:
+            # The query failed as a whole: retry with smaller batches, or give up on a lone user
+            if len(chunk) > 1:
+                size = len(chunk) // 2
+                continue
+            start += 1
+            yield {}, {chunk[0]: '; '.join(e.get('message', '') for e in errors)}, 0
+            continue
+
+        start += len(chunk)
+        results, failures = {}, {}
+        alias_errors = {}
+        for error in errors:
+            alias = (error.get('path') or [''])[0]
+            alias_errors.setdefault(alias, error)
+        for i, login in enumerate(chunk):
+            user, error = data.get(f'u{i}'), alias_errors.get(f'u{i}')
+            if user is None and (error is None or error.get('type') == 'NOT_FOUND'):
+                results[login] = None
+            elif user is None:
+                failures[login] = error.get('message', 'GitHub GraphQL error')
+            else:
+                try:
+                    results[login] = _complete(user, access_token)
+                except Exception as e:
+                    failures[login] = str(e)
+        yield results, failures, (data.get('rateLimit') or {}).get('cost', 0)
+
+
+def fetch_profiles(logins, size=BULK_BATCH_SIZE, access_token=None):
+    """iter_profiles() collected into one (results, failures, cost)."""
+    results, failures, cost = {}, {}, 0
+    for batch_results, batch_failures, batch_cost in iter_profiles(logins, size, access_token):
+        results.update(batch_results)
+        failures.update(batch_failures)
+        cost += batch_cost
+    return results, failures, cost
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from github_integration import webhooks
+
+
+class Command(BaseCommand):
+    help = 'Turn queued GitHub webhook deliveries into feed posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process one batch and exit.')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--prune-interval', type=float, default=3600.0,
+                            help='Seconds between deleting processed deliveries past the retention window.')
+
+    def handle(self, *args, **options):
+        last_prune = 0
+        while True:
+            if time.monotonic() - last_prune >= options['prune_interval']:
+                pruned = webhooks.prune()
+                if pruned:
+                    self.stdout.write(f'Pruned {pruned} old delivery(s)')
+                last_prune = time.monotonic()
+
+            deliveries = webhooks.claim(options['batch_size'])
+            if deliveries:
+                posts, failed = webhooks.process(deliveries)
+                for delivery in failed:
+                    if delivery.failed_at is None:
+                        self.stderr.write(f'{delivery} failed (attempt {delivery.attempts}), will retry: {delivery.error}')
+                    else:
+                        self.stderr.write(f'{delivery} failed after {delivery.attempts} attempts, giving up: {delivery.error}')
+                self.stdout.write(f'{len(deliveries)} delivery(s) -> {len(posts)} post(s)')
+
+            if options['once']:
+                break
+            if not deliveries:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from github_integration import github, graphql
+from github_integration.sync import refresh_all_profiles
+
+
+class Command(BaseCommand):
+    help = 'Refresh all linked GitHub profiles with batched GraphQL queries (needs GITHUB_TOKEN).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=graphql.BULK_BATCH_SIZE,
+                            help='Users per GraphQL query (capped to stay under node limits).')
+
+    def handle(self, *args, **options):
+        if not github.has_token():
+            raise CommandError('GITHUB_TOKEN is not set; GraphQL needs a token.')
+
+        started = time.monotonic()
+        updated, failures, renames, cost = refresh_all_profiles(batch_size=options['batch_size'])
+
+        for old, new in sorted(renames.items()):
+            self.stdout.write(f'  renamed: {old} -> {new}')
+        for login, reason in sorted(failures.items()):
+            self.stderr.write(f'  {login}: {reason}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {updated} profile(s), {len(failures)} failed, {len(renames)} renamed, '
+            f'{cost} rate-limit point(s), in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('github_integration', '0003_activity_window'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubprofile',
+            name='events_cursor',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='githubprofile',
+            name='events_etag',
+            field=models.CharField(blank=True, max_length=128),
+        ),
+        migrations.CreateModel(
+            name='GitHubEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=32)),
+                ('type', models.CharField(max_length=50)),
+                ('repo', models.CharField(blank=True, max_length=255)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField()),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='github_integration.githubprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profile', '-created_at'], name='github_event_recent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('profile', 'event_id'), name='unique_github_event')],
+            },
+        ),
+    ]
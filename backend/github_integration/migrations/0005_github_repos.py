@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('github_integration', '0004_event_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GitHubRepo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('github_id', models.BigIntegerField()),
+                ('name', models.CharField(max_length=255)),
+                ('full_name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('html_url', models.URLField()),
+                ('language', models.CharField(blank=True, max_length=100)),
+                ('stargazers_count', models.IntegerField(default=0)),
+                ('forks_count', models.IntegerField(default=0)),
+                ('fork', models.BooleanField(default=False)),
+                ('pushed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+                ('language_bytes', models.JSONField(blank=True, default=dict)),
+                ('languages_pushed_at', models.DateTimeField(blank=True, null=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='repos', to='github_integration.githubprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profile', '-stargazers_count', 'id'], name='github_repo_stars_idx'), models.Index(fields=['profile', '-pushed_at', 'id'], name='github_repo_pushed_idx')],
+                'constraints': [models.UniqueConstraint(fields=('profile', 'github_id'), name='unique_github_repo')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:53
+
+from django.db import migrations, models
+
+
+def mark_synced_profiles(apps, schema_editor):
+    # Profiles with a cursor have had their events fetched; the rest are fetched on their next view
+    GitHubProfile = apps.get_model('github_integration', 'GitHubProfile')
+    GitHubProfile.objects.exclude(events_cursor='').update(events_synced_at=models.F('last_synced'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('github_integration', '0006_webhook_delivery_failures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubprofile',
+            name='events_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_synced_profiles, migrations.RunPython.noop),
+    ]
@@ -38,6 +38,12 @@ class GitHubProfile(models.Model):
     # OAuth token for authenticated API calls (optional, encrypted in production)
     access_token = models.CharField(max_length=255, blank=True)
 
+    # Event cursor: newest GitHubEvent seen and the ETag of the events feed (see sync.sync_events)
+    events_cursor = models.CharField(max_length=32, blank=True)
+    events_etag = models.CharField(max_length=128, blank=True)
+    # Last sync_events run, so an account with no public events isn't re-fetched on every request
+    events_synced_at = models.DateTimeField(null=True, blank=True)
+
     # Sync metadata
     last_synced = models.DateTimeField(auto_now=True)
     github_created_at = models.DateTimeField(null=True, blank=True)
@@ -48,3 +54,132 @@ class GitHubProfile(models.Model):
 
     def __str__(self):
         return f'{self.github_username} ({self.followers} followers, {self.public_repos} repos)'
+
+
+class GitHubRepo(models.Model):
+    """
+    Snapshot of one of a profile's repositories, upserted on every sync.
+    language_bytes is only re-fetched when pushed_at moves past
+    languages_pushed_at, so unchanged repos cost no API calls.
+    """
+    profile = models.ForeignKey(GitHubProfile, on_delete=models.CASCADE, related_name='repos')
+    github_id = models.BigIntegerField()
+    name = models.CharField(max_length=255)
+    full_name = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    html_url = models.URLField()
+    language = models.CharField(max_length=100, blank=True)
+    stargazers_count = models.IntegerField(default=0)
+    forks_count = models.IntegerField(default=0)
+    fork = models.BooleanField(default=False)
+    pushed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    # {"Python": 45000, ...} as of languages_pushed_at
+    language_bytes = models.JSONField(default=dict, blank=True)
+    languages_pushed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'github_id'], name='unique_github_repo'),
+        ]
+        indexes = [
+            models.Index(fields=['profile', '-stargazers_count', 'id'], name='github_repo_stars_idx'),
+            models.Index(fields=['profile', '-pushed_at', 'id'], name='github_repo_pushed_idx'),
+        ]
+
+    def __str__(self):
+        return self.full_name
+
+
+class GitHubEvent(models.Model):
+    """
+    Append-only copy of a user's public GitHub events, filled incrementally
+    from the profile's event cursor. Activity feeds and stats read from here.
+    """
+    profile = models.ForeignKey(GitHubProfile, on_delete=models.CASCADE, related_name='events')
+    event_id = models.CharField(max_length=32)
+    type = models.CharField(max_length=50)
+    repo = models.CharField(max_length=255, blank=True)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'event_id'], name='unique_github_event'),
+        ]
+        indexes = [
+            models.Index(fields=['profile', '-created_at'], name='github_event_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.type} {self.event_id} ({self.profile.github_username})'
+
+    def as_api_event(self):
+        """The event in GitHub's API shape, for github.parse_events_to_activity()."""
+        return {
+            'id': self.event_id,
+            'type': self.type,
+            'repo': {'name': self.repo},
+            'payload': self.payload,
+            'created_at': self.created_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        }
+
+
+class WebhookDelivery(models.Model):
+    """
+    A raw GitHub webhook delivery, stored as received and turned into feed
+    posts by `python manage.py process_github_webhooks`. delivery_id is the
+    X-GitHub-Delivery header, so retries and redeliveries are ignored.
+    """
+    delivery_id = models.CharField(max_length=64, unique=True)
+    event = models.CharField(max_length=50)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    # Set after GITHUB_WEBHOOK_MAX_ATTEMPTS failed runs; kept for inspection, never claimed again
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['processed_at', 'id'], name='webhook_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.event} delivery {self.delivery_id}'
+
+
+class ActivityWindow(models.Model):
+    """
+    The feed post currently collecting a user's webhook activity for one
+    repo and event kind. Deliveries arriving within
+    GITHUB_ACTIVITY_WINDOW_MINUTES of `started_at` are merged into `post`;
+    later ones start a new post. Rows are locked with select_for_update
+    while merging (see github_integration/webhooks.py).
+    """
+    PUSH = 'push'
+    PULL_REQUEST = 'pull_request'
+    KIND_CHOICES = (
+        (PUSH, 'Push'),
+        (PULL_REQUEST, 'Pull request'),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    repo = models.CharField(max_length=255)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    post = models.ForeignKey('feed.Post', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Commits (push) or PR updates (pull_request) merged so far, and the latest few of them
+    count = models.IntegerField(default=0)
+    items = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'repo', 'kind'], name='unique_activity_window'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} window for {self.user} on {self.repo}'
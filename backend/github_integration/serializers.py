@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import GitHubProfile
+from .models import GitHubProfile, GitHubRepo
 
 
 class GitHubProfileSerializer(serializers.ModelSerializer):
@@ -25,6 +25,17 @@ class GitHubProfileSerializer(serializers.ModelSerializer):
         return f'{u.first_name} {u.last_name}'.strip() or u.username
 
 
+class GitHubRepoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GitHubRepo
+        fields = [
+            'github_id', 'name', 'full_name', 'description', 'html_url',
+            'language', 'stargazers_count', 'forks_count', 'fork',
+            'pushed_at', 'updated_at', 'language_bytes',
+        ]
+        read_only_fields = fields
+
+
 class LinkGitHubSerializer(serializers.Serializer):
     username = serializers.CharField(max_length=100, help_text='GitHub username to link')
     access_token = serializers.CharField(
@@ -0,0 +1,368 @@
+"""
+GitHub profile sync.
+Pulls profile, repos, languages and events from the GitHub API and writes
+them onto a GitHubProfile. Runs in the background sync worker; the only
+upstream call made from a web request is a profile's first events fetch.
+With a token, the profile, repos, languages and contribution count come
+from one GraphQL query (graphql.py); without one, from REST.
+Events are read incrementally from a cursor and kept in GitHubEvent.
+Repos are upserted into GitHubRepo; over REST a repo's language breakdown
+is only re-fetched when its pushed_at has moved. The profile's top
+languages, top repos and star total are derived from those rows.
+"""
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import github, graphql
+from .models import GitHubEvent, GitHubProfile, GitHubRepo
+
+EVENT_FIELDS = ['events_cursor', 'events_etag', 'events_synced_at', 'total_commits', 'total_prs', 'total_issues']
+
+# Written by sync_profile and refresh_all_profiles; EVENT_FIELDS are only written by sync_events
+SYNC_FIELDS = [
+    'github_username', 'github_id', 'avatar_url', 'html_url', 'bio', 'company', 'location', 'blog',
+    'public_repos', 'public_gists', 'followers', 'following', 'total_contributions',
+    'total_stars_received', 'top_languages', 'top_repos', 'last_synced',
+]
+
+REPO_FIELDS = [
+    'name', 'full_name', 'description', 'html_url', 'language',
+    'stargazers_count', 'forks_count', 'fork', 'pushed_at', 'updated_at',
+]
+
+# Max /languages calls per sync; the rest are picked up by the next one
+LANGUAGE_REFRESH_LIMIT = 100
+
+
+def apply_user_data(profile, gh_data):
+    """Copy /users/<name> fields onto the profile (without saving)."""
+    profile.github_id = gh_data.get('id', profile.github_id)
+    profile.avatar_url = gh_data.get('avatar_url', profile.avatar_url)
+    profile.html_url = gh_data.get('html_url', profile.html_url)
+    profile.bio = gh_data.get('bio') or ''
+    profile.company = gh_data.get('company') or ''
+    profile.location = gh_data.get('location') or ''
+    profile.blog = gh_data.get('blog') or ''
+    profile.public_repos = gh_data.get('public_repos', profile.public_repos)
+    profile.public_gists = gh_data.get('public_gists', profile.public_gists)
+    profile.followers = gh_data.get('followers', profile.followers)
+    profile.following = gh_data.get('following', profile.following)
+
+
+def sync_events(profile):
+    """
+    Store events newer than the profile's cursor and add the ones not
+    already stored to its commit/PR/issue totals. The first run (no
+    cursor) starts the totals from whatever history GitHub still serves.
+    The profile row is locked while events are stored and the totals are
+    written with F(), so a sync racing the events view can't count an
+    event twice. Writes EVENT_FIELDS and refreshes them on `profile`.
+    """
+    token = profile.access_token or None
+    events, etag = github.fetch_new_events(
+        profile.github_username, since_id=profile.events_cursor, etag=profile.events_etag, access_token=token,
+    )
+    updates = {'events_etag': etag, 'events_synced_at': timezone.now()}
+    with transaction.atomic():
+        current = GitHubProfile.objects.select_for_update().only('events_cursor').get(pk=profile.pk)
+        if events:
+            ids = [str(e['id']) for e in events]
+            stored = set(
+                GitHubEvent.objects.filter(profile=profile, event_id__in=ids).values_list('event_id', flat=True)
+            )
+            new = [e for e in events if str(e['id']) not in stored]
+            GitHubEvent.objects.bulk_create([
+                GitHubEvent(
+                    profile=profile,
+                    event_id=str(e['id']),
+                    type=e.get('type', ''),
+                    repo=e.get('repo', {}).get('name', ''),
+                    payload=e.get('payload', {}),
+                    created_at=parse_datetime(e['created_at']),
+                )
+                for e in new
+            ], ignore_conflicts=True)
+
+            delta = github.count_event_stats(new)
+            if not current.events_cursor:
+                # Totals from before the cursor existed were a sliding window, not a sum
+                updates.update(total_commits=delta['commits'], total_prs=delta['prs'], total_issues=delta['issues'])
+            else:
+                updates.update(
+                    total_commits=F('total_commits') + delta['commits'],
+                    total_prs=F('total_prs') + delta['prs'],
+                    total_issues=F('total_issues') + delta['issues'],
+                )
+            if not current.events_cursor or int(ids[0]) > int(current.events_cursor):
+                updates['events_cursor'] = ids[0]
+        GitHubProfile.objects.filter(pk=profile.pk).update(**updates)
+    profile.refresh_from_db(fields=EVENT_FIELDS)
+    return events
+
+
+def reset_events(profile):
+    """
+    Drop the profile's stored events and start its cursor and totals over,
+    for a profile relinked to another GitHub account. Refreshes
+    EVENT_FIELDS on `profile`.
+    """
+    with transaction.atomic():
+        # Waits out a sync_events still storing the previous account's events
+        GitHubProfile.objects.select_for_update().only('pk').get(pk=profile.pk)
+        GitHubEvent.objects.filter(profile=profile).delete()
+        GitHubProfile.objects.filter(pk=profile.pk).update(
+            events_cursor='', events_etag='', events_synced_at=None, total_commits=0, total_prs=0, total_issues=0,
+        )
+    profile.refresh_from_db(fields=EVENT_FIELDS)
+
+
+def _parse_time(value):
+    return parse_datetime(value) if value else None
+
+
+def apply_repo_data(repo, data):
+    """Copy a /users/<name>/repos item onto a GitHubRepo (without saving)."""
+    repo.name = data['name']
+    repo.full_name = data['full_name']
+    repo.description = data.get('description') or ''
+    repo.html_url = data['html_url']
+    repo.language = data.get('language') or ''
+    repo.stargazers_count = data.get('stargazers_count', 0)
+    repo.forks_count = data.get('forks_count', 0)
+    repo.fork = data.get('fork', False)
+    repo.pushed_at = _parse_time(data.get('pushed_at'))
+    repo.updated_at = _parse_time(data.get('updated_at'))
+
+
+def sync_repos(profile):
+    """Fetch the profile's repos over REST and store them (see store_repos)."""
+    token = profile.access_token or None
+    fetched = github.fetch_all_user_repos(profile.github_username, access_token=token)
+    return store_repos(profile, fetched, access_token=token)
+
+
+def store_repos(profile, fetched, languages=None, access_token=None):
+    """
+    Upsert the profile's repos from REST-shaped `fetched`, delete the ones
+    GitHub no longer returns, and refresh language bytes for repos pushed
+    since their last fetch: from `languages` (repo id -> bytes) when the
+    caller already has them, otherwise over REST (at most
+    LANGUAGE_REFRESH_LIMIT, most recently pushed first).
+    """
+    existing = {repo.github_id: repo for repo in profile.repos.all()}
+
+    new, changed, stale = [], [], []
+    for data in fetched:
+        repo = existing.get(data['id'])
+        if repo is None:
+            repo = GitHubRepo(profile=profile, github_id=data['id'])
+            new.append(repo)
+        else:
+            changed.append(repo)
+        apply_repo_data(repo, data)
+        if repo.pk is None or repo.pushed_at != repo.languages_pushed_at:
+            stale.append((repo, data))
+
+    if languages is not None:
+        refreshed = [languages.get(data['id']) for _, data in stale]
+    else:
+        stale = stale[:LANGUAGE_REFRESH_LIMIT]
+        refreshed = github.fetch_languages([data for _, data in stale], access_token=access_token)
+    for (repo, _), langs in zip(stale, refreshed):
+        # A failed fetch leaves languages_pushed_at behind, so it is retried next sync
+        if langs is not None:
+            repo.language_bytes = langs
+            repo.languages_pushed_at = repo.pushed_at
+
+    with transaction.atomic():
+        profile.repos.exclude(github_id__in=[data['id'] for data in fetched]).delete()
+        GitHubRepo.objects.bulk_create(new)
+        GitHubRepo.objects.bulk_update(
+            changed, REPO_FIELDS + ['language_bytes', 'languages_pushed_at'], batch_size=100,
+        )
+    return len(fetched)
+
+
+def top_languages(profile):
+    return github.summarize_languages(profile.repos.values_list('language_bytes', flat=True))
+
+
+def top_repos(profile, limit=6):
+    """Most-starred non-fork repos in the shape stored on GitHubProfile.top_repos."""
+    return [
+        {
+            'name': repo.name,
+            'full_name': repo.full_name,
+            'description': repo.description,
+            'html_url': repo.html_url,
+            'language': repo.language,
+            'stargazers_count': repo.stargazers_count,
+            'forks_count': repo.forks_count,
+            'updated_at': repo.updated_at.isoformat() if repo.updated_at else '',
+            'fork': repo.fork,
+        }
+        for repo in profile.repos.filter(fork=False).order_by('-stargazers_count', 'id')[:limit]
+    ]
+
+
+def apply_repo_stats(profile):
+    """Derive the star total, top languages and top repos from the stored repos (without saving)."""
+    profile.total_stars_received = profile.repos.aggregate(total=Sum('stargazers_count'))['total'] or 0
+    profile.top_languages = top_languages(profile)
+    profile.top_repos = top_repos(profile)
+
+
+def recent_activity(profile, limit=20):
+    """Activity feed items from stored events, newest first."""
+    events = profile.events.order_by('-created_at')[:limit]
+    return github.parse_events_to_activity([e.as_api_event() for e in events], limit=limit)
+
+
+def _sync_graphql(profile, token):
+    """Profile fields, repos, languages and contributions in one GraphQL round trip. Returns the user data."""
+    result = graphql.fetch_profile(profile.github_username, access_token=token)
+    store_repos(profile, result['repos'], languages=result['languages'])
+    profile.total_contributions = result['total_contributions']
+    return result['user']
+
+
+def _sync_rest(profile, token):
+    gh_data = github.fetch_user(profile.github_username, access_token=token)
+
+    # Repos: upserted, languages only for repos pushed since the last sync
+    try:
+        sync_repos(profile)
+    except Exception:
+        pass
+    return gh_data
+
+
+def sync_profile(profile):
+    """Refresh all GitHub stats for a profile. Raises if the user lookup fails."""
+    token = profile.access_token or None
+
+    if github.has_token(token):
+        gh_data = _sync_graphql(profile, token)
+    else:
+        gh_data = _sync_rest(profile, token)
+
+    # Events: only what is new since the last sync
+    try:
+        sync_events(profile)
+    except Exception:
+        pass
+
+    apply_user_data(profile, gh_data)
+    apply_repo_stats(profile)
+    profile.save(update_fields=SYNC_FIELDS)
+    return profile
+
+
+def _find_renamed(profiles, access_token=None):
+    """
+    {new login: old login} for profiles whose login no longer resolves to
+    their github_id, looked up by id. Profiles that can't be resolved are
+    returned in the second dict (old login -> reason).
+    """
+    moved, failures = {}, {}
+    for profile in profiles:
+        if not profile.github_id:
+            failures[profile.github_username] = 'GitHub user not found'
+            continue
+        try:
+            moved[github.fetch_user_by_id(profile.github_id, access_token=access_token)['login']] = \
+                profile.github_username
+        except github.GitHubNotFound:
+            failures[profile.github_username] = 'GitHub account no longer exists'
+        except Exception as e:
+            failures[profile.github_username] = str(e)
+    return moved, failures
+
+
+def _refresh_batch(results, batch_size):
+    """
+    Resolve renames among one GraphQL batch's results and write it: repos,
+    then the profiles with one bulk_update, in one transaction.
+    Returns (updated_count, failures, renames, cost) for the batch.
+    """
+    by_login = {p.github_username: p for p in GitHubProfile.objects.filter(github_username__in=list(results))}
+    failures, renames, cost = {}, {}, 0
+
+    def matches(profile, result):
+        return result is not None and (not profile.github_id or result['user']['id'] == profile.github_id)
+
+    lost = [by_login[login] for login, result in results.items() if not matches(by_login[login], result)]
+    moved, lost_failures = _find_renamed(lost)
+    failures.update(lost_failures)
+    for login in lost_failures:
+        results.pop(login, None)
+
+    if moved:
+        taken = set(
+            GitHubProfile.objects.filter(github_username__in=list(moved))
+            .exclude(github_username__in=list(moved.values()))
+            .values_list('github_username', flat=True)
+        )
+        more, more_failures, cost = graphql.fetch_profiles(
+            [new for new in moved if new not in taken], size=batch_size,
+        )
+        for new, old in moved.items():
+            results.pop(old, None)
+            if new in taken:
+                failures[old] = f'renamed to {new}, which another profile has linked'
+            elif new in more_failures:
+                failures[old] = more_failures[new]
+            elif matches(by_login[old], more.get(new)):
+                results[old] = more[new]
+                renames[old] = new
+            else:
+                failures[old] = f'renamed to {new}, which no longer resolves'
+
+    now = timezone.now()
+    updated = []
+    with transaction.atomic():
+        if renames:
+            # Free the old names first: two profiles may have swapped logins within the batch
+            for old in renames:
+                GitHubProfile.objects.filter(pk=by_login[old].pk).update(github_username=f'~{by_login[old].pk}')
+        for login, result in results.items():
+            profile = by_login[login]
+            store_repos(profile, result['repos'], languages=result['languages'])
+            apply_user_data(profile, result['user'])
+            profile.github_username = result['user']['login']
+            profile.total_contributions = result['total_contributions']
+            apply_repo_stats(profile)
+            profile.last_synced = now  # auto_now is not applied by bulk_update
+            updated.append(profile)
+        GitHubProfile.objects.bulk_update(updated, SYNC_FIELDS)
+    return len(updated), failures, renames, cost
+
+
+def refresh_all_profiles(batch_size=graphql.BULK_BATCH_SIZE):
+    """
+    Refresh every linked GitHubProfile with batched GraphQL queries (many
+    users per query, see graphql.iter_profiles). Each batch is written in
+    its own transaction as soon as it is fetched, so a run that dies part
+    way keeps what it finished and only one batch is held in memory.
+    Accounts are matched on github_id: a login that is gone or now belongs
+    to someone else is looked up by id and refreshed under its new name.
+    Users that fail are reported, not fatal. Events are left to the
+    per-user sync. Needs a GitHub token (GITHUB_TOKEN).
+    Returns (updated_count, failures, renames, cost): failures maps login
+    -> reason, renames maps old login -> new login, cost is the GraphQL
+    rate-limit points spent.
+    """
+    logins = list(GitHubProfile.objects.order_by('pk').values_list('github_username', flat=True))
+    updated, failures, renames, cost = 0, {}, {}, 0
+    for results, batch_failures, batch_cost in graphql.iter_profiles(logins, size=batch_size):
+        failures.update(batch_failures)
+        cost += batch_cost
+        if results:
+            batch_updated, batch_failures, batch_renames, batch_cost = _refresh_batch(results, batch_size)
+            updated += batch_updated
+            failures.update(batch_failures)
+            renames.update(batch_renames)
+            cost += batch_cost
+    return updated, failures, renames, cost
@@ -0,0 +1,836 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from itertools import count
+from unittest import mock
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from requests.adapters import BaseAdapter
+from rest_framework.test import APIClient
+
+from core import breaker, http, ratelimit
+from feed.models import Post
+from github_integration import github, graphql, sync, webhooks
+from github_integration.models import ActivityWindow, GitHubEvent, GitHubProfile, GitHubRepo, WebhookDelivery
+from sync.models import SyncJob
+from users.models import User
+
+
+class FakeGitHub(BaseAdapter):
+    """
+    Transport for the 'github' client answering from `routes`: path ->
+    (status, body, headers), or a callable taking the PreparedRequest and
+    returning one. Unrouted paths are 404s. Sent requests are kept in
+    `sent`.
+    """
+
+    def __init__(self, routes=None):
+        super().__init__()
+        self.routes = routes or {}
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.sent.append(request)
+        route = self.routes.get(urlsplit(request.url).path, (404, {'message': 'Not Found'}, {}))
+        status, body, headers = route(request) if callable(route) else route
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.headers.update(headers)
+        response.request, response.url = request, request.url
+        return response
+
+    def close(self):
+        pass
+
+
+class GitHubTestCase(TestCase):
+    """Runs against FakeGitHub with fresh budgets, breaker and response cache, and no server token."""
+
+    def setUp(self):
+        self.github = FakeGitHub()
+        http.configure('github', transport=self.github)
+        self.addCleanup(http.reset, 'github')
+        for module in (ratelimit, breaker):
+            module.reset()
+            self.addCleanup(module.reset)
+        caches[settings.GITHUB_RESPONSE_CACHE].clear()
+        patcher = mock.patch.dict(os.environ, {'GITHUB_TOKEN': ''})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+ids = count(1)
+
+
+def repo(name, owner='ada', **fields):
+    return {'id': next(ids), 'name': name, 'full_name': f'{owner}/{name}',
+            'owner': {'login': owner}, 'html_url': f'https://github.com/{owner}/{name}', **fields}
+
+
+class LanguageFetchTests(GitHubTestCase):
+    def test_every_repo_is_fetched_concurrently_in_order(self):
+        in_flight, peak, lock = 0, 0, threading.Lock()
+
+        def languages(n):
+            def respond(request):
+                nonlocal in_flight, peak
+                with lock:
+                    in_flight += 1
+                    peak = max(peak, in_flight)
+                time.sleep(0.05)
+                with lock:
+                    in_flight -= 1
+                return 200, {'Python': n * 100, 'Go': 50}, {}
+            return respond
+
+        repos = [repo(f'r{n}') for n in range(20)]
+        self.github.routes = {f'/repos/ada/r{n}/languages': languages(n) for n in range(20)}
+
+        with mock.patch.object(ratelimit.Budget, 'acquire'):
+            maps = github.fetch_languages(repos, max_workers=4)
+
+        self.assertEqual([m['Python'] for m in maps], [n * 100 for n in range(20)])
+        self.assertEqual(peak, 4)
+
+    def test_failed_repos_are_skipped(self):
+        self.github.routes = {
+            '/repos/ada/good/languages': (200, {'Python': 300, 'Go': 100}, {}),
+            '/repos/ada/broken/languages': (500, {}, {}),
+        }
+        http.configure('github', max_retries=0)
+
+        maps = github.fetch_languages([repo('good'), repo('gone'), repo('broken')])
+
+        self.assertEqual(maps, [{'Python': 300, 'Go': 100}, None, None])
+        self.assertEqual(github.summarize_languages(maps), [
+            {'name': 'Python', 'percentage': 75.0, 'bytes': 300},
+            {'name': 'Go', 'percentage': 25.0, 'bytes': 100},
+        ])
+
+    def test_calls_are_paced_by_the_tokens_budget(self):
+        self.github.routes = {f'/repos/ada/r{n}/languages': (200, {'C': 1}, {}) for n in range(3)}
+
+        with mock.patch.object(ratelimit.Budget, 'acquire', autospec=True) as acquire:
+            github.fetch_languages([repo(f'r{n}') for n in range(3)], access_token='user-token')
+
+        budgets = {call.args[0] for call in acquire.call_args_list}
+        self.assertEqual(acquire.call_count, 3)
+        self.assertEqual([b.label for b in budgets], [f'user:{github._token_identity("user-token")[:8]}'])
+
+
+class ResponseCacheTests(GitHubTestCase):
+    def conditional(self, body, etag='"v1"'):
+        def respond(request):
+            if request.headers.get('If-None-Match') == etag:
+                return 304, {}, {'ETag': etag}
+            return 200, body, {'ETag': etag, 'Last-Modified': 'Mon, 05 Oct 2026 10:00:00 GMT'}
+        return respond
+
+    def test_unchanged_response_is_served_from_the_cache(self):
+        self.github.routes = {'/users/ada': self.conditional({'login': 'ada', 'followers': 3})}
+
+        first = github.fetch_user('ada')
+        second = github.fetch_user('ada')
+
+        self.assertEqual(first, second)
+        self.assertEqual(second['followers'], 3)
+        revalidation = self.github.sent[1].headers
+        self.assertEqual(revalidation['If-None-Match'], '"v1"')
+        self.assertEqual(revalidation['If-Modified-Since'], 'Mon, 05 Oct 2026 10:00:00 GMT')
+
+    def test_changed_response_replaces_the_cached_body(self):
+        self.github.routes = {'/users/ada': self.conditional({'followers': 3})}
+        github.fetch_user('ada')
+        self.github.routes = {'/users/ada': self.conditional({'followers': 4}, etag='"v2"')}
+
+        self.assertEqual(github.fetch_user('ada')['followers'], 4)
+        self.assertEqual(github.fetch_user('ada')['followers'], 4)
+        self.assertEqual(self.github.sent[-1].headers['If-None-Match'], '"v2"')
+
+    def test_cache_is_keyed_by_params_and_token(self):
+        self.github.routes = {'/users/ada/repos': self.conditional([])}
+
+        github.fetch_user_repos('ada', page=1)
+        github.fetch_user_repos('ada', page=2)
+        github.fetch_user_repos('ada', page=1, access_token='user-token')
+
+        self.assertTrue(all('If-None-Match' not in r.headers for r in self.github.sent))
+
+    def test_responses_without_validators_are_not_cached(self):
+        self.github.routes = {'/users/ada': (200, {'login': 'ada'}, {})}
+
+        github.fetch_user('ada')
+        github.fetch_user('ada')
+
+        self.assertNotIn('If-None-Match', self.github.sent[1].headers)
+
+
+def github_user(login, github_id, **fields):
+    return {'login': login, 'id': github_id, 'avatar_url': f'https://avatars.example/{login}',
+            'html_url': f'https://github.com/{login}', 'public_repos': 2, 'followers': 5, **fields}
+
+
+def push_event(event_id, commits=1, repo='ada/engine'):
+    return {'id': str(event_id), 'type': 'PushEvent', 'repo': {'name': repo},
+            'payload': {'commits': [{'message': f'Commit {n}'} for n in range(commits)]},
+            'created_at': f'2026-10-0{event_id % 9 + 1}T10:00:00Z'}
+
+
+class PublicProfileTests(GitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient(SERVER_NAME='localhost')
+
+    def profile_fetches(self, login):
+        return [r for r in self.github.sent if urlsplit(r.url).path == f'/users/{login}']
+
+    def test_repeat_views_share_one_upstream_fetch(self):
+        self.github.routes = {
+            '/users/ada': (200, github_user('ada', 1, bio='Compilers'), {}),
+            '/users/ada/repos': (200, [repo('engine', stargazers_count=5)], {}),
+        }
+
+        first = self.client.get('/api/github/user/ada/')
+        second = self.client.get('/api/github/user/ADA/')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual([r['name'] for r in first.data['top_repos']], ['engine'])
+        self.assertEqual(len(self.profile_fetches('ada')), 1)
+
+    def test_unknown_users_are_cached(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/github/user/nobody/').status_code, 404)
+
+        self.assertEqual(len(self.profile_fetches('nobody')), 1)
+
+    def test_failed_repos_fetch_is_not_cached(self):
+        http.configure('github', max_retries=0)
+        self.github.routes = {
+            '/users/ada': (200, github_user('ada', 1), {}),
+            '/users/ada/repos': (500, {}, {}),
+        }
+        self.assertEqual(self.client.get('/api/github/user/ada/').status_code, 502)
+
+        self.github.routes['/users/ada/repos'] = (200, [repo('engine')], {})
+        response = self.client.get('/api/github/user/ada/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['top_repos']), 1)
+
+
+class CircuitBreakerTests(GitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        http.configure('github', max_retries=0)
+        self.github.routes = {'/users/ada': (500, {}, {})}
+        self.client = APIClient(SERVER_NAME='localhost')
+
+    def test_open_circuit_fails_fast_without_calling_github(self):
+        self.github.routes = {f'/users/ada-{n}': (500, {}, {}) for n in range(10)}
+        for n in range(10):
+            self.assertEqual(self.client.get(f'/api/github/user/ada-{n}/').status_code, 502)
+        sent = len(self.github.sent)
+
+        response = self.client.get('/api/github/user/ada/')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(len(self.github.sent), sent)
+        self.assertTrue(github.is_unavailable())
+
+    def test_stored_data_is_served_marked_stale(self):
+        user = User.objects.create(username='ada')
+        GitHubProfile.objects.create(user=user, github_username='ada', events_synced_at='2026-10-01T00:00:00Z')
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        for _ in range(10):
+            self.client.get('/api/github/user/ada/')
+
+        repos = client.get('/api/github/repos/')
+        events = client.get('/api/github/events/')
+
+        self.assertEqual((repos.status_code, repos.data['stale']), (200, True))
+        self.assertEqual((events.status_code, events.data['stale']), (200, True))
+
+
+class LinkGitHubTests(GitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='ada')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+    def link(self, login, **fields):
+        self.github.routes[f'/users/{login}'] = (200, github_user(login, next(ids), **fields), {})
+        return self.client.post('/api/github/link/', {'username': login}, format='json')
+
+    def test_link_stores_the_account_and_queues_a_sync(self):
+        response = self.link('ada-gh', bio='Compilers', blog='https://ada.dev')
+
+        self.assertEqual(response.status_code, 201)
+        profile = GitHubProfile.objects.get(user=self.user)
+        self.assertEqual((profile.github_username, profile.bio, profile.followers), ('ada-gh', 'Compilers', 5))
+        self.assertEqual(response.data['sync_job']['status'], SyncJob.QUEUED)
+
+    def test_relink_replaces_the_previous_accounts_details(self):
+        self.link('ada-gh', bio='Compilers', company='Analytical', location='London', blog='https://ada.dev')
+
+        response = self.link('ada-alt', bio=None, company=None)
+
+        self.assertEqual(response.status_code, 200)
+        profile = GitHubProfile.objects.get(user=self.user)
+        self.assertEqual(profile.github_username, 'ada-alt')
+        self.assertEqual((profile.bio, profile.company, profile.location, profile.blog), ('', '', '', ''))
+
+    def test_relinking_another_account_starts_events_over(self):
+        self.link('ada-gh')
+        self.github.routes['/users/ada-gh/events/public'] = (200, [push_event(7, commits=3)], {'ETag': '"e1"'})
+        self.assertEqual(len(self.client.get('/api/github/events/').data['activities']), 1)
+
+        self.link('ada-alt')
+
+        profile = GitHubProfile.objects.get(user=self.user)
+        self.assertEqual((profile.events_cursor, profile.events_etag, profile.events_synced_at), ('', '', None))
+        self.assertEqual((profile.total_commits, profile.total_prs, profile.total_issues), (0, 0, 0))
+        self.assertFalse(GitHubEvent.objects.exists())
+        self.github.routes['/users/ada-alt/events/public'] = (200, [push_event(3, commits=1)], {})
+        self.client.get('/api/github/events/')
+        profile.refresh_from_db()
+        self.assertEqual((profile.events_cursor, profile.total_commits), ('3', 1))
+
+    def test_relinking_the_same_account_keeps_events(self):
+        self.github.routes['/users/ada-gh'] = (200, github_user('ada-gh', 42), {})
+        self.github.routes['/users/ada-gh/events/public'] = (200, [push_event(7, commits=3)], {})
+        self.client.post('/api/github/link/', {'username': 'ada-gh'}, format='json')
+        self.client.get('/api/github/events/')
+
+        self.client.post('/api/github/link/', {'username': 'ada-gh'}, format='json')
+
+        self.assertEqual(GitHubProfile.objects.get(user=self.user).total_commits, 3)
+        self.assertEqual(GitHubEvent.objects.count(), 1)
+
+    def test_unknown_user_is_rejected(self):
+        response = self.client.post('/api/github/link/', {'username': 'nobody'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GitHubProfile.objects.exists())
+
+
+class EventSyncTests(GitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='ada')
+        self.profile = GitHubProfile.objects.create(user=self.user, github_username='ada')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+    def event_requests(self):
+        return [r for r in self.github.sent if r.path_url.startswith('/users/ada/events/public')]
+
+    def test_only_events_past_the_cursor_are_counted(self):
+        self.github.routes['/users/ada/events/public'] = (200, [push_event(2, commits=2), push_event(1)], {})
+        sync.sync_events(self.profile)
+        self.github.routes['/users/ada/events/public'] = (
+            200, [push_event(4, commits=5), push_event(3), push_event(2, commits=2)], {},
+        )
+
+        new = sync.sync_events(self.profile)
+
+        self.assertEqual([e['id'] for e in new], ['4', '3'])
+        self.assertEqual((self.profile.events_cursor, self.profile.total_commits), ('4', 9))
+        self.assertEqual(GitHubEvent.objects.count(), 4)
+
+    def test_unchanged_feed_is_revalidated_with_its_etag(self):
+        def respond(request):
+            if request.headers.get('If-None-Match') == '"e1"':
+                return 304, {}, {}
+            return 200, [push_event(1)], {'ETag': '"e1"'}
+        self.github.routes['/users/ada/events/public'] = respond
+
+        sync.sync_events(self.profile)
+        self.assertEqual(sync.sync_events(self.profile), [])
+
+        self.assertEqual(self.profile.events_etag, '"e1"')
+        self.assertEqual(self.profile.total_commits, 1)
+
+    def test_view_fetches_only_until_the_first_sync(self):
+        self.github.routes['/users/ada/events/public'] = (200, [], {})
+
+        for _ in range(3):
+            response = self.client.get('/api/github/events/')
+            self.assertEqual(response.data['activities'], [])
+
+        self.assertEqual(len(self.event_requests()), 1)
+        self.profile.refresh_from_db()
+        self.assertIsNotNone(self.profile.events_synced_at)
+
+    def test_failed_first_fetch_is_retried_on_the_next_request(self):
+        self.github.routes['/users/ada/events/public'] = (500, {}, {})
+        http.configure('github', max_retries=0)
+        self.assertEqual(self.client.get('/api/github/events/').status_code, 502)
+
+        self.github.routes['/users/ada/events/public'] = (200, [push_event(1)], {})
+        response = self.client.get('/api/github/events/')
+
+        self.assertEqual(len(response.data['activities']), 1)
+        self.assertEqual(len(self.event_requests()), 2)
+
+class RepoSnapshotTests(GitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='ada')
+        self.profile = GitHubProfile.objects.create(user=self.user, github_username='ada')
+        self.repos = {
+            'engine': repo('engine', pushed_at='2026-10-01T10:00:00Z', stargazers_count=10, language='Rust'),
+            'site': repo('site', pushed_at='2026-09-01T10:00:00Z', stargazers_count=3, language='HTML'),
+            'fork': repo('fork', pushed_at='2026-08-01T10:00:00Z', stargazers_count=50, fork=True),
+        }
+        self.github.routes = {
+            '/users/ada/repos': lambda request: (200, list(self.repos.values()), {}),
+            '/repos/ada/engine/languages': (200, {'Rust': 300}, {}),
+            '/repos/ada/site/languages': (200, {'HTML': 100}, {}),
+            '/repos/ada/fork/languages': (200, {'C': 100}, {}),
+        }
+
+    def language_fetches(self):
+        return sorted(urlsplit(r.url).path.split('/')[3] for r in self.github.sent if r.url.endswith('/languages'))
+
+    def test_languages_are_refetched_only_for_pushed_repos(self):
+        sync.sync_repos(self.profile)
+        self.assertEqual(self.language_fetches(), ['engine', 'fork', 'site'])
+
+        self.github.sent.clear()
+        self.repos['site']['pushed_at'] = '2026-10-02T10:00:00Z'
+        self.github.routes['/repos/ada/site/languages'] = (200, {'HTML': 100, 'CSS': 50}, {})
+        sync.sync_repos(self.profile)
+
+        self.assertEqual(self.language_fetches(), ['site'])
+        self.assertEqual(GitHubRepo.objects.get(name='site').language_bytes, {'HTML': 100, 'CSS': 50})
+
+    def test_failed_language_fetch_is_retried_next_sync(self):
+        self.github.routes['/repos/ada/site/languages'] = (404, {}, {})
+        sync.sync_repos(self.profile)
+        self.github.routes['/repos/ada/site/languages'] = (200, {'HTML': 100}, {})
+        self.github.sent.clear()
+
+        sync.sync_repos(self.profile)
+
+        self.assertEqual(self.language_fetches(), ['site'])
+        self.assertEqual(GitHubRepo.objects.get(name='site').language_bytes, {'HTML': 100})
+
+    def test_language_fetches_are_capped_per_sync(self):
+        with mock.patch.object(sync, 'LANGUAGE_REFRESH_LIMIT', 2):
+            sync.sync_repos(self.profile)
+            self.assertEqual(self.language_fetches(), ['engine', 'site'])  # most recently pushed first
+            sync.sync_repos(self.profile)
+
+        self.assertEqual(self.language_fetches(), ['engine', 'fork', 'site'])
+
+    def test_repos_gone_from_github_are_deleted(self):
+        sync.sync_repos(self.profile)
+        del self.repos['site']
+        self.repos['engine']['stargazers_count'] = 11
+
+        sync.sync_repos(self.profile)
+
+        stars = dict(GitHubRepo.objects.values_list('name', 'stargazers_count'))
+        self.assertEqual(stars, {'engine': 11, 'fork': 50})
+
+    def test_profile_stats_come_from_the_stored_repos(self):
+        sync.sync_repos(self.profile)
+
+        sync.apply_repo_stats(self.profile)
+
+        self.assertEqual(self.profile.total_stars_received, 63)
+        self.assertEqual([r['name'] for r in self.profile.top_repos], ['engine', 'site'])
+        self.assertEqual([lang['name'] for lang in self.profile.top_languages], ['Rust', 'HTML', 'C'])
+
+    def test_repos_are_listed_without_calling_github(self):
+        sync.sync_repos(self.profile)
+        self.github.sent.clear()
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(self.user)
+
+        by_stars = client.get('/api/github/repos/')
+        by_name = client.get('/api/github/repos/', {'ordering': 'name'})
+
+        self.assertEqual([r['name'] for r in by_stars.data['results']], ['fork', 'engine', 'site'])
+        self.assertEqual([r['name'] for r in by_name.data['results']], ['engine', 'fork', 'site'])
+        self.assertFalse(by_stars.data['stale'])
+        self.assertEqual(self.github.sent, [])
+
+    def test_repos_need_a_linked_profile(self):
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(User.objects.create(username='unlinked'))
+
+        self.assertEqual(client.get('/api/github/repos/').status_code, 404)
+
+
+def gql_repo(name, owner='ada', languages=(), **fields):
+    return {
+        'databaseId': next(ids), 'name': name, 'nameWithOwner': f'{owner}/{name}', 'description': None,
+        'url': f'https://github.com/{owner}/{name}', 'isFork': False, 'pushedAt': '2026-10-01T10:00:00Z',
+        'updatedAt': '2026-10-01T10:00:00Z', 'stargazerCount': 0, 'forkCount': 0, 'owner': {'login': owner},
+        'primaryLanguage': {'name': languages[0][0]} if languages else None,
+        'languages': {'edges': [{'size': size, 'node': {'name': lang}} for lang, size in languages]},
+        **fields,
+    }
+
+
+def gql_user(login, github_id, repos=(), end_cursor=None, contributions=120):
+    return {
+        'databaseId': github_id, 'login': login, 'avatarUrl': f'https://avatars.example/{login}',
+        'url': f'https://github.com/{login}', 'bio': 'Compilers', 'company': None, 'location': 'London',
+        'websiteUrl': '', 'createdAt': '2015-01-01T00:00:00Z',
+        'followers': {'totalCount': 5}, 'following': {'totalCount': 2}, 'gists': {'totalCount': 1},
+        'contributionsCollection': {'contributionCalendar': {'totalContributions': contributions}},
+        'repositories': {
+            'totalCount': len(repos), 'nodes': list(repos),
+            'pageInfo': {'hasNextPage': end_cursor is not None, 'endCursor': end_cursor},
+        },
+    }
+
+
+class GraphQLSyncTests(GitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.profile = GitHubProfile.objects.create(user=User.objects.create(username='ada'), github_username='ada',
+                                                    access_token='user-token')
+        self.users = {}
+        self.github.routes = {'/graphql': self.answer, '/users/ada/events/public': (200, [], {})}
+
+    def answer(self, request):
+        body = json.loads(request.body)
+        login, after = body['variables']['login'], body['variables'].get('after')
+        user = self.users.get((login, after))
+        return 200, {'data': {'user': user}, 'errors': [] if user else [{'type': 'NOT_FOUND'}]}, {}
+
+    def graphql_calls(self):
+        return [json.loads(r.body)['variables'] for r in self.github.sent if r.url.endswith('/graphql')]
+
+    def test_sync_reads_profile_repos_and_languages_in_one_query(self):
+        self.users[('ada', None)] = gql_user('ada', 42, [
+            gql_repo('engine', languages=[('Rust', 300), ('C', 100)], stargazerCount=7),
+            gql_repo('site', languages=[('HTML', 100)], stargazerCount=1),
+        ])
+
+        sync.sync_profile(self.profile)
+
+        self.assertEqual(len(self.graphql_calls()), 1)
+        self.assertFalse([r for r in self.github.sent if '/repos' in r.url or r.url.endswith('/users/ada')])
+        self.assertEqual(self.github.sent[0].headers['Authorization'], 'Bearer user-token')
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.github_id, self.profile.bio, self.profile.company), (42, 'Compilers', ''))
+        self.assertEqual((self.profile.total_contributions, self.profile.total_stars_received), (120, 8))
+        self.assertEqual([lang['name'] for lang in self.profile.top_languages], ['Rust', 'C', 'HTML'])
+        self.assertEqual(GitHubRepo.objects.get(name='engine').language_bytes, {'Rust': 300, 'C': 100})
+
+    def test_further_repo_pages_are_followed(self):
+        self.users[('ada', None)] = gql_user('ada', 42, [gql_repo('engine')], end_cursor='c1')
+        self.users[('ada', 'c1')] = gql_user('ada', 42, [gql_repo('site')])
+
+        result = graphql.fetch_profile('ada', access_token='user-token')
+
+        self.assertEqual([r['name'] for r in result['repos']], ['engine', 'site'])
+        self.assertEqual([call.get('after') for call in self.graphql_calls()], [None, 'c1'])
+
+    def test_unknown_user_raises_not_found(self):
+        with self.assertRaises(github.GitHubNotFound):
+            graphql.fetch_profile('ada', access_token='user-token')
+
+    def test_without_a_token_sync_uses_rest(self):
+        self.profile.access_token = ''
+        self.github.routes.update({
+            '/users/ada': (200, github_user('ada', 42), {}),
+            '/users/ada/repos': (200, [], {}),
+        })
+
+        sync.sync_profile(self.profile)
+
+        self.assertEqual(self.graphql_calls(), [])
+        self.assertEqual(GitHubProfile.objects.get().github_id, 42)
+
+
+class BulkRefreshTests(GitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict(os.environ, {'GITHUB_TOKEN': 'server-token'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.users = {}
+        self.reject_over = None
+        self.github.routes = {'/graphql': self.answer}
+
+    def link(self, login, github_id):
+        self.users[login] = gql_user(login, github_id, [gql_repo(f'{login}-repo', owner=login, stargazerCount=3)])
+        user = User.objects.create(username=f'user-{login}')
+        return GitHubProfile.objects.create(user=user, github_username=login, github_id=github_id)
+
+    def answer(self, request):
+        variables = json.loads(request.body)['variables']
+        logins = [variables[f'l{i}'] for i in range(len(variables)) if f'l{i}' in variables]
+        if self.reject_over and len(logins) > self.reject_over:
+            return 200, {'data': None, 'errors': [{'message': 'Query has too many nodes'}]}, {}
+        data, errors = {'rateLimit': {'cost': 1, 'remaining': 4999}}, []
+        for i, login in enumerate(logins):
+            data[f'u{i}'] = self.users.get(login)
+            if data[f'u{i}'] is None:
+                errors.append({'type': 'NOT_FOUND', 'path': [f'u{i}'], 'message': f'Could not resolve {login}'})
+        return 200, {'data': data, 'errors': errors}, {}
+
+    def batches(self):
+        return [sum(1 for key in json.loads(r.body)['variables'] if key[1:].isdigit())
+                for r in self.github.sent if r.url.endswith('/graphql')]
+
+    def test_profiles_are_refreshed_in_batches(self):
+        for n in range(5):
+            self.link(f'dev{n}', 100 + n)
+
+        with CaptureQueriesContext(connection) as queries:
+            updated, failures, renames, cost = sync.refresh_all_profiles(batch_size=2)
+
+        self.assertEqual((updated, failures, renames, cost), (5, {}, {}, 3))
+        self.assertEqual(self.batches(), [2, 2, 1])
+        self.assertEqual(sum('UPDATE "github_integration_githubprofile"' in q['sql'] for q in queries), 3)
+        profile = GitHubProfile.objects.get(github_username='dev3')
+        self.assertEqual((profile.total_contributions, profile.total_stars_received, profile.bio),
+                         (120, 3, 'Compilers'))
+        self.assertEqual(GitHubRepo.objects.count(), 5)
+
+    def test_rejected_batches_are_halved(self):
+        for n in range(5):
+            self.link(f'dev{n}', 100 + n)
+        self.reject_over = 2
+
+        updated, failures, _, _ = sync.refresh_all_profiles(batch_size=4)
+
+        self.assertEqual((updated, failures), (5, {}))
+        self.assertEqual(self.batches(), [4, 2, 2, 1])
+
+    def test_renamed_accounts_are_found_by_id(self):
+        self.link('ada', 42)
+        self.users['ada-new'] = self.users.pop('ada')
+        self.users['ada-new']['login'] = 'ada-new'
+        self.github.routes['/user/42'] = (200, github_user('ada-new', 42), {})
+
+        updated, failures, renames, _ = sync.refresh_all_profiles()
+
+        self.assertEqual((updated, failures, renames), (1, {}, {'ada': 'ada-new'}))
+        self.assertEqual(GitHubProfile.objects.get().github_username, 'ada-new')
+
+    def test_deleted_accounts_are_reported(self):
+        self.link('ada', 42)
+        self.link('grace', 43)
+        del self.users['ada']
+
+        updated, failures, _, _ = sync.refresh_all_profiles()
+
+        self.assertEqual((updated, failures), (1, {'ada': 'GitHub account no longer exists'}))
+
+    def test_open_circuit_stops_the_run_and_reports_the_rest(self):
+        for n in range(3):
+            self.link(f'dev{n}', 100 + n)
+
+        with mock.patch.object(github, 'run_graphql', side_effect=breaker.CircuitOpen('github', 30)):
+            updated, failures, _, _ = sync.refresh_all_profiles()
+
+        self.assertEqual(updated, 0)
+        self.assertEqual(set(failures), {'dev0', 'dev1', 'dev2'})
+
+    def test_command_needs_a_server_token(self):
+        with mock.patch.dict(os.environ, {'GITHUB_TOKEN': ''}), self.assertRaises(CommandError):
+            call_command('refresh_github_profiles')
+
+
+def push(*messages, sender='ada', repo='ada/engine'):
+    return {
+        'sender': {'login': sender},
+        'repository': {'full_name': repo},
+        'commits': [{'message': message} for message in messages],
+    }
+
+
+def pull_request(title, action='opened', sender='ada', repo='ada/engine'):
+    return {
+        'action': action,
+        'sender': {'login': sender},
+        'repository': {'full_name': repo},
+        'pull_request': {'title': title, 'merged': False},
+    }
+
+
+class WebhookQueueTests(TestCase):
+    def setUp(self):
+        GitHubProfile.objects.create(user=User.objects.create(username='ada'), github_username='ada')
+        self.client = APIClient(SERVER_NAME='localhost')
+
+    def send(self, payload, delivery='d1', event='push', secret='s3cret'):
+        body = json.dumps(payload).encode()
+        signature = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return self.client.post('/api/github/webhook/', body, content_type='application/json',
+                                HTTP_X_GITHUB_EVENT=event, HTTP_X_GITHUB_DELIVERY=delivery,
+                                HTTP_X_HUB_SIGNATURE_256=signature)
+
+    @override_settings(GITHUB_WEBHOOK_SECRET='s3cret')
+    def test_view_stores_signed_deliveries_once(self):
+        self.assertEqual(self.send(push('Add parser')).status_code, 202)
+        self.assertEqual(self.send(push('Add parser')).data, {'status': 'duplicate'})
+        self.assertEqual(self.send(push('Add parser'), delivery='d2', secret='wrong').status_code, 403)
+        self.assertEqual(self.send({}, delivery='d3', event='star').data, {'status': 'ignored'})
+
+        self.assertEqual(list(WebhookDelivery.objects.values_list('delivery_id', flat=True)), ['d1'])
+        self.assertFalse(Post.objects.exists())
+
+    def test_bad_payload_does_not_hold_back_the_batch(self):
+        webhooks.record('a', 'push', push('Add parser'))
+        webhooks.record('b', 'push', {**push('Fix lexer'), 'sender': None})
+        webhooks.record('c', 'push', push('Add tests'))
+
+        posts, failed = webhooks.process(webhooks.claim())
+
+        self.assertEqual([d.delivery_id for d in failed], ['b'])
+        self.assertEqual([p.content for p in posts], ['Pushed 2 commits to ada/engine'])
+        bad = WebhookDelivery.objects.get(delivery_id='b')
+        self.assertIsNone(bad.processed_at)
+        self.assertIn("'NoneType'", bad.error)
+
+    def test_a_failed_merge_is_retried_one_delivery_at_a_time(self):
+        webhooks.record('a', 'push', push('Add parser'))
+        webhooks.record('b', 'push', push('Add docs', repo='ada/broken'))
+        render = webhooks.render
+
+        def fragile_render(window):
+            if window.repo == 'ada/broken':
+                raise ValueError('cannot render')
+            return render(window)
+
+        with mock.patch.object(webhooks, 'render', fragile_render):
+            posts, failed = webhooks.process(webhooks.claim())
+
+        self.assertEqual([d.delivery_id for d in failed], ['b'])
+        self.assertEqual([p.content for p in posts], ['Pushed 1 commit to ada/engine'])
+        self.assertEqual(Post.objects.count(), 1)
+        processed = WebhookDelivery.objects.filter(processed_at__isnull=False)
+        self.assertEqual(list(processed.values_list('delivery_id', flat=True)), ['a'])
+
+    @override_settings(GITHUB_WEBHOOK_MAX_ATTEMPTS=2, GITHUB_WEBHOOK_CLAIM_TIMEOUT_SECONDS=-1)
+    def test_delivery_is_given_up_after_max_attempts(self):
+        webhooks.record('bad', 'push', {'sender': None})
+
+        _, [delivery] = webhooks.process(webhooks.claim())
+        self.assertIsNone(delivery.failed_at)
+        _, [delivery] = webhooks.process(webhooks.claim())
+
+        self.assertEqual(webhooks.claim(), [])
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.attempts, 2)
+        self.assertIsNotNone(delivery.failed_at)
+        self.assertEqual(webhooks.prune(older_than=timedelta(0)), 0)
+
+    def test_redelivery_is_ignored(self):
+        self.assertTrue(webhooks.record('same', 'push', push('Add parser')))
+        self.assertFalse(webhooks.record('same', 'push', push('Add parser')))
+
+        self.assertEqual(WebhookDelivery.objects.count(), 1)
+
+    def test_processed_deliveries_are_pruned(self):
+        webhooks.record('a', 'push', push('Add parser'))
+        webhooks.process(webhooks.claim())
+
+        self.assertEqual(webhooks.prune(), 0)
+        self.assertEqual(webhooks.prune(older_than=timedelta(0)), 1)
+
+
+class ActivityWindowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='ada')
+        GitHubProfile.objects.create(user=self.user, github_username='ada')
+
+    def deliver(self, event, payload):
+        self.assertTrue(webhooks.record(f'delivery-{next(ids)}', event, payload))
+        posts, failed = webhooks.process(webhooks.claim())
+        self.assertEqual(failed, [])
+        return posts
+
+    def test_window_defaults_to_an_hour(self):
+        self.assertEqual(settings.GITHUB_ACTIVITY_WINDOW_MINUTES, 60)
+
+    def test_pushes_within_the_window_share_a_post(self):
+        [post] = self.deliver('push', push('Add parser'))
+        self.assertEqual(self.deliver('push', push('Fix lexer', 'Add tests')), [])
+
+        post.refresh_from_db()
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(post.content, 'Pushed 3 commits to ada/engine')
+        self.assertEqual(post.code_snippet, '• Add parser\n• Fix lexer\n• Add tests')
+
+    def test_summary_keeps_the_latest_items(self):
+        self.deliver('push', push(*[f'Commit {i}' for i in range(7)]))
+
+        post = Post.objects.get()
+        self.assertEqual(post.content, 'Pushed 7 commits to ada/engine')
+        self.assertTrue(post.code_snippet.startswith('• Commit 2\n'))
+        self.assertTrue(post.code_snippet.endswith('... and 2 more commits'))
+
+    def test_activity_after_the_window_starts_a_new_post(self):
+        [first] = self.deliver('push', push('Add parser'))
+        ActivityWindow.objects.update(started_at=first.created_at - timedelta(minutes=61))
+
+        [second] = self.deliver('push', push('Fix lexer'))
+
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(second.content, 'Pushed 1 commit to ada/engine')
+        first.refresh_from_db()
+        self.assertEqual(first.content, 'Pushed 1 commit to ada/engine')
+
+    @override_settings(GITHUB_ACTIVITY_WINDOW_MINUTES=0)
+    def test_zero_minute_window_never_merges(self):
+        self.deliver('push', push('Add parser'))
+        self.deliver('push', push('Fix lexer'))
+
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_pushes_and_pull_requests_are_separate(self):
+        self.deliver('push', push('Add parser'))
+        self.deliver('pull_request', pull_request('Parser'))
+        self.deliver('pull_request', pull_request('Parser', action='closed'))
+
+        contents = sorted(Post.objects.values_list('content', flat=True))
+        self.assertEqual(contents, ['2 pull request updates in ada/engine', 'Pushed 1 commit to ada/engine'])
+
+    def test_repos_are_separate(self):
+        self.deliver('push', push('Add parser'))
+        self.deliver('push', push('Add docs', repo='ada/site'))
+
+        self.assertEqual(ActivityWindow.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_batch_is_merged_in_arrival_order(self):
+        webhooks.record('a', 'push', push('Add parser'))
+        webhooks.record('b', 'push', push('Fix lexer'))
+
+        [post], _ = webhooks.process(webhooks.claim())
+
+        self.assertEqual(post.content, 'Pushed 2 commits to ada/engine')
+        self.assertFalse(WebhookDelivery.objects.filter(processed_at__isnull=True).exists())
+
+    def test_unlinked_senders_and_empty_pushes_are_skipped(self):
+        self.assertEqual(self.deliver('push', push('Add parser', sender='mallory')), [])
+        self.assertEqual(self.deliver('push', push()), [])
+
+        self.assertFalse(Post.objects.exists())
@@ -1,23 +1,35 @@
 import hashlib
-import hmac
 import json
 
-from rest_framework import permissions, status
+from rest_framework import filters, generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.conf import settings
+from django.core.cache import caches
 
-from .models import GitHubProfile
-from .serializers import GitHubProfileSerializer, LinkGitHubSerializer
-from . import github
-from feed.models import Post
+from .models import GitHubProfile, GitHubRepo
+from .serializers import GitHubProfileSerializer, GitHubRepoSerializer, LinkGitHubSerializer
+from . import github, sync, webhooks
+from core import breaker, readthrough
+from sync import queue
+from sync.models import SyncJob
+from sync.serializers import SyncJobSerializer
+
+
+def _unavailable(error):
+    """503 for an open circuit: fail fast instead of waiting on GitHub."""
+    return Response(
+        {'error': str(error)},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(int(error.retry_after) + 1)},
+    )
 
 
 class LinkGitHubView(APIView):
     """
     POST /api/github/link/
     Body: { "username": "octocat", "access_token": "" }
-    Links a GitHub account to the current user and syncs stats.
+    Links a GitHub account to the current user and queues a stats sync.
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -30,69 +42,37 @@ class LinkGitHubView(APIView):
         # Verify the GitHub user exists
         try:
             gh_data = github.fetch_user(username, access_token=access_token)
+        except breaker.CircuitOpen as e:
+            return _unavailable(e)
         except Exception as e:
             return Response(
                 {'error': f'Could not find GitHub user "{username}": {str(e)}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Fetch repos for language stats and top repos
-        try:
-            repos = github.fetch_user_repos(username, per_page=30, access_token=access_token)
-        except Exception:
-            repos = []
-
-        top_languages = []
-        if repos:
-            try:
-                top_languages = github.compute_top_languages(repos, access_token=access_token)
-            except Exception:
-                pass
-
-        top_repos = github.compute_top_repos(repos) if repos else []
-
-        # Fetch events for activity stats
-        try:
-            events = github.fetch_user_events(username, access_token=access_token)
-            event_stats = github.count_event_stats(events)
-        except Exception:
-            event_stats = {'commits': 0, 'prs': 0, 'issues': 0}
-
-        # Calculate total stars
-        total_stars = sum(r.get('stargazers_count', 0) for r in repos) if repos else 0
-
         # Parse created_at
         created_at = None
         if gh_data.get('created_at'):
             from django.utils.dateparse import parse_datetime
             created_at = parse_datetime(gh_data['created_at'])
 
-        # Create or update profile
-        profile, created = GitHubProfile.objects.update_or_create(
+        # Create or update profile; repos, languages and events are filled in
+        # by the background sync job queued below.
+        profile, created = GitHubProfile.objects.get_or_create(
             user=request.user,
-            defaults={
-                'github_username': gh_data.get('login', username),
-                'github_id': gh_data.get('id'),
-                'avatar_url': gh_data.get('avatar_url', ''),
-                'html_url': gh_data.get('html_url', ''),
-                'bio': gh_data.get('bio', '') or '',
-                'company': gh_data.get('company', '') or '',
-                'location': gh_data.get('location', '') or '',
-                'blog': gh_data.get('blog', '') or '',
-                'public_repos': gh_data.get('public_repos', 0),
-                'public_gists': gh_data.get('public_gists', 0),
-                'followers': gh_data.get('followers', 0),
-                'following': gh_data.get('following', 0),
-                'total_commits': event_stats['commits'],
-                'total_prs': event_stats['prs'],
-                'total_issues': event_stats['issues'],
-                'total_stars_received': total_stars,
-                'top_languages': top_languages,
-                'top_repos': top_repos,
-                'access_token': access_token,
-                'github_created_at': created_at,
-            }
+            defaults={'github_username': gh_data.get('login', username)},
         )
+        previous = (profile.github_username, profile.github_id)
+        sync.apply_user_data(profile, gh_data)
+        profile.github_username = gh_data.get('login', username)
+        profile.access_token = access_token
+        profile.github_created_at = created_at
+        profile.save()
+        # Another account: its events, cursor and totals start over
+        if not created and previous != (profile.github_username, profile.github_id):
+            sync.reset_events(profile)
+
+        job = queue.enqueue(request.user, SyncJob.GITHUB)
 
         # Also update the github_handle in UserProfile
         user_profile = getattr(request.user, 'profile', None)
@@ -100,8 +80,10 @@ class LinkGitHubView(APIView):
             user_profile.github_handle = gh_data.get('login', username)
             user_profile.save(update_fields=['github_handle'])
 
+        data = GitHubProfileSerializer(profile).data
+        data['sync_job'] = SyncJobSerializer(job).data
         return Response(
-            GitHubProfileSerializer(profile).data,
+            data,
             status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
 
@@ -118,75 +100,27 @@ class GitHubProfileView(APIView):
                 {'error': 'No GitHub profile linked. Use /api/github/link/ first.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        return Response(GitHubProfileSerializer(profile).data)
+        data = GitHubProfileSerializer(profile).data
+        data['stale'] = github.is_unavailable()
+        return Response(data)
 
 
 class GitHubSyncView(APIView):
-    """POST /api/github/sync/ — refresh GitHub stats from GitHub API."""
+    """
+    POST /api/github/sync/ — queue a refresh of GitHub stats.
+    Returns 202 with the sync job; poll /api/sync/jobs/<id>/ for completion.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        try:
-            profile = GitHubProfile.objects.get(user=request.user)
-        except GitHubProfile.DoesNotExist:
+        if not GitHubProfile.objects.filter(user=request.user).exists():
             return Response(
                 {'error': 'No GitHub profile linked.'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        token = profile.access_token or None
-
-        try:
-            gh_data = github.fetch_user(profile.github_username, access_token=token)
-        except Exception as e:
-            return Response(
-                {'error': f'GitHub API error: {str(e)}'},
-                status=status.HTTP_502_BAD_GATEWAY
-            )
-
-        # Fetch repos
-        try:
-            repos = github.fetch_user_repos(profile.github_username, per_page=30, access_token=token)
-        except Exception:
-            repos = []
-
-        top_languages = []
-        if repos:
-            try:
-                top_languages = github.compute_top_languages(repos, access_token=token)
-            except Exception:
-                pass
-
-        top_repos = github.compute_top_repos(repos) if repos else []
-
-        # Events
-        try:
-            events = github.fetch_user_events(profile.github_username, access_token=token)
-            event_stats = github.count_event_stats(events)
-        except Exception:
-            event_stats = {'commits': 0, 'prs': 0, 'issues': 0}
-
-        total_stars = sum(r.get('stargazers_count', 0) for r in repos) if repos else 0
-
-        profile.avatar_url = gh_data.get('avatar_url', profile.avatar_url)
-        profile.html_url = gh_data.get('html_url', profile.html_url)
-        profile.bio = gh_data.get('bio', '') or profile.bio
-        profile.company = gh_data.get('company', '') or profile.company
-        profile.location = gh_data.get('location', '') or profile.location
-        profile.blog = gh_data.get('blog', '') or profile.blog
-        profile.public_repos = gh_data.get('public_repos', profile.public_repos)
-        profile.public_gists = gh_data.get('public_gists', profile.public_gists)
-        profile.followers = gh_data.get('followers', profile.followers)
-        profile.following = gh_data.get('following', profile.following)
-        profile.total_commits = event_stats['commits']
-        profile.total_prs = event_stats['prs']
-        profile.total_issues = event_stats['issues']
-        profile.total_stars_received = total_stars
-        profile.top_languages = top_languages
-        profile.top_repos = top_repos
-        profile.save()
-
-        return Response(GitHubProfileSerializer(profile).data)
+        job = queue.enqueue(request.user, SyncJob.GITHUB)
+        return Response(SyncJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
 
 class GitHubEventsView(APIView):
@@ -202,89 +136,128 @@ class GitHubEventsView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        token = profile.access_token or None
+        # Served from stored events; only the very first request fetches (later ones via the sync worker)
+        if profile.events_synced_at is None:
+            try:
+                sync.sync_events(profile)
+            except breaker.CircuitOpen:
+                return Response({'activities': sync.recent_activity(profile), 'stale': True})
+            except Exception as e:
+                return Response(
+                    {'error': f'GitHub API error: {str(e)}'},
+                    status=status.HTTP_502_BAD_GATEWAY
+                )
 
-        try:
-            events = github.fetch_user_events(profile.github_username, access_token=token)
-            activities = github.parse_events_to_activity(events)
-        except Exception as e:
-            return Response(
-                {'error': f'GitHub API error: {str(e)}'},
-                status=status.HTTP_502_BAD_GATEWAY
-            )
+        return Response({'activities': sync.recent_activity(profile), 'stale': github.is_unavailable()})
+
+
+class RepoOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter with the pk as a final tie-breaker, so pages don't overlap on equal counts."""
 
-        return Response({'activities': activities})
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        return [*ordering, 'id'] if ordering else ordering
 
 
-class GitHubReposView(APIView):
-    """GET /api/github/repos/ — get repositories for the linked user."""
+class GitHubReposView(generics.ListAPIView):
+    """
+    GET /api/github/repos/ — repositories for the linked user, served from
+    the snapshot kept by the sync worker (no GitHub call).
+    ?ordering= stargazers_count, forks_count, pushed_at or name ('-' for
+    descending; default -stargazers_count); paginated.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    serializer_class = GitHubRepoSerializer
+    filter_backends = [RepoOrderingFilter]
+    ordering_fields = ['stargazers_count', 'forks_count', 'pushed_at', 'name']
+    ordering = ['-stargazers_count']
 
-    def get(self, request):
-        try:
-            profile = GitHubProfile.objects.get(user=request.user)
-        except GitHubProfile.DoesNotExist:
+    def list(self, request, *args, **kwargs):
+        if not GitHubProfile.objects.filter(user=request.user).exists():
             return Response(
                 {'error': 'No GitHub profile linked.'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        response = super().list(request, *args, **kwargs)
+        response.data['stale'] = github.is_unavailable()
+        return response
 
-        token = profile.access_token or None
+    def get_queryset(self):
+        return GitHubRepo.objects.filter(profile__user=self.request.user)
 
-        try:
-            repos = github.fetch_user_repos(
-                profile.github_username,
-                per_page=int(request.query_params.get('per_page', 10)),
-                access_token=token
-            )
-        except Exception as e:
-            return Response(
-                {'error': f'GitHub API error: {str(e)}'},
-                status=status.HTTP_502_BAD_GATEWAY
-            )
 
-        simplified = github.compute_top_repos(repos, limit=int(request.query_params.get('per_page', 10)))
-        return Response({'repos': simplified})
+def _fetch_public_profile(username):
+    """
+    The public profile payload for `username`, or None if GitHub has no such
+    user. A failed repos fetch raises rather than returning empty top_repos,
+    so the partial payload is never cached (a stale copy keeps being served).
+    """
+    try:
+        gh_data = github.fetch_user(username)
+    except github.GitHubNotFound:
+        return None
+
+    try:
+        repos = github.fetch_user_repos(username, per_page=10)
+    except github.GitHubNotFound:
+        repos = []  # deleted between the two calls
+
+    top_repos = github.compute_top_repos(repos) if repos else []
+
+    return {
+        'login': gh_data.get('login'),
+        'avatar_url': gh_data.get('avatar_url'),
+        'html_url': gh_data.get('html_url'),
+        'bio': gh_data.get('bio', ''),
+        'company': gh_data.get('company', ''),
+        'location': gh_data.get('location', ''),
+        'public_repos': gh_data.get('public_repos', 0),
+        'followers': gh_data.get('followers', 0),
+        'following': gh_data.get('following', 0),
+        'top_repos': top_repos,
+    }
 
 
 class GitHubPublicProfileView(APIView):
-    """GET /api/github/user/<username>/ — get any GitHub user's public profile (no auth required)."""
+    """
+    GET /api/github/user/<username>/ — get any GitHub user's public profile (no auth required).
+    Read through a cache with stale-while-revalidate; concurrent misses for
+    one username share a single upstream fetch (core/readthrough.py), so
+    GitHub traffic follows distinct usernames, not page views. Unknown
+    users are cached too.
+    """
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, username):
         try:
-            gh_data = github.fetch_user(username)
+            data = readthrough.read_through(
+                caches[settings.GITHUB_RESPONSE_CACHE],
+                f'github:public-profile:{username.lower()}',
+                lambda: _fetch_public_profile(username),
+                ttl=settings.GITHUB_PUBLIC_PROFILE_TTL,
+                stale_ttl=settings.GITHUB_PUBLIC_PROFILE_STALE_SECONDS,
+            )
+        except breaker.CircuitOpen as e:
+            return _unavailable(e)
         except Exception as e:
             return Response(
-                {'error': f'Could not find GitHub user "{username}": {str(e)}'},
-                status=status.HTTP_404_NOT_FOUND
+                {'error': f'GitHub API error: {str(e)}'},
+                status=status.HTTP_502_BAD_GATEWAY
             )
 
-        try:
-            repos = github.fetch_user_repos(username, per_page=10)
-        except Exception:
-            repos = []
-
-        top_repos = github.compute_top_repos(repos) if repos else []
-
-        return Response({
-            'login': gh_data.get('login'),
-            'avatar_url': gh_data.get('avatar_url'),
-            'html_url': gh_data.get('html_url'),
-            'bio': gh_data.get('bio', ''),
-            'company': gh_data.get('company', ''),
-            'location': gh_data.get('location', ''),
-            'public_repos': gh_data.get('public_repos', 0),
-            'followers': gh_data.get('followers', 0),
-            'following': gh_data.get('following', 0),
-            'top_repos': top_repos,
-        })
+        if data is None:
+            return Response(
+                {'error': f'Could not find GitHub user "{username}".'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(data)
 
 
 class GitHubWebhookView(APIView):
     """
     POST /api/github/webhook/
-    Receives GitHub webhook events and auto-creates feed posts.
+    Receives GitHub webhook events and queues them for feed posts
+    (see github_integration/webhooks.py).
 
     Setup: In your GitHub repo settings → Webhooks → Add webhook:
       - Payload URL: https://your-domain.com/api/github/webhook/
@@ -296,91 +269,22 @@ class GitHubWebhookView(APIView):
 
     def post(self, request):
         # Verify webhook signature
-        secret = getattr(settings, 'GITHUB_WEBHOOK_SECRET', '')
-        if secret:
-            signature = request.META.get('HTTP_X_HUB_SIGNATURE_256', '')
-            if not signature:
-                return Response({'error': 'Missing signature'}, status=status.HTTP_403_FORBIDDEN)
-
-            body = request.body
-            expected = 'sha256=' + hmac.new(
-                secret.encode(), body, hashlib.sha256
-            ).hexdigest()
-            if not hmac.compare_digest(signature, expected):
-                return Response({'error': 'Invalid signature'}, status=status.HTTP_403_FORBIDDEN)
+        body = request.body
+        if not webhooks.verify_signature(body, request.META.get('HTTP_X_HUB_SIGNATURE_256', '')):
+            return Response({'error': 'Invalid signature'}, status=status.HTTP_403_FORBIDDEN)
 
         event_type = request.META.get('HTTP_X_GITHUB_EVENT', '')
-        payload = request.data
-
-        if event_type == 'push':
-            self._handle_push(payload)
-        elif event_type == 'pull_request':
-            self._handle_pull_request(payload)
+        if event_type not in webhooks.HANDLED_EVENTS:
+            return Response({'status': 'ignored'})
 
-        return Response({'status': 'ok'})
-
-    def _handle_push(self, payload):
-        """Create a feed post for push events."""
-        sender = payload.get('sender', {}).get('login', '')
-        repo = payload.get('repository', {}).get('full_name', '')
-        commits = payload.get('commits', [])
-        commit_count = len(commits)
-
-        if commit_count == 0:
-            return
-
-        # Find the Hive user by github_username
         try:
-            gh_profile = GitHubProfile.objects.select_related('user').get(github_username=sender)
-        except GitHubProfile.DoesNotExist:
-            return  # User not linked on Hive
-
-        # Build commit summary
-        commit_msgs = '\n'.join(
-            f'• {c.get("message", "").split(chr(10))[0]}'
-            for c in commits[:5]
-        )
-        if commit_count > 5:
-            commit_msgs += f'\n... and {commit_count - 5} more commits'
-
-        content = f'Pushed {commit_count} commit{"s" if commit_count != 1 else ""} to {repo}'
-        code_snippet = commit_msgs
-
-        Post.objects.create(
-            author=gh_profile.user,
-            content=content,
-            code_snippet=code_snippet,
-            type='GITHUB_COMMIT',
-        )
-
-    def _handle_pull_request(self, payload):
-        """Create a feed post for PR events."""
-        action = payload.get('action', '')
-        if action not in ('opened', 'closed', 'merged'):
-            return
-
-        sender = payload.get('sender', {}).get('login', '')
-        repo = payload.get('repository', {}).get('full_name', '')
-        pr = payload.get('pull_request', {})
-        title = pr.get('title', '')
-
-        try:
-            gh_profile = GitHubProfile.objects.select_related('user').get(github_username=sender)
-        except GitHubProfile.DoesNotExist:
-            return
-
-        merged = pr.get('merged', False)
-        if action == 'closed' and merged:
-            action_text = 'Merged'
-        elif action == 'closed':
-            action_text = 'Closed'
-        else:
-            action_text = 'Opened'
-
-        content = f'{action_text} PR in {repo}: {title}'
-
-        Post.objects.create(
-            author=gh_profile.user,
-            content=content,
-            type='GITHUB_COMMIT',
-        )
+            payload = json.loads(body)
+        except ValueError:
+            return Response({'error': 'Invalid JSON payload'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # GitHub always sends X-GitHub-Delivery; fall back to the body hash for hand-made requests
+        delivery_id = request.META.get('HTTP_X_GITHUB_DELIVERY') or hashlib.sha256(body).hexdigest()
+        # Posts are created by `python manage.py process_github_webhooks`
+        if not webhooks.record(delivery_id, event_type, payload):
+            return Response({'status': 'duplicate'})
+        return Response({'status': 'queued'}, status=status.HTTP_202_ACCEPTED)
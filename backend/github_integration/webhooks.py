@@ -0,0 +1,248 @@
+"""
+GitHub webhook ingestion.
+
+The webhook view only verifies the signature and stores the delivery
+(WebhookDelivery, unique on X-GitHub-Delivery), so it answers in one
+INSERT however large the burst, and redeliveries are dropped by the
+unique key. `python manage.py process_github_webhooks` claims batches
+and resolves all senders to Hive users in one query. A delivery that
+fails is retried up to GITHUB_WEBHOOK_MAX_ATTEMPTS times and then kept,
+marked failed, for inspection.
+
+Rapid activity is coalesced: pushes (and, separately, pull request
+updates) by one user to one repo within GITHUB_ACTIVITY_WINDOW_MINUTES
+are merged into a single feed post whose count and summary are updated
+in place, instead of one post per delivery.
+"""
+import hashlib
+import hmac
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from feed import timeline
+from feed.models import Post
+
+from .models import ActivityWindow, GitHubProfile, WebhookDelivery
+
+HANDLED_EVENTS = ('push', 'pull_request')
+
+
+def verify_signature(body, signature):
+    """True if `signature` (X-Hub-Signature-256) matches the body, or no secret is configured."""
+    secret = getattr(settings, 'GITHUB_WEBHOOK_SECRET', '')
+    if not secret:
+        return True
+    if not signature:
+        return False
+    expected = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+def record(delivery_id, event, payload):
+    """Store a delivery for the worker. Returns False if it was already received."""
+    try:
+        with transaction.atomic():
+            WebhookDelivery.objects.create(delivery_id=delivery_id, event=event, payload=payload)
+    except IntegrityError:
+        return False
+    return True
+
+
+def push_activity(payload):
+    """(repo, commit count, commit subject lines) for a push, or None if it carries no commits."""
+    commits = payload.get('commits', [])
+    if not commits:
+        return None
+    repo = payload.get('repository', {}).get('full_name', '')
+    return repo, len(commits), [c.get('message', '').split('\n')[0] for c in commits]
+
+
+def pull_request_activity(payload):
+    """(repo, 1, [[action, title]]) for an opened/closed/merged pull request, or None."""
+    action = payload.get('action', '')
+    if action not in ('opened', 'closed', 'merged'):
+        return None
+
+    repo = payload.get('repository', {}).get('full_name', '')
+    pr = payload.get('pull_request', {})
+    title = pr.get('title', '')
+
+    merged = pr.get('merged', False)
+    if action == 'closed' and merged:
+        action_text = 'Merged'
+    elif action == 'closed':
+        action_text = 'Closed'
+    else:
+        action_text = 'Opened'
+    return repo, 1, [[action_text, title]]
+
+
+ACTIVITY = {
+    ActivityWindow.PUSH: push_activity,
+    ActivityWindow.PULL_REQUEST: pull_request_activity,
+}
+
+# Most recent items kept per window for the post summary
+SUMMARY_ITEMS = 5
+
+
+def render(window):
+    """(content, code_snippet) for a window's post."""
+    n, repo, items = window.count, window.repo, window.items
+    if window.kind == ActivityWindow.PUSH:
+        # Build commit summary
+        snippet = '\n'.join(f'• {message}' for message in items)
+        if n > len(items):
+            snippet += f'\n... and {n - len(items)} more commits'
+        return f'Pushed {n} commit{"s" if n != 1 else ""} to {repo}', snippet
+
+    if n == 1:
+        action_text, title = items[0]
+        return f'{action_text} PR in {repo}: {title}', ''
+    snippet = '\n'.join(f'• {action_text}: {title}' for action_text, title in items)
+    if n > len(items):
+        snippet += f'\n... and {n - len(items)} more'
+    return f'{n} pull request updates in {repo}', snippet
+
+
+def claim(limit=100):
+    """
+    Atomically claim up to `limit` unprocessed deliveries; stale claims are
+    retaken after a timeout. Each claim counts as an attempt; failed
+    deliveries are never claimed again.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=settings.GITHUB_WEBHOOK_CLAIM_TIMEOUT_SECONDS)
+    available = Q(processed_at__isnull=True, failed_at__isnull=True) & (
+        Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired)
+    )
+    candidates = WebhookDelivery.objects.filter(available).order_by('id').values_list('pk', flat=True)[:limit]
+    claimed = [
+        pk for pk in candidates
+        if WebhookDelivery.objects.filter(available, pk=pk).update(claimed_at=now, attempts=F('attempts') + 1)
+    ]
+    return list(WebhookDelivery.objects.filter(pk__in=claimed).order_by('id'))
+
+
+def fail(delivery, error):
+    """
+    Record a failed delivery. It stays claimed and is retried once the claim
+    times out, until GITHUB_WEBHOOK_MAX_ATTEMPTS; then it is marked failed.
+    Returns True if it will be retried.
+    """
+    delivery.error = error
+    retry = delivery.attempts < settings.GITHUB_WEBHOOK_MAX_ATTEMPTS
+    if not retry:
+        delivery.failed_at = timezone.now()
+    delivery.save(update_fields=['error', 'failed_at'])
+    return retry
+
+
+def _parse(delivery):
+    """(sender login, (repo, count, items) or None) for one delivery."""
+    login = delivery.payload.get('sender', {}).get('login', '')
+    activity = ACTIVITY[delivery.event](delivery.payload) if delivery.event in ACTIVITY else None
+    return login, activity
+
+
+def _merge(parsed):
+    """
+    Merge parsed (delivery, (login, activity)) pairs into activity windows
+    and their feed posts, and mark the deliveries processed, in one
+    transaction. Returns the posts created.
+    """
+    # Unlinked senders are simply skipped
+    users = dict(
+        GitHubProfile.objects.filter(github_username__in={login for _, (login, _) in parsed} - {''})
+        .values_list('github_username', 'user_id')
+    )
+    activities = []
+    for delivery, (login, activity) in parsed:
+        if activity and login in users:
+            repo, count, items = activity
+            activities.append((users[login], repo, delivery.event, delivery.received_at, count, items))
+    keys = {(user_id, repo, kind) for user_id, repo, kind, *_ in activities}
+    window_length = timedelta(minutes=settings.GITHUB_ACTIVITY_WINDOW_MINUTES)
+
+    created, updated = [], {}
+    with transaction.atomic():
+        ActivityWindow.objects.bulk_create(
+            [ActivityWindow(user_id=u, repo=r, kind=k) for u, r, k in keys], ignore_conflicts=True,
+        )
+        # Concurrent workers merging into the same window wait here
+        match = Q(pk__in=[])
+        for user_id, repo, kind in keys:
+            match |= Q(user_id=user_id, repo=repo, kind=kind)
+        windows = {
+            (w.user_id, w.repo, w.kind): w
+            for w in ActivityWindow.objects.select_for_update(of=('self',)).select_related('post')
+            .filter(match).order_by('pk')
+        }
+
+        for user_id, repo, kind, received_at, count, items in activities:
+            window = windows[(user_id, repo, kind)]
+            if window.post_id is None or received_at - window.started_at >= window_length:
+                window.post = Post(author_id=user_id, type='GITHUB_COMMIT')
+                window.started_at, window.count, window.items = received_at, 0, []
+                created.append(window.post)
+            window.count += count
+            window.items = (window.items + items)[-SUMMARY_ITEMS:]
+            window.post.content, window.post.code_snippet = render(window)
+            updated[window.post.pk] = window.post
+
+        Post.objects.bulk_create(created)
+        new = {post.pk for post in created}
+        Post.objects.bulk_update([p for pk, p in updated.items() if pk not in new], ['content', 'code_snippet'])
+        ActivityWindow.objects.bulk_update(windows.values(), ['post', 'started_at', 'count', 'items'])
+        timeline.enqueue_posts(created)
+        WebhookDelivery.objects.filter(pk__in=[d.pk for d, _ in parsed]).update(processed_at=timezone.now())
+    return created
+
+
+def process(deliveries):
+    """
+    Merge a batch of claimed deliveries into activity windows and their
+    feed posts. Returns (posts created, deliveries that failed); merges
+    update posts in place. A delivery that can't be parsed or merged is
+    recorded with fail() without holding back the rest of the batch: if
+    the batch's merge fails, each delivery is retried on its own.
+    """
+    parsed, failed = [], []
+    for delivery in deliveries:
+        try:
+            parsed.append((delivery, _parse(delivery)))
+        except Exception as e:
+            fail(delivery, str(e))
+            failed.append(delivery)
+    if not parsed:
+        return [], failed
+
+    try:
+        return _merge(parsed), failed
+    except Exception as e:
+        if len(parsed) == 1:
+            [(delivery, _)] = parsed
+            fail(delivery, str(e))
+            return [], failed + [delivery]
+
+    # Retry one by one so only the deliveries at fault are held back
+    created = []
+    for delivery, _ in parsed:
+        posts, errors = process([delivery])
+        created += posts
+        failed += errors
+    return created, failed
+
+
+def prune(older_than=None):
+    """Delete processed deliveries past the redelivery window. Returns count deleted."""
+    if older_than is None:
+        older_than = timedelta(days=settings.GITHUB_WEBHOOK_RETENTION_DAYS)
+    deleted, _ = WebhookDelivery.objects.filter(
+        processed_at__isnull=False, received_at__lt=timezone.now() - older_than,
+    ).delete()
+    return deleted
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import SyncJob
+
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'user', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('user__username', 'user__email')
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from sync import queue
+from sync.models import SyncJob
+
+
+class Command(BaseCommand):
+    help = 'Drain the profile sync queue and schedule refreshes for stale GitHub/Codeforces profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process one batch and exit.')
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--schedule-interval', type=float, default=60.0,
+                            help='Seconds between scans for stale profiles.')
+        parser.add_argument('--no-schedule', action='store_true',
+                            help='Only run queued jobs; do not scan for stale profiles.')
+
+    def handle(self, *args, **options):
+        last_schedule = 0
+        while True:
+            if not options['no_schedule'] and time.monotonic() - last_schedule >= options['schedule_interval']:
+                requeued = queue.requeue_stuck()
+                if requeued:
+                    self.stdout.write(f'Requeued {requeued} stuck job(s)')
+                for kind, _ in SyncJob.KIND_CHOICES:
+                    queued = queue.schedule_stale(kind)
+                    if queued:
+                        self.stdout.write(f'Queued {queued} stale {kind} profile(s)')
+                last_schedule = time.monotonic()
+
+            jobs = queue.claim(options['batch_size'])
+            for job in jobs:
+                queue.run(job)
+                self.stdout.write(f'{job.kind} sync for {job.user}: {job.status}')
+
+            if options['once']:
+                break
+            if not jobs:
+                time.sleep(options['poll_interval'])
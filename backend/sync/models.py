@@ -0,0 +1,55 @@
+from django.db import models
+from django.conf import settings
+import uuid
+
+
+class SyncJob(models.Model):
+    """
+    A queued refresh of a user's upstream profile (GitHub or Codeforces).
+    Drained by `python manage.py run_sync_worker`. At most one queued or
+    running job exists per (user, kind).
+    """
+    GITHUB = 'GITHUB'
+    CODEFORCES = 'CODEFORCES'
+    KIND_CHOICES = (
+        (GITHUB, 'GitHub'),
+        (CODEFORCES, 'Codeforces'),
+    )
+
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sync_jobs')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    run_after = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='sync_job_queue_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'kind'],
+                condition=models.Q(status__in=['QUEUED', 'RUNNING']),
+                name='unique_active_sync_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} sync for {self.user} ({self.status})'
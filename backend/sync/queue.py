@@ -0,0 +1,121 @@
+"""
+DB-backed sync job queue.
+Web views only enqueue; `python manage.py run_sync_worker` claims and runs
+jobs, so request handlers never wait on GitHub or Codeforces.
+Jobs are claimed with a conditional UPDATE, so several workers can drain
+the same table without double-running a job.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import SyncJob
+
+# kind -> (profile model, sync function)
+HANDLERS = {
+    SyncJob.GITHUB: ('github_integration.models.GitHubProfile', 'github_integration.sync.sync_profile'),
+    SyncJob.CODEFORCES: ('arena.models.CodeforcesProfile', 'arena.sync.sync_profile'),
+}
+
+
+def _active_job(user, kind):
+    return SyncJob.objects.filter(user=user, kind=kind, status__in=SyncJob.ACTIVE_STATUSES).first()
+
+
+def enqueue(user, kind):
+    """Queue a sync for (user, kind), or return the job that is already queued/running."""
+    job = _active_job(user, kind)
+    if job:
+        return job
+    try:
+        with transaction.atomic():
+            return SyncJob.objects.create(user=user, kind=kind, run_after=timezone.now())
+    except IntegrityError:
+        # Another request queued it between our check and insert
+        return _active_job(user, kind)
+
+
+def schedule_stale(kind, stale_after=None, limit=500):
+    """Queue syncs for profiles whose last_synced is older than stale_after. Returns count queued."""
+    if stale_after is None:
+        stale_after = timedelta(minutes=settings.SYNC_STALE_AFTER_MINUTES)
+    model = import_string(HANDLERS[kind][0])
+    now = timezone.now()
+    active = SyncJob.objects.filter(
+        user=OuterRef('user'), kind=kind, status__in=SyncJob.ACTIVE_STATUSES,
+    )
+    user_ids = list(
+        model.objects.filter(last_synced__lt=now - stale_after)
+        .filter(~Exists(active))
+        .order_by('last_synced')
+        .values_list('user_id', flat=True)[:limit]
+    )
+    SyncJob.objects.bulk_create(
+        [SyncJob(user_id=uid, kind=kind, run_after=now) for uid in user_ids],
+        ignore_conflicts=True,
+    )
+    return len(user_ids)
+
+
+def requeue_stuck(timeout=None):
+    """
+    Put RUNNING jobs whose worker died back on the queue. Each claim already
+    counted as an attempt, so a job that keeps taking its worker down is
+    failed once it has used SYNC_MAX_ATTEMPTS. Returns count requeued.
+    """
+    if timeout is None:
+        timeout = timedelta(seconds=settings.SYNC_JOB_TIMEOUT_SECONDS)
+    now = timezone.now()
+    stuck = SyncJob.objects.filter(status=SyncJob.RUNNING, started_at__lt=now - timeout)
+    stuck.filter(attempts__gte=settings.SYNC_MAX_ATTEMPTS).update(
+        status=SyncJob.FAILED, error='Worker stopped while running this job.', finished_at=now,
+    )
+    return stuck.filter(attempts__lt=settings.SYNC_MAX_ATTEMPTS).update(status=SyncJob.QUEUED, run_after=now)
+
+
+def claim(limit=10):
+    """Atomically claim up to `limit` due jobs for this worker."""
+    now = timezone.now()
+    candidates = SyncJob.objects.filter(status=SyncJob.QUEUED, run_after__lte=now) \
+        .order_by('run_after') \
+        .values_list('pk', flat=True)[:limit]
+    claimed = [
+        pk for pk in candidates
+        if SyncJob.objects.filter(pk=pk, status=SyncJob.QUEUED)
+        .update(status=SyncJob.RUNNING, started_at=now, attempts=F('attempts') + 1)
+    ]
+    return list(SyncJob.objects.filter(pk__in=claimed).select_related('user').order_by('run_after'))
+
+
+def run(job):
+    """Run a claimed job and record its outcome. Failed jobs are retried with backoff."""
+    model_path, func_path = HANDLERS[job.kind]
+    model = import_string(model_path)
+
+    try:
+        profile = model.objects.get(user=job.user)
+        import_string(func_path)(profile)
+    except model.DoesNotExist:
+        job.status = SyncJob.FAILED
+        job.error = 'Profile is no longer linked.'
+    except Exception as e:
+        job.error = str(e)
+        if job.attempts < settings.SYNC_MAX_ATTEMPTS:
+            # Out of upstream budget: wait for the window to reset rather than the usual backoff
+            delay = max(30 * 2 ** job.attempts, getattr(e, 'retry_after', 0))
+            job.status = SyncJob.QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+        else:
+            job.status = SyncJob.FAILED
+    else:
+        job.status = SyncJob.DONE
+        job.error = ''
+
+    if job.status != SyncJob.QUEUED:
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'run_after', 'finished_at'])
+    return job
@@ -0,0 +1,12 @@
+from rest_framework import serializers
+from .models import SyncJob
+
+
+class SyncJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SyncJob
+        fields = [
+            'id', 'kind', 'status', 'attempts', 'error',
+            'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
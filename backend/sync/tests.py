@@ -0,0 +1,110 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.ratelimit import RateLimitExceeded
+from github_integration.models import GitHubProfile
+from sync import queue
+from sync.models import SyncJob
+from users.models import User
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='ada')
+
+    def test_enqueue_returns_the_active_job(self):
+        job = queue.enqueue(self.user, SyncJob.GITHUB)
+
+        self.assertEqual(queue.enqueue(self.user, SyncJob.GITHUB), job)
+        self.assertNotEqual(queue.enqueue(self.user, SyncJob.CODEFORCES), job)
+
+    def test_claim_runs_each_due_job_once(self):
+        due = queue.enqueue(self.user, SyncJob.GITHUB)
+        later = SyncJob.objects.create(user=self.user, kind=SyncJob.CODEFORCES,
+                                       run_after=timezone.now() + timedelta(minutes=5))
+
+        claimed = queue.claim()
+
+        self.assertEqual(claimed, [due])
+        self.assertEqual(claimed[0].status, SyncJob.RUNNING)
+        self.assertEqual(claimed[0].attempts, 1)
+        self.assertEqual(queue.claim(), [])
+        later.refresh_from_db()
+        self.assertEqual(later.status, SyncJob.QUEUED)
+
+    def stuck_job(self, attempts):
+        started = timezone.now() - timedelta(hours=1)
+        return SyncJob.objects.create(user=self.user, kind=SyncJob.GITHUB, status=SyncJob.RUNNING,
+                                      attempts=attempts, run_after=started, started_at=started)
+
+    def test_requeue_stuck_puts_dead_workers_jobs_back(self):
+        job = self.stuck_job(attempts=1)
+
+        self.assertEqual(queue.requeue_stuck(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.QUEUED)
+        self.assertEqual(queue.claim(), [job])
+
+    def test_requeue_stuck_leaves_recent_jobs_running(self):
+        queue.enqueue(self.user, SyncJob.GITHUB)
+        [job] = queue.claim()
+
+        self.assertEqual(queue.requeue_stuck(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.RUNNING)
+
+    @override_settings(SYNC_MAX_ATTEMPTS=3)
+    def test_requeue_stuck_fails_jobs_out_of_attempts(self):
+        job = self.stuck_job(attempts=3)
+
+        self.assertEqual(queue.requeue_stuck(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+
+class RunTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='ada')
+        GitHubProfile.objects.create(user=self.user, github_username='ada')
+        queue.enqueue(self.user, SyncJob.GITHUB)
+        [self.job] = queue.claim()
+
+    def test_success(self):
+        with mock.patch('github_integration.sync.sync_profile') as sync_profile:
+            queue.run(self.job)
+
+        sync_profile.assert_called_once()
+        self.assertEqual(self.job.status, SyncJob.DONE)
+
+    def test_failure_is_retried_with_backoff(self):
+        with mock.patch('github_integration.sync.sync_profile', side_effect=RuntimeError('boom')):
+            queue.run(self.job)
+
+        self.assertEqual(self.job.status, SyncJob.QUEUED)
+        self.assertEqual(self.job.error, 'boom')
+        self.assertGreater(self.job.run_after, timezone.now() + timedelta(seconds=50))
+
+    def test_rate_limited_job_waits_for_the_reset(self):
+        error = RateLimitExceeded('exhausted', retry_after=900)
+        with mock.patch('github_integration.sync.sync_profile', side_effect=error):
+            queue.run(self.job)
+
+        self.assertGreater(self.job.run_after, timezone.now() + timedelta(seconds=850))
+
+    @override_settings(SYNC_MAX_ATTEMPTS=1)
+    def test_last_attempt_fails_the_job(self):
+        with mock.patch('github_integration.sync.sync_profile', side_effect=RuntimeError('boom')):
+            queue.run(self.job)
+
+        self.assertEqual(self.job.status, SyncJob.FAILED)
+
+    def test_unlinked_profile_fails_the_job(self):
+        GitHubProfile.objects.all().delete()
+
+        queue.run(self.job)
+
+        self.assertEqual(self.job.status, SyncJob.FAILED)
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('jobs/<uuid:pk>/', views.SyncJobDetailView.as_view(), name='sync-job-detail'),
+]
@@ -0,0 +1,12 @@
+from rest_framework import generics, permissions
+from .models import SyncJob
+from .serializers import SyncJobSerializer
+
+
+class SyncJobDetailView(generics.RetrieveAPIView):
+    """GET /api/sync/jobs/<id>/ — poll the status of one of your sync jobs."""
+    serializer_class = SyncJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return SyncJob.objects.filter(user=self.request.user)
@@ -0,0 +1,101 @@
+"""
+In-process caches for FirebaseAuthentication.
+
+- Verified ID tokens, keyed by the token's SHA-256 and kept until the
+  token's own `exp`, so a repeat caller skips the RSA signature check.
+- Users by Firebase uid (User.username), so a repeat caller skips the
+  get_or_create. Only the User's own fields are cached: related objects
+  (user.profile) are loaded fresh by each request. Entries are dropped
+  when the User or its UserProfile is saved or deleted, or its
+  follower_count changes, in this process (users/signals.py); other
+  processes' changes show up within USER_CACHE_TTL.
+
+Both are bounded LRUs; each worker process has its own.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+TOKEN_CACHE_SIZE = 10000
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 300  # seconds
+
+
+class ExpiringLRU:
+    """Thread-safe LRU whose entries each carry their own expiry (epoch seconds)."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+tokens = ExpiringLRU(TOKEN_CACHE_SIZE)
+users = ExpiringLRU(USER_CACHE_SIZE)
+
+
+def token_key(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_token(token):
+    """Decoded claims for an already-verified, unexpired token, or None."""
+    return tokens.get(token_key(token))
+
+
+def remember_token(token, decoded):
+    tokens.set(token_key(token), decoded, decoded.get('exp', 0))
+
+
+def _detached(user):
+    """A copy of `user` sharing no related-object or prefetch caches with it."""
+    user = copy.copy(user)
+    user._state.fields_cache = {}
+    user.__dict__.pop('_prefetched_objects_cache', None)
+    return user
+
+
+def get_user(uid):
+    """A private copy of the cached User for `uid`, or None."""
+    user = users.get(uid)
+    return _detached(user) if user is not None else None
+
+
+def remember_user(user):
+    users.set(user.username, _detached(user), time.time() + USER_CACHE_TTL)
+
+
+def forget_user(uid):
+    users.discard(uid)
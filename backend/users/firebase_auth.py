@@ -2,6 +2,7 @@ import firebase_admin
 from firebase_admin import auth as firebase_auth, credentials
 from rest_framework import authentication, exceptions
 from django.conf import settings
+from users import authcache
 from users.models import User, UserProfile
 
 # Initialize Firebase Admin SDK
@@ -26,6 +27,7 @@ class FirebaseAuthentication(authentication.BaseAuthentication):
     DRF authentication class that verifies Firebase ID tokens.
     Expects the Authorization header: Bearer <firebase_id_token>
     Auto-creates User + UserProfile on first login (JIT provisioning).
+    Verified tokens and known users are cached in-process (users/authcache.py).
     """
 
     def authenticate(self, request):
@@ -39,8 +41,20 @@ class FirebaseAuthentication(authentication.BaseAuthentication):
 
         token = parts[1]
 
+        decoded = authcache.get_token(token)
+        if decoded is None:
+            decoded = self.verify(token)
+            authcache.remember_token(token, decoded)
+
+        user = authcache.get_user(decoded.get('uid'))
+        if user is None:
+            user = self.provision(decoded)
+            authcache.remember_user(user)
+        return (user, decoded)
+
+    def verify(self, token):
         try:
-            decoded = firebase_auth.verify_id_token(token)
+            return firebase_auth.verify_id_token(token)
         except firebase_auth.InvalidIdTokenError:
             raise exceptions.AuthenticationFailed('Invalid Firebase ID token.')
         except firebase_auth.ExpiredIdTokenError:
@@ -53,7 +67,8 @@ class FirebaseAuthentication(authentication.BaseAuthentication):
                 )
             raise exceptions.AuthenticationFailed(f'Firebase auth error: {str(e)}')
 
-        # JIT user provisioning
+    def provision(self, decoded):
+        """JIT user provisioning."""
         uid = decoded.get('uid')
         email = decoded.get('email', '')
         name = decoded.get('name', '')
@@ -77,5 +92,4 @@ class FirebaseAuthentication(authentication.BaseAuthentication):
         elif not user.email and email:
             user.email = email
             user.save(update_fields=['email'])
-
-        return (user, decoded)
+        return user
@@ -5,6 +5,8 @@ import uuid
 class User(AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     is_verified = models.BooleanField(default=False)
+    # Maintained by users.signals; decides fan-out on write vs on read (feed.timeline)
+    follower_count = models.IntegerField(default=0)
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -20,3 +22,22 @@ class UserProfile(models.Model):
 
     def __str__(self):
         return self.user.username
+
+
+class Follow(models.Model):
+    """`follower` sees `following`'s posts in their home timeline (see feed.timeline)."""
+    follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name='following_set')
+    following = models.ForeignKey(User, on_delete=models.CASCADE, related_name='follower_set')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'following'], name='unique_follow'),
+        ]
+        indexes = [
+            # Fan-out walks an author's followers
+            models.Index(fields=['following', 'follower'], name='follow_following_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.follower} -> {self.following}'
@@ -14,11 +14,19 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
 class UserSerializer(serializers.ModelSerializer):
     profile = UserProfileSerializer(read_only=True)
+    is_following = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'profile']
-        read_only_fields = ['id', 'username', 'email']
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'follower_count', 'is_following', 'profile']
+        read_only_fields = ['id', 'username', 'email', 'follower_count']
+
+    def get_is_following(self, obj):
+        """Whether the caller follows this user; null for the caller themselves or when not annotated."""
+        request = self.context.get('request')
+        if not request or obj.pk == request.user.pk:
+            return None
+        return getattr(obj, 'is_following', None)
 
 
 class UserProfileUpdateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,38 @@
+"""
+Keeps User.follower_count in step with Follow rows using F() updates, so
+concurrent follows don't lose increments, and drops changed users (their
+fields, profile or follower_count) from the authentication cache.
+"""
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import authcache
+from .models import Follow, User, UserProfile
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        User.objects.filter(pk=instance.following_id).update(follower_count=F('follower_count') + 1)
+        authcache.forget_user(instance.following.username)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    User.objects.filter(pk=instance.following_id).update(follower_count=F('follower_count') - 1)
+    following = User.objects.filter(pk=instance.following_id).values_list('username', flat=True).first()
+    if following:
+        authcache.forget_user(following)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    authcache.forget_user(instance.username)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def profile_changed(sender, instance, **kwargs):
+    authcache.forget_user(instance.user.username)
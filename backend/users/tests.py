@@ -0,0 +1,108 @@
+import time
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+
+from users import authcache
+from users.firebase_auth import FirebaseAuthentication, firebase_auth
+from users.models import Follow, User, UserProfile
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        authcache.users.clear()
+        self.addCleanup(authcache.users.clear)
+        self.user = User.objects.create(username='ada')
+        self.other = User.objects.create(username='grace')
+        UserProfile.objects.create(user=self.user)
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def test_cached_copies_share_no_related_objects(self):
+        self.assertIsNotNone(self.user.profile)  # fills the related-object cache
+        authcache.remember_user(self.user)
+
+        first = authcache.get_user('ada')
+        second = authcache.get_user('ada')
+
+        self.assertEqual(first.pk, self.user.pk)
+        self.assertIsNot(first, second)
+        self.assertEqual(first._state.fields_cache, {})
+        first.profile.bio = 'changed'
+        self.assertNotEqual(second.profile.bio, 'changed')
+
+    def test_user_and_profile_saves_evict(self):
+        authcache.remember_user(self.user)
+        self.user.save()
+        self.assertIsNone(authcache.get_user('ada'))
+
+        authcache.remember_user(self.user)
+        self.user.profile.save()
+        self.assertIsNone(authcache.get_user('ada'))
+
+    def test_follower_count_changes_evict_the_followed_user(self):
+        authcache.remember_user(self.user)
+        follow = Follow.objects.create(follower=self.other, following=self.user)
+        self.assertIsNone(authcache.get_user('ada'))
+
+        authcache.remember_user(self.user)
+        follow.delete()
+        self.assertIsNone(authcache.get_user('ada'))
+
+
+class FirebaseAuthenticationTests(TestCase):
+    def setUp(self):
+        for cache in (authcache.tokens, authcache.users):
+            cache.clear()
+            self.addCleanup(cache.clear)
+        patcher = mock.patch.object(firebase_auth, 'verify_id_token', side_effect=self.claims)
+        self.verify = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.expires = time.time() + 3600
+
+    def claims(self, token):
+        return {'uid': f'uid-{token}', 'email': f'{token}@example.com', 'name': 'Ada Lovelace',
+                'picture': 'https://example.com/ada.png', 'exp': self.expires}
+
+    def authenticate(self, token='ada'):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return FirebaseAuthentication().authenticate(request)
+
+    def test_first_login_provisions_the_user_and_profile(self):
+        user, decoded = self.authenticate()
+
+        self.assertEqual((user.username, user.email, user.first_name), ('uid-ada', 'ada@example.com', 'Ada'))
+        self.assertEqual(user.profile.headline, 'Ada Lovelace on Hive')
+        self.assertEqual(decoded['uid'], 'uid-ada')
+
+    def test_repeat_logins_skip_verification_and_queries(self):
+        self.authenticate()
+
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+
+        self.assertEqual(self.verify.call_count, 1)
+        self.assertEqual(user.username, 'uid-ada')
+
+    def test_expired_tokens_are_verified_again(self):
+        self.expires = time.time() - 1
+        self.authenticate()
+        self.authenticate()
+
+        self.assertEqual(self.verify.call_count, 2)
+
+    def test_invalid_tokens_are_rejected_and_not_cached(self):
+        self.verify.side_effect = firebase_auth.InvalidIdTokenError('bad signature')
+
+        for _ in range(2):
+            with self.assertRaisesMessage(AuthenticationFailed, 'Invalid Firebase ID token.'):
+                self.authenticate('forged')
+
+        self.assertEqual(self.verify.call_count, 2)
+        self.assertFalse(User.objects.exists())
+
+    def test_requests_without_a_bearer_token_are_anonymous(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION='Basic abc')
+
+        self.assertIsNone(FirebaseAuthentication().authenticate(request))
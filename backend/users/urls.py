@@ -5,4 +5,5 @@ urlpatterns = [
     path('me/', views.MeView.as_view(), name='user-me'),
     path('', views.UserListView.as_view(), name='user-list'),
     path('<uuid:id>/', views.PublicProfileView.as_view(), name='user-profile'),
+    path('<uuid:id>/follow/', views.FollowView.as_view(), name='user-follow'),
 ]
@@ -1,6 +1,8 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from .models import User, UserProfile
+from rest_framework.views import APIView
+from django.db.models import Exists, OuterRef
+from .models import Follow, User, UserProfile
 from .serializers import UserSerializer, UserProfileUpdateSerializer
 
 
@@ -39,13 +41,53 @@ class PublicProfileView(generics.RetrieveAPIView):
     GET /api/users/ — list all users (for Squads)
     GET /api/users/<id>/ — public profile
     """
-    queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated] # Require auth to see other users
     lookup_field = 'id'
 
+    def get_queryset(self):
+        follows = Follow.objects.filter(follower=self.request.user, following=OuterRef('pk'))
+        return User.objects.annotate(is_following=Exists(follows))
+
 class UserListView(generics.ListAPIView):
-    queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        follows = Follow.objects.filter(follower=self.request.user, following=OuterRef('pk'))
+        return User.objects.select_related('profile').annotate(is_following=Exists(follows))
+
+
+class FollowView(APIView):
+    """
+    POST   /api/users/<id>/follow/ — follow a user (their posts reach your timeline)
+    DELETE /api/users/<id>/follow/ — unfollow
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _target(self, id):
+        try:
+            return User.objects.get(id=id)
+        except User.DoesNotExist:
+            return None
+
+    def post(self, request, id):
+        target = self._target(id)
+        if target is None:
+            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+        if target.pk == request.user.pk:
+            return Response({'error': 'You cannot follow yourself'}, status=status.HTTP_400_BAD_REQUEST)
+        _, created = Follow.objects.get_or_create(follower=request.user, following=target)
+        target.refresh_from_db(fields=['follower_count'])
+        return Response(
+            {'following': True, 'follower_count': target.follower_count},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    def delete(self, request, id):
+        target = self._target(id)
+        if target is None:
+            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+        Follow.objects.filter(follower=request.user, following=target).delete()
+        target.refresh_from_db(fields=['follower_count'])
+        return Response({'following': False, 'follower_count': target.follower_count})
@@ -28,7 +28,7 @@ import {
 import Link from "next/link";
 import { useState, useRef, useEffect } from "react";
 import { useAuth } from "@/contexts/AuthContext";
-import { apiPost, apiGet } from "@/lib/api";
+import { apiPost, apiGet, waitForSyncJob, SyncJob } from "@/lib/api";
 
 /* === CODEFORCES RANK TIERS === */
 const cfRankTiers = [
@@ -184,7 +184,10 @@ function LinkCodeforcesCard() {
     async function handleSync() {
         setLoading(true);
         try {
-            const data = await apiPost("/api/arena/cf-sync/");
+            const job = await apiPost<SyncJob>("/api/arena/cf-sync/");
+            const result = await waitForSyncJob(job.id);
+            if (result.status === "FAILED") throw new Error(result.error || "Codeforces sync failed");
+            const data = await apiGet("/api/arena/cf-profile/");
             setLinked(data);
         } catch (err: any) {
             setError(err.message);
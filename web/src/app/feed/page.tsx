@@ -51,8 +51,8 @@ interface Post {
     image_url: string | null;
     type: "MANUAL" | "GITHUB_COMMIT" | "CODEFORCES_SOLVE" | "MILESTONE";
     created_at: string;
-    reactions: Array<{ id: number; user: string; type: "RESPECT" | "FIRE" | "BUG" }>;
-    comments: any[];
+    my_reactions: Array<"RESPECT" | "FIRE" | "BUG">;
+    comments_preview: any[];
     reaction_counts: { RESPECT?: number; FIRE?: number; BUG?: number };
     comment_count: number;
 }
@@ -94,8 +94,8 @@ const result = await edge.processPayment(data, {
 });`,
         image_url: null,
         created_at: new Date(Date.now() - 2 * 60 * 60 * 1000).toISOString(),
-        reactions: [],
-        comments: [],
+        my_reactions: [],
+        comments_preview: [],
         reaction_counts: { RESPECT: 42, FIRE: 18, BUG: 2 },
         comment_count: 7,
     },
@@ -114,8 +114,8 @@ const result = await edge.processPayment(data, {
         code_snippet: null,
         image_url: null,
         created_at: new Date(Date.now() - 4 * 60 * 60 * 1000).toISOString(),
-        reactions: [],
-        comments: [],
+        my_reactions: [],
+        comments_preview: [],
         reaction_counts: { RESPECT: 89, FIRE: 34, BUG: 0 },
         comment_count: 12,
     },
@@ -134,8 +134,8 @@ const result = await edge.processPayment(data, {
         code_snippet: null,
         image_url: null,
         created_at: new Date(Date.now() - 6 * 60 * 60 * 1000).toISOString(),
-        reactions: [],
-        comments: [],
+        my_reactions: [],
+        comments_preview: [],
         reaction_counts: { RESPECT: 234, FIRE: 89, BUG: 1 },
         comment_count: 31,
     },
@@ -324,11 +324,8 @@ function ComposeBox({ onPostCreated }: { onPostCreated: () => void }) {
 
 /* === POST CARD === */
 function PostCard({ post, onReactionToggle }: { post: Post; onReactionToggle: (postId: string, type: "RESPECT" | "FIRE" | "BUG") => void }) {
-    const { user } = useAuth();
-    const userReactions = post.reactions.filter((r) => r.user === user?.uid);
-
     const hasReacted = (type: "RESPECT" | "FIRE" | "BUG") => {
-        return userReactions.some((r) => r.type === type);
+        return (post.my_reactions || []).includes(type);
     };
 
     const getReactionIcon = (type: "RESPECT" | "FIRE" | "BUG") => {
@@ -545,10 +542,11 @@ export default function FeedPage() {
     const [isLoading, setIsLoading] = useState(true);
     const [userStats, setUserStats] = useState<UserStats | null>(null);
     const [githubActivity, setGithubActivity] = useState<GitHubActivity | null>(null);
+    const [scope, setScope] = useState<"following" | "everyone">("following");
 
     const fetchPosts = async () => {
         try {
-            const data: any = await apiGet<Post[]>("/api/feed/");
+            const data: any = await apiGet<Post[]>(scope === "following" ? "/api/feed/timeline/" : "/api/feed/");
             const postList = Array.isArray(data) ? data : (data.results || []);
             setPosts(postList);
         } catch (error) {
@@ -603,7 +601,7 @@ export default function FeedPage() {
             // If we require auth, we should show "Sign in"
             setIsLoading(false);
         }
-    }, [user, authLoading]);
+    }, [user, authLoading, scope]);
 
     const handleReactionToggle = async (postId: string, type: "RESPECT" | "FIRE" | "BUG") => {
         try {
@@ -649,6 +647,24 @@ export default function FeedPage() {
                         {/* Compose */}
                         <ComposeBox onPostCreated={fetchPosts} />
 
+                        {/* Scope */}
+                        <div className="flex gap-2">
+                            {(["following", "everyone"] as const).map((s) => (
+                                <button
+                                    key={s}
+                                    onClick={() => setScope(s)}
+                                    className="px-4 py-1.5 rounded-lg text-sm font-medium transition-all"
+                                    style={{
+                                        background: scope === s ? "var(--hive-bg-elevated)" : "transparent",
+                                        border: "1px solid var(--hive-border)",
+                                        color: scope === s ? "var(--hive-text-primary)" : "var(--hive-text-secondary)",
+                                    }}
+                                >
+                                    {s === "following" ? "Following" : "Everyone"}
+                                </button>
+                            ))}
+                        </div>
+
                         {/* Loading Skeleton */}
                         {isLoading && (
                             <div className="space-y-6">
@@ -57,9 +57,19 @@ interface Thread {
     reply_count: number;
     vote_count: number;
     user_vote: number;
+    search_snippet: string | null;
 }
 
 /* === UTILITIES === */
+// Search snippets wrap matches in <mark>…</mark>; render them without trusting the rest as HTML
+function renderSnippet(snippet: string) {
+    return snippet.split(/(<mark>.*?<\/mark>)/g).map((part, i) =>
+        part.startsWith("<mark>")
+            ? <mark key={i} style={{ background: "rgba(0,212,255,0.2)", color: "var(--hive-text-primary)" }}>{part.slice(6, -7)}</mark>
+            : <span key={i}>{part}</span>
+    );
+}
+
 function getTimeAgo(timestamp: string): string {
     const now = Date.now();
     const diff = now - new Date(timestamp).getTime();
@@ -312,6 +322,12 @@ function ThreadCard({ thread, index }: { thread: Thread; index: number }) {
                         {thread.title}
                     </h3>
 
+                    {thread.search_snippet && (
+                        <p className="text-sm mb-2" style={{ color: "var(--hive-text-secondary)" }}>
+                            {renderSnippet(thread.search_snippet)}
+                        </p>
+                    )}
+
                     <div className="flex items-center gap-3 mb-3 flex-wrap text-xs" style={{ color: "var(--hive-text-muted)" }}>
                         <span>
                             by <span style={{ color: "var(--hive-accent-primary)", fontWeight: 500 }}>{thread.author.username}</span>
@@ -406,6 +422,10 @@ export default function ForumPage() {
     const [channels, setChannels] = useState<Channel[]>([]);
     const [threads, setThreads] = useState<Thread[]>([]);
     const [isLoading, setIsLoading] = useState(true);
+    const [searchInput, setSearchInput] = useState("");
+    const [searchQuery, setSearchQuery] = useState("");
+    const [popularTags, setPopularTags] = useState<{ name: string; thread_count: number }[]>([]);
+    const [activeTag, setActiveTag] = useState<string | null>(null);
 
     useEffect(() => {
         async function fetchChannels() {
@@ -420,6 +440,18 @@ export default function ForumPage() {
         fetchChannels();
     }, []);
 
+    useEffect(() => {
+        async function fetchTags() {
+            try {
+                const query = activeChannel ? `?channel=${encodeURIComponent(activeChannel)}` : "";
+                setPopularTags(await apiGet(`/api/forum/tags/${query}`));
+            } catch (error) {
+                console.error("Failed to fetch tags:", error);
+            }
+        }
+        fetchTags();
+    }, [activeChannel]);
+
     useEffect(() => {
         async function fetchThreads() {
             setIsLoading(true);
@@ -429,11 +461,15 @@ export default function ForumPage() {
                 if (activeChannel) {
                     params.append("channel", activeChannel);
                 }
-                // Add more filters if backend supports them directly, e.g. ordering
-                if (activeFilter === "hot") {
-                    params.append("ordering", "-votes"); // Assuming backend ordering
-                } else if (activeFilter === "new") {
-                    params.append("ordering", "-created_at");
+                // Ranked server-side (hot/top/rising/new); pinned threads stay on top
+                if (activeFilter === "hot" || activeFilter === "new") {
+                    params.append("sort", activeFilter);
+                }
+                if (searchQuery) {
+                    params.append("search", searchQuery);
+                }
+                if (activeTag) {
+                    params.append("tag", activeTag);
                 }
 
                 if (params.toString()) {
@@ -450,7 +486,7 @@ export default function ForumPage() {
             }
         }
         fetchThreads();
-    }, [activeChannel, activeFilter, user]);
+    }, [activeChannel, activeFilter, searchQuery, activeTag, user]);
 
 
     const featuredThread = threads.length > 0 ? threads.reduce((max, thread) => (thread.vote_count > max.vote_count ? thread : max), threads[0]) : null;
@@ -502,6 +538,9 @@ export default function ForumPage() {
                         <input
                             type="text"
                             placeholder="Search threads, topics, or users..."
+                            value={searchInput}
+                            onChange={(e) => setSearchInput(e.target.value)}
+                            onKeyDown={(e) => e.key === "Enter" && setSearchQuery(searchInput.trim())}
                             className="flex-1 bg-transparent outline-none text-sm"
                             style={{ color: "var(--hive-text-primary)" }}
                         />
@@ -550,6 +589,31 @@ export default function ForumPage() {
                                     ))}
                                 </div>
                             </div>
+
+                            {/* Popular Tags */}
+                            {popularTags.length > 0 && (
+                                <div className="glass-card p-4 mt-6">
+                                    <h3 className="text-xs font-bold uppercase tracking-wider mb-3" style={{ color: "var(--hive-text-muted)" }}>
+                                        Popular Tags
+                                    </h3>
+                                    <div className="flex flex-wrap gap-2">
+                                        {popularTags.map((tag) => (
+                                            <button
+                                                key={tag.name}
+                                                onClick={() => setActiveTag(activeTag === tag.name ? null : tag.name)}
+                                                className="tag text-xs px-2.5 py-1 rounded-md"
+                                                style={{
+                                                    background: activeTag === tag.name ? "rgba(124,58,237,0.3)" : "rgba(124,58,237,0.1)",
+                                                    color: "var(--hive-accent-secondary)",
+                                                    border: "1px solid rgba(124,58,237,0.2)",
+                                                }}
+                                            >
+                                                {tag.name} <span style={{ color: "var(--hive-text-muted)" }}>{tag.thread_count}</span>
+                                            </button>
+                                        ))}
+                                    </div>
+                                </div>
+                            )}
                         </motion.div>
 
                         {/* Main Content Area */}
@@ -30,7 +30,7 @@ import {
 } from "lucide-react";
 import Link from "next/link";
 import { useAuth } from "@/contexts/AuthContext";
-import { apiGet, apiPost } from "@/lib/api";
+import { apiGet, apiPost, waitForSyncJob, SyncJob } from "@/lib/api";
 import { useState, useEffect } from "react";
 
 /* === TYPES === */
@@ -473,7 +473,9 @@ export default function ProfilePage() {
 
     async function handleGhSync() {
         try {
-            const data = await apiPost<GitHubProfileData>("/api/github/sync/");
+            const job = await apiPost<SyncJob>("/api/github/sync/");
+            await waitForSyncJob(job.id);
+            const data = await apiGet<GitHubProfileData>("/api/github/profile/");
             setGhProfile(data);
             // Refresh events
             try {
@@ -638,6 +640,12 @@ export default function ProfilePage() {
                                                 <span className="text-xs" style={{ color: "var(--hive-text-muted)" }}>Public Repos</span>
                                                 <span className="text-sm font-bold" style={{ color: "var(--hive-accent-primary)" }}>{ghProfile.public_repos}</span>
                                             </div>
+                                            {ghProfile.total_contributions > 0 && (
+                                                <div className="flex items-center justify-between">
+                                                    <span className="text-xs" style={{ color: "var(--hive-text-muted)" }}>Contributions (past year)</span>
+                                                    <span className="text-sm font-bold" style={{ color: "var(--hive-accent-success)" }}>{ghProfile.total_contributions}</span>
+                                                </div>
+                                            )}
                                         </>
                                     )}
                                 </div>
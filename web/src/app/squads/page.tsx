@@ -4,7 +4,7 @@ import { useEffect, useState } from "react";
 import { Users, Search, Code, Github, Terminal } from "lucide-react";
 import { motion } from "framer-motion";
 import Link from "next/link";
-import { apiGet } from "@/lib/api";
+import { apiDelete, apiGet, apiPost } from "@/lib/api";
 import { useAuth } from "@/contexts/AuthContext";
 
 interface UserProfile {
@@ -12,6 +12,8 @@ interface UserProfile {
     username: string;
     first_name: string;
     last_name: string;
+    follower_count: number;
+    is_following: boolean | null;
     profile: {
         headline: string;
         avatar_url: string;
@@ -52,6 +54,18 @@ export default function SquadsPage() {
         fetchUsers();
     }, [user, authLoading]);
 
+    const toggleFollow = async (target: UserProfile) => {
+        try {
+            const path = `/api/users/${target.id}/follow/`;
+            const res: any = target.is_following ? await apiDelete(path) : await apiPost(path);
+            setUsers(prev => prev.map(u =>
+                u.id === target.id ? { ...u, is_following: res.following, follower_count: res.follower_count } : u
+            ));
+        } catch (error) {
+            console.error("Failed to update follow:", error);
+        }
+    };
+
     const filteredUsers = users.filter(u =>
         u.username.toLowerCase().includes(searchQuery.toLowerCase()) ||
         (u.first_name + " " + u.last_name).toLowerCase().includes(searchQuery.toLowerCase()) ||
@@ -151,12 +165,25 @@ export default function SquadsPage() {
                                     </div>
                                 </div>
 
-                                <button
-                                    className="w-full mt-6 py-2 rounded-lg text-sm font-medium transition-all hover:opacity-90 active:scale-95"
-                                    style={{ background: "var(--hive-bg-secondary)", border: "1px solid var(--hive-border)", color: "white" }}
-                                >
-                                    View Profile
-                                </button>
+                                <div className="flex gap-3 mt-6">
+                                    {profile.is_following !== null && (
+                                        <button
+                                            onClick={() => toggleFollow(profile)}
+                                            className="flex-1 py-2 rounded-lg text-sm font-medium transition-all hover:opacity-90 active:scale-95"
+                                            style={profile.is_following
+                                                ? { background: "var(--hive-bg-secondary)", border: "1px solid var(--hive-border)", color: "white" }
+                                                : { background: "var(--hive-gradient-primary)", color: "white" }}
+                                        >
+                                            {profile.is_following ? "Following" : "Follow"}
+                                        </button>
+                                    )}
+                                    <button
+                                        className="flex-1 py-2 rounded-lg text-sm font-medium transition-all hover:opacity-90 active:scale-95"
+                                        style={{ background: "var(--hive-bg-secondary)", border: "1px solid var(--hive-border)", color: "white" }}
+                                    >
+                                        View Profile
+                                    </button>
+                                </div>
                             </motion.div>
                         ))}
                     </div>
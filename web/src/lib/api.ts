@@ -56,3 +56,30 @@ export async function apiPatch<T = any>(path: string, body?: unknown): Promise<T
     }
     return res.json();
 }
+
+export async function apiDelete<T = any>(path: string): Promise<T> {
+    const headers = await getAuthHeaders();
+    const res = await fetch(`${API_BASE}${path}`, { method: "DELETE", headers });
+    if (!res.ok) {
+        const err = await res.json().catch(() => ({ error: res.statusText }));
+        throw new Error(err.error || err.detail || `API Error ${res.status}`);
+    }
+    return res.status === 204 ? (undefined as T) : res.json();
+}
+
+export interface SyncJob {
+    id: string;
+    kind: "GITHUB" | "CODEFORCES";
+    status: "QUEUED" | "RUNNING" | "DONE" | "FAILED";
+    error: string;
+}
+
+/** Poll a background sync job (returned with 202 by the sync endpoints) until it finishes. */
+export async function waitForSyncJob(jobId: string, intervalMs = 1500, timeoutMs = 60000): Promise<SyncJob> {
+    const deadline = Date.now() + timeoutMs;
+    while (true) {
+        const job = await apiGet<SyncJob>(`/api/sync/jobs/${jobId}/`);
+        if (job.status === "DONE" || job.status === "FAILED" || Date.now() > deadline) return job;
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+}